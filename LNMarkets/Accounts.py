@@ -0,0 +1,195 @@
+import threading
+import requests
+from . import APIUrls
+from .Client import Client, runBulk
+from .Metrics import TimedAdapter
+
+
+class AccountManager:
+    """
+    Clients of many accounts multiplexed over one bounded connection pool,
+    each with its own token and rate budget, with operations fanned out to
+    every account concurrently.
+
+        with AccountManager({'main': token1, 'hedge': token2}) as accounts:
+            balances = accounts.getBalance()
+            balances.results, balances.total
+
+    Fan-out operations return a BulkResult keyed by account name, so a
+    failing account does not stop the others.
+
+    Parameters-
+    accounts: Dict of account name to token. (optional)
+    baseUrl: API root url. (optional)
+    poolSize: Maximum number of connections shared by all the accounts.
+    Requests beyond it wait for a free connection. Each account keeps its
+    own session, so login cookies are never shared. (optional)
+    rate: requests per second allowed to each account. (optional)
+    burst: bucket size of each account, the rate by default. (optional)
+    retry: RetryPolicy of the clients. (optional)
+    serializer: Serializer of the clients. (optional)
+    """
+
+    def __init__(self, accounts=None, baseUrl=APIUrls.lnapi, poolSize=10,
+                 rate=None, burst=None, retry=None, serializer=None):
+        self.baseUrl = baseUrl
+        self.poolSize = poolSize
+        self.rate = rate
+        self.burst = burst
+        self.retry = retry
+        self.serializer = serializer
+        self.adapter = TimedAdapter(
+            pool_connections=1,
+            pool_maxsize=poolSize,
+            pool_block=True,
+        )
+        self.clients = {}
+        self._lock = threading.Lock()
+        for name, token in (accounts or {}).items():
+            self.add(name, token)
+
+    def _newSession(self):
+        session = requests.Session()
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        return session
+
+    def add(self, name, token, rate=None, burst=None):
+        """
+        Adds an account and returns its Client.
+
+        Parameters-
+        name: name of the account in the results.
+        token: Authentication token of the account.
+        rate: requests per second of this account, the manager's rate by
+        default. (optional)
+        burst: bucket size of this account. (optional)
+        """
+
+        client = Client(
+            token,
+            baseUrl=self.baseUrl,
+            poolSize=self.poolSize,
+            retry=self.retry,
+            serializer=self.serializer,
+            session=self._newSession(),
+        )
+        rate = self.rate if rate is None else rate
+        if rate is not None:
+            client.limitRate(rate, self.burst if burst is None else burst)
+        with self._lock:
+            if name in self.clients:
+                raise ValueError(f'Account {name} already exists')
+            self.clients[name] = client
+        return client
+
+    def remove(self, name):
+        """
+        Removes an account and returns its Client.
+
+        Parameters-
+        name: name of the account.
+        """
+
+        with self._lock:
+            return self.clients.pop(name)
+
+    def __getitem__(self, name):
+        return self.clients[name]
+
+    def __contains__(self, name):
+        return name in self.clients
+
+    def __iter__(self):
+        return iter(list(self.clients))
+
+    def __len__(self):
+        return len(self.clients)
+
+    def close(self):
+        """
+        Closes the shared connection pool.
+        """
+
+        self.adapter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def map(self, function, names=None, workers=None):
+        """
+        Calls a function with the Client of every account concurrently.
+
+        Parameters-
+        function: function taking a Client.
+        names: accounts to call, all by default. (optional)
+        workers: Maximum number of simultaneous calls, the pool size by
+        default. (optional)
+
+        Returns-
+        BulkResult keyed by account name.
+        """
+
+        with self._lock:
+            clients = dict(self.clients)
+        return runBulk(
+            lambda name: function(clients[name]),
+            list(clients) if names is None else names,
+            self.poolSize if workers is None else workers,
+        )
+
+    def userInformation(self, names=None):
+        """
+        Account information of every account.
+
+        Parameters-
+        names: accounts to query, all by default. (optional)
+        """
+
+        return self.map(lambda client: client.userInformation(), names)
+
+    def getBalance(self, names=None):
+        """
+        Balance of every account, summed by the result's total.
+
+        Parameters-
+        names: accounts to query, all by default. (optional)
+        """
+
+        return self.map(lambda client: client.getBalance(), names)
+
+    def getPositions(self, type_=None, names=None):
+        """
+        Positions of every account.
+
+        Parameters-
+        type_: "open", "running" or "closed". (optional)
+        names: accounts to query, all by default. (optional)
+        """
+
+        return self.map(lambda client: client.getPositions(type_), names)
+
+    def unrealizedProfit(self, names=None):
+        """
+        PL of the running positions of every account, summed by the
+        result's total.
+
+        Parameters-
+        names: accounts to query, all by default. (optional)
+        """
+
+        return self.map(lambda client: client.unrealizedProfit(), names)
+
+    def closeAll(self, names=None):
+        """
+        Closes all positions of every account. The PL of each account is
+        summed by the result's total.
+
+        Parameters-
+        names: accounts to close, all by default. (optional)
+        """
+
+        return self.map(lambda client: client.closeAll(), names)
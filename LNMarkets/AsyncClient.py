@@ -0,0 +1,1201 @@
+import asyncio
+import datetime
+import json
+import time
+from . import APIUrls, Models
+from .Client import BaseClient, BulkResult, BulkError
+from .PositionBook import positionList
+from .Cache import FRESH, STALE
+from .RateLimiter import priorityOf, retryAfter
+from .Errors import LNMarketsError, NetworkError, errorFor
+from .Metrics import Call, traceConfig
+
+
+def _importAiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError(
+            'AsyncClient requires aiohttp: pip install LNMarkets[async]'
+        )
+    return aiohttp
+
+
+class AsyncResponse:
+    """
+    Status, headers and body of an aiohttp response, read before its
+    connection is released. Mirrors the parts of requests.Response used by
+    the clients.
+    """
+
+    __slots__ = ('status_code', 'headers', 'text', 'elapsed')
+
+    def __init__(self, status_code, headers, text, elapsed=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.elapsed = datetime.timedelta(seconds=elapsed or 0)
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncClient(BaseClient):
+    """
+    asyncio LN Markets API client sharing one pooled aiohttp session.
+
+    Exposes the same methods as Client as coroutines. The session is
+    created on first use inside the running event loop, so the client must
+    be closed from that loop with `await client.close()` or used as an
+    async context manager. An aiohttp session returned by login may be
+    passed instead of a token to authenticate with its cookie.
+
+    Parameters-
+    token: Authentication token. (optional)
+    baseUrl: API root url. (optional)
+    poolSize: Maximum number of simultaneous connections. (optional)
+    retry: RetryPolicy with timeouts, retries and circuit breaker.
+    (optional)
+    serializer: Serializer encoding payloads and decoding responses.
+    (optional)
+    """
+
+    def __init__(self, token=None, baseUrl=APIUrls.lnapi, poolSize=100,
+                 retry=None, serializer=None):
+        super().__init__(token, baseUrl, poolSize, retry, serializer)
+        self.session = None
+        self._tasks = set()
+
+    def _newSession(self):
+        aiohttp = _importAiohttp()
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.poolSize),
+            # Keep login cookies of IP hosts too, eg. a local MockServer.
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            trace_configs=[traceConfig()],
+        )
+
+    def _getSession(self):
+        if self.session is None or self.session.closed:
+            self.session = self._newSession()
+        return self.session
+
+    async def close(self):
+        """
+        Closes all pooled connections.
+        """
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def authenticate(self, token=None, expiry=3600, refreshBefore=60,
+                           deposit=False, withdraw=False, positions=True,
+                           user=True):
+        """
+        Logs the client's session in and switches it to tokens generated
+        from that session, renewed before they expire and after a 401.
+        Returns the SessionAuth.
+
+        Parameters-
+        token: token used to log in, the client's token by default.
+        (optional)
+        expiry: lifetime in seconds of the generated tokens. (optional)
+        refreshBefore: seconds before expiry at which a token is renewed.
+        (optional)
+        deposit: Allow deposit (optional)
+        withdraw: Allow withdraw (optional)
+        positions: Allow opening or closing trade positions (optional)
+        user: Allow access to user information (optional)
+        """
+
+        auth = self._sessionAuth(token, expiry, refreshBefore, deposit,
+                                 withdraw, positions, user)
+        await auth.loginAsync()
+        await auth.refreshAsync()
+        self.auth = auth
+        return auth
+
+    async def _bulk(self, function, keys, workers):
+        result = BulkResult(keys)
+        semaphore = asyncio.Semaphore(max(workers, 1))
+
+        async def run(key):
+            async with semaphore:
+                try:
+                    result.results[key] = await function(key)
+                except Exception as error:
+                    result.errors[key] = error
+
+        await asyncio.gather(*(run(key) for key in result.keys))
+        return result
+
+    async def _cached(self, key, loader):
+        if self.cache is None or not self.cache.caches(key):
+            return await loader()
+        value, status = self.cache.lookup(key)
+        if status == FRESH:
+            return value
+        if status == STALE:
+            if self.cache.startRefresh(key):
+                task = asyncio.ensure_future(self._revalidate(key, loader))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+        value = await loader()
+        self.cache.store(key, value)
+        return value
+
+    async def _revalidate(self, key, loader):
+        try:
+            self.cache.store(key, await loader())
+        except Exception:
+            self.cache.endRefresh(key)
+
+    async def _send(self, method, url, token=None, params=None, payload=None,
+                    auth=True, session=None, headers=None, call=None):
+        aiohttp = _importAiohttp()
+        if isinstance(token, aiohttp.ClientSession):
+            session, token, auth = token, None, False
+        renewable = auth and token is None and self.auth is not None
+        if auth and token is None:
+            token = (
+                self.token if self.auth is None
+                else await self.auth.tokenAsync()
+            )
+        if session is None:
+            session = self._getSession()
+        data = None if payload is None else self.serializer.dumps(payload)
+
+        def headersFor(token):
+            requestHeaders = self._headers(token if auth else None,
+                                           data is not None)
+            if headers:
+                requestHeaders = {**requestHeaders, **headers}
+            return requestHeaders
+
+        requestHeaders = headersFor(token)
+        retry = self.retry
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=retry.connectTimeout,
+            sock_read=retry.readTimeout,
+        )
+        final = call is None
+        if call is None:
+            call = Call(method, url)
+        attempt = 0
+        while True:
+            call.begin(attempt)
+            try:
+                retry.check(url)
+            except LNMarketsError as error:
+                call.error = error
+                self._emit('onError', call.finish())
+                raise
+            if self.limiter is not None:
+                await self.limiter.acquireAsync(priorityOf(method, url))
+            call.add('wait', time.perf_counter() - call.started)
+            self._emit('beforeSend', call)
+            sentAt = time.monotonic()
+            try:
+                async with session.request(
+                    method,
+                    self.baseUrl+url,
+                    params=params,
+                    data=data,
+                    headers=requestHeaders,
+                    timeout=timeout,
+                    trace_request_ctx=call,
+                ) as response:
+                    headersAt = time.monotonic()
+                    response = self._limited(AsyncResponse(
+                        response.status,
+                        response.headers,
+                        await response.text(),
+                        time.monotonic() - sentAt,
+                    ))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                retry.failure()
+                call.error = error
+                self._emit('onError', call.finish())
+                if not retry.shouldRetry(
+                        method, url, attempt,
+                        sent=not isinstance(
+                            error, aiohttp.ClientConnectorError,
+                        ),
+                ):
+                    raise NetworkError(
+                        f'Unable to reach {url}: {error!r}',
+                        method=method,
+                        url=url,
+                        elapsed=time.monotonic() - sentAt,
+                    ) from error
+                await asyncio.sleep(retry.delay(attempt))
+            else:
+                call.received(
+                    response.status_code,
+                    response.elapsed.total_seconds(),
+                    headersAt - sentAt,
+                )
+                retry.record(response.status_code)
+                if response.status_code == 401 and renewable:
+                    renewable = False
+                    self._emit('afterReceive', call.finish())
+                    token = await self.auth.renewAsync(token)
+                    requestHeaders = headersFor(token)
+                    attempt += 1
+                    continue
+                if response.status_code < 400 or not retry.shouldRetry(
+                        method, url, attempt, response.status_code,
+                ):
+                    if final:
+                        self._emit('afterReceive', call.finish())
+                    return response
+                self._emit('afterReceive', call.finish())
+                await asyncio.sleep(retry.delay(
+                    attempt, retryAfter(response.headers, 0.0),
+                ))
+            attempt += 1
+
+    async def _request(self, method, url, errorMessage, token=None,
+                       params=None, payload=None, auth=True,
+                       decode=None):
+        key = self._flightKey(method, url, token, params, auth, decode)
+        if key is None:
+            return await self._fetch(method, url, errorMessage, token,
+                                     params, payload, auth, decode)
+        return await self.coalescer.runAsync(key, lambda: self._fetch(
+            method, url, errorMessage, token, params, payload, auth, decode,
+        ))
+
+    async def _fetch(self, method, url, errorMessage, token, params,
+                     payload, auth, decode):
+        call = Call(method, url)
+        response = await self._send(
+            method,
+            url,
+            token=token,
+            params=params,
+            payload=payload,
+            auth=auth,
+            call=call,
+        )
+        if response.status_code == 200:
+            decodeStarted = time.perf_counter()
+            data = self.serializer.loads(response.text)
+            if decode is not None:
+                data = decode(data)
+            call.add('decode', time.perf_counter() - decodeStarted)
+            self._emit('afterReceive', call.finish())
+            return data
+        else:
+            self._emit('afterReceive', call.finish())
+            call.error = errorFor(response, errorMessage, method, url)
+            self._emit('onError', call)
+            raise call.error
+
+    async def _poll(self, url, etag=None, params=None):
+        """
+        Conditional GET of a public endpoint.
+        Returns (etag, data) with data None when unchanged.
+        """
+
+        response = await self._send(
+            'GET', url,
+            params=params,
+            auth=False,
+            headers=None if etag is None else {'If-None-Match': etag},
+        )
+        return self._pollResult(response, url, etag)
+
+    # User
+
+    async def userInformation(self, token=None):
+        """
+        Get the user account Information.
+
+        Parameters-
+        token: Authentication token. (optional)
+        """
+
+        return await self._request(
+            'GET', APIUrls.userUrl,
+            'Unable to get user information',
+            token=token,
+        )
+
+    async def getBalance(self, token=None):
+        """
+        Get the user account balance.
+
+        Parameters-
+        token: Authentication token. (optional)
+        """
+
+        return (await self.userInformation(token))['balance']
+
+    async def updateUser(self, token=None, leaderboard=None,
+                         showUsername=None, username=None):
+        """
+        Update user account information.
+
+        Parameters-
+        token: Authentication token. (optional)
+        leaderboard: True to show user's profit on leaderboard.
+        showUsername: True to show the username on LN Marktes public data.
+        username: username to display.
+        """
+
+        return await self._request(
+            'PUT', APIUrls.userUrl,
+            'Unable to update user information',
+            token=token,
+            payload=self._userPayload(leaderboard, showUsername, username),
+        )
+
+    async def updatePassword(self, previousPassword, newPassword,
+                             token=None):
+        """
+        Update user account password.
+
+        Parameters-
+        previousPassword: Previous Password.
+        newPassword: New Password.
+        token: Authentication token. (optional)
+        """
+
+        return (await self._send(
+            'PUT', APIUrls.updateUrl,
+            token=token,
+            payload={
+                'previousPassword': previousPassword,
+                'newPassword': newPassword,
+            },
+        )).ok
+
+    async def getTransactions(self, type, nbitem=-1, index=1,
+                              getLength=False, start=None, end=None,
+                              models=False, token=None):
+        """
+        Retrieves all withdraw or deposit you did with LN Markets or just
+        one page
+
+        Parameters-
+        type: what kind of transactions ('withdraw' or 'deposit') to fetch
+        nbitem: maximum length of returned table (optional)
+        index: page offset (optional)
+        getLength: Boolean. True if need length of date splice (optional)
+        start: start of time interval (optional)
+        end: end of time interval (optional)
+        models: True to return Transaction models instead of dicts
+        (optional)
+        token: Authentication token. (optional)
+        """
+
+        return await self._request(
+            'GET', APIUrls.userHistoryUrl,
+            'Unable to get user transactions',
+            token=token,
+            params=self._transactionParams(
+                type, nbitem, index, getLength, start, end,
+            ),
+            decode=Models.transactions if models else None,
+        )
+
+    async def iterTransactions(self, type, pageSize=100, start=None,
+                               end=None, prefetch=True, models=False,
+                               token=None):
+        """
+        Async generator yielding withdraw or deposit transactions one at a
+        time, fetching pages lazily. While a page is consumed the next one
+        is fetched in the background.
+
+        Parameters-
+        type: what kind of transactions ('withdraw' or 'deposit') to fetch
+        pageSize: transactions per request (optional)
+        start: start of time interval (optional)
+        end: end of time interval (optional)
+        prefetch: False to fetch each page only when needed (optional)
+        models: True to yield Transaction models instead of dicts
+        (optional)
+        token: Authentication token. (optional)
+        """
+
+        async def fetch(index):
+            page = self._page(await self.getTransactions(
+                type, nbitem=pageSize, index=index, start=start, end=end,
+                token=token,
+            ))
+            return Models.Transaction.fromList(page) if models else page
+
+        index = 1
+        pending = asyncio.ensure_future(fetch(index))
+        try:
+            while pending is not None:
+                page = await pending
+                pending = None
+                index += 1
+                more = len(page) >= pageSize
+                if more and prefetch:
+                    pending = asyncio.ensure_future(fetch(index))
+                for transaction in page:
+                    yield transaction
+                if more and pending is None:
+                    pending = asyncio.ensure_future(fetch(index))
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def getTokens(self, session=None):
+        """
+        Retrieves the list of active JSON Web Token user currently holds.
+
+        Parameters-
+        session: Session returned by login, the client's session by
+        default. (optional)
+        """
+
+        return await self._request(
+            'GET', APIUrls.tokenUrl,
+            'Unable to get user tokens',
+            token=session,
+            auth=False,
+        )
+
+    async def revokeToken(self, token=None, session=None):
+        """
+        identifies and revoke usage of a given JWT.
+
+        Parameters-
+        token: Identifier of Token to be removed (optional)
+        session: Session returned by login, the client's session by
+        default. (optional)
+        """
+
+        params = None if token is None else {"jti": token}
+        await self._request(
+            'DELETE', APIUrls.tokenUrl,
+            'Unable to revoke user tokens',
+            token=session,
+            params=params,
+            auth=False,
+        )
+        return True
+
+    async def generateToken(self, expiry, deposit=False, withdraw=False,
+                            positions=False, user=False, session=None):
+        """
+        Using the given scopes, generate token to give access to different
+        parts of the public API.
+
+        Parameters-
+        expiry: token expiry in seconds.
+        deposit: Allow deposit (optional)
+        withdraw: Allow withdraw (optional)
+        positions: Allow opening or closing trade positions (optional)
+        user: Allow access to user information (optional)
+        session: Session returned by login, the client's session by
+        default. (optional)
+        """
+
+        return (await self._request(
+            'POST', APIUrls.tokenUrl,
+            'Unable to generate user tokens',
+            token=session,
+            payload=self._tokenPayload(
+                expiry, deposit, withdraw, positions, user,
+            ),
+            auth=False,
+        ))['token']
+
+    async def deposit(self, amount, unit="sat", token=None):
+        """
+        Add fund to your LN Markets balance.
+
+        Parameters-
+        amount: amount to deposit
+        unit: sat by default (optional)
+        token: Authentication token (optional)
+        """
+
+        return await self._request(
+            'POST', APIUrls.depositUrl,
+            'Unable to get invoice',
+            token=token,
+            payload={
+                'amount': amount,
+                'unit': unit,
+            },
+        )
+
+    async def withdrawInvoice(self, amount, invoice, unit="sat", token=None):
+        """
+        Move funds from the Lightning channel with LN Markets to user wallet
+        by using an invoice directly.
+
+        Parameters-
+        amount: amount to withdraw
+        invoice: BOLT 11 invoice with same amount
+        unit: Currently only sat (optional)
+        token: Authentication token (optional)
+        """
+
+        return await self._request(
+            'POST', APIUrls.withdrawUrl,
+            'Unable to make payment',
+            token=token,
+            payload={
+                'amount': amount,
+                'unit': unit,
+                'invoice': invoice,
+            },
+        )
+
+    async def withdrawLNURL(self, amount, unit="sat", token=None):
+        """
+        Move funds from the Lightning channel with LN Markets to user wallet
+        by using an LNURL.
+
+        Parameters-
+        amount: amount to withdraw
+        unit: Currently only sat (optional)
+        token: Authentication token (optional)
+        """
+
+        return await self._request(
+            'POST', APIUrls.withdrawLNUrl,
+            'Unable to create LNURL',
+            token=token,
+            payload={
+                'amount': amount,
+                'unit': unit,
+            },
+        )
+
+    async def login(self, token=None, session=None):
+        """
+        Use existing credentials to log in.
+        Returns the aiohttp session holding the login cookie, which can be
+        passed in place of a token to the other methods.
+
+        Parameters-
+        token: Authentication token. (optional)
+        session: Session to log in, a new one by default. (optional)
+        """
+
+        if token is None:
+            token = self.token
+        owned = session is None
+        if owned:
+            session = self._newSession()
+        loginResp = await self._send(
+            'POST', APIUrls.loginUrl,
+            payload=self._loginPayload(token),
+            auth=False,
+            session=session,
+        )
+        if loginResp.status_code == 200:
+            return session
+        else:
+            if owned:
+                await session.close()
+            raise errorFor(
+                loginResp, 'Unable to login', 'POST', APIUrls.loginUrl,
+            )
+
+    async def logout(self, session):
+        """
+        Deletes session cookie
+
+        Parameters-
+        session: Session returned by login.
+        """
+
+        return (await self._send(
+            'POST', APIUrls.logoutUrl,
+            auth=False,
+            session=session,
+        )).ok
+
+    # Positions
+
+    async def getPositions(self, type_=None, models=False, token=None,
+                           start=None, end=None, limit=None):
+        """
+        Retrieves either opened, closed or all positions.
+
+        Parameters-
+        type_: kind of positions ('open' or 'closed' or 'all') to fetch
+        (optional)
+        models: True to return Position models instead of dicts (optional)
+        token: Authentication token. (optional)
+        start: start of time interval, newest positions first (optional)
+        end: end of time interval (optional)
+        limit: maximum number of positions of each kind (optional)
+        """
+
+        params = self._positionParams(type_, start, end, limit)
+        return await self._request(
+            'GET', APIUrls.positionUrl,
+            'Unable to get positions',
+            token=token,
+            params=params,
+            decode=Models.positions if models else None,
+        )
+
+    async def iterPositions(self, type_='closed', pageSize=100, start=None,
+                            end=None, prefetch=True, models=False,
+                            token=None):
+        """
+        Async generator yielding the positions of one kind within a time
+        interval, newest first, fetching pages lazily. While a page is
+        consumed the next one is fetched in the background.
+
+        Parameters-
+        type_: kind of positions ('open', 'running' or 'closed') to fetch
+        (optional)
+        pageSize: positions per request (optional)
+        start: start of time interval (optional)
+        end: end of time interval (optional)
+        prefetch: False to fetch each page only when needed (optional)
+        models: True to yield Position models instead of dicts (optional)
+        token: Authentication token. (optional)
+        """
+
+        async def fetch(end, limit):
+            return positionList(await self.getPositions(
+                type_, token=token, start=start, end=end, limit=limit,
+            ), type_)
+
+        seen = set()
+        limit = pageSize
+        pending = asyncio.ensure_future(fetch(end, limit))
+        try:
+            while pending is not None:
+                page = await pending
+                pending = None
+                fresh, end, seen = self._positionPage(
+                    page, type_, start, end, seen,
+                )
+                more = fresh and len(page) >= limit
+                limit = pageSize + len(seen)
+                if more and prefetch:
+                    pending = asyncio.ensure_future(fetch(end, limit))
+                if models:
+                    fresh = Models.Position.fromList(fresh)
+                for position in fresh:
+                    yield position
+                if more and pending is None:
+                    pending = asyncio.ensure_future(fetch(end, limit))
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def newPositions(self, cursor, pageSize=100, token=None):
+        """
+        Returns the positions timed after those already seen by a cursor,
+        newest first, and advances the cursor.
+
+        Parameters-
+        cursor: PositionCursor kept between calls.
+        pageSize: positions per request (optional)
+        token: Authentication token. (optional)
+        """
+
+        positions = [
+            position async for position in self.iterPositions(
+                cursor.state, pageSize, start=cursor.since, token=token,
+            )
+        ]
+        return cursor.advance(positions)
+
+    async def createPosition(self, type_, side, leverage, margin=None,
+                             quantity=None, stoploss=None, takeprofit=None,
+                             price=None, token=None):
+        """
+        Send the order form parameters to add a new position in database.
+        See Positions.createPosition for details.
+
+        Parameters-
+        type_: "l" for limit order, "m" for market order.
+        side: "b" for buy, "s" for sell.
+        leverage: Leverage of the order.
+        margin: margin or quantity must be given (optional)
+        quantity: margin or quantity must be given (optional)
+        stoploss: StopLoss level. (optional)
+        takeprofit: Profit taking level. (optional)
+        price: limit price for limit order. (optional)
+        token: Authentication token. (optional)
+        """
+
+        return await self._submitPosition(
+            self._positionPayload(
+                type_, side, leverage, margin, quantity, stoploss,
+                takeprofit, price,
+            ),
+            token=token,
+        )
+
+    async def _submitPosition(self, payload, token=None):
+        data = await self._request(
+            'POST', APIUrls.positionUrl,
+            'Unable to create position',
+            token=token,
+            payload=payload,
+        )
+        self._track(data, token=token)
+        return data
+
+    async def createPositions(self, orders, workers=50, token=None):
+        """
+        Submit a batch of orders concurrently.
+        Every order is validated before any of them is sent.
+
+        Parameters-
+        orders: List of dicts of createPosition arguments, eg.
+        {'type_': "l", 'side': "b", 'leverage': 10, 'quantity': 1,
+        'price': 20000}
+        workers: Maximum number of simultaneous requests. (optional)
+        token: Authentication token. (optional)
+
+        Returns-
+        BulkResult keyed by order index, use ordered() for the responses
+        and errors in input order.
+        """
+
+        payloads = self._orderPayloads(orders)
+        return await self._bulk(
+            lambda index: self._submitPosition(payloads[index], token=token),
+            range(len(payloads)),
+            workers,
+        )
+
+    async def buy(self, leverage, margin=None, quantity=None, stoploss=None,
+                  takeprofit=None, token=None):
+        """
+        Send the buy order.
+        """
+
+        return await self.createPosition(
+            "m", "b", leverage,
+            margin=margin,
+            quantity=quantity,
+            stoploss=stoploss,
+            takeprofit=takeprofit,
+            token=token,
+        )
+
+    async def sell(self, leverage, margin=None, quantity=None, stoploss=None,
+                   takeprofit=None, token=None):
+        """
+        Send the sell order.
+        """
+
+        return await self.createPosition(
+            "m", "s", leverage,
+            margin=margin,
+            quantity=quantity,
+            stoploss=stoploss,
+            takeprofit=takeprofit,
+            token=token,
+        )
+
+    async def limitBuy(self, leverage, price, margin=None, quantity=None,
+                       stoploss=None, takeprofit=None, token=None):
+        """
+        Send the limit buy order.
+        """
+
+        return await self.createPosition(
+            "l", "b", leverage,
+            margin=margin,
+            quantity=quantity,
+            stoploss=stoploss,
+            takeprofit=takeprofit,
+            price=price,
+            token=token,
+        )
+
+    async def limitSell(self, leverage, price, margin=None, quantity=None,
+                        stoploss=None, takeprofit=None, token=None):
+        """
+        Send the limit sell order.
+        """
+
+        return await self.createPosition(
+            "l", "s", leverage,
+            margin=margin,
+            quantity=quantity,
+            stoploss=stoploss,
+            takeprofit=takeprofit,
+            price=price,
+            token=token,
+        )
+
+    async def updatePosition(self, pid, type_, value, token=None):
+        """
+        Modifies stoploss or takeprofit parameters of an existing position.
+
+        Parameters-
+        pid: ID of the position.
+        type_: "takeprofit" or "stoploss".
+        value: Price level to set.
+        token: Authentication token. (optional)
+        """
+
+        data = await self._request(
+            'PUT', APIUrls.positionUrl,
+            f'Unable to update position {pid}',
+            token=token,
+            payload={
+                'pid': pid,
+                'type': type_,
+                'value': value,
+            },
+        )
+        self._track(data, pid=pid, token=token)
+        return data
+
+    async def closePosition(self, pid, token=None):
+        """
+        Close the user position.
+
+        Parameters-
+        pid: ID of the position.
+        token: Authentication token. (optional)
+        """
+
+        data = await self._request(
+            'DELETE', APIUrls.positionUrl,
+            f'Unable to close position {pid}',
+            token=token,
+            params={"pid": pid},
+        )
+        self._track(data, pid=pid, state='closed', token=token)
+        return data
+
+    async def refreshPositions(self, states=('open', 'running', 'closed'),
+                               full=False, token=None):
+        """
+        Brings the attached PositionBook up to date with the API,
+        attaching a new one if needed, and returns it.
+
+        Each state keeps a PositionCursor, so a refresh only transfers the
+        positions created, filled or closed since the previous one and
+        applies them to the book. The first refresh of a state fetches all
+        of it. Cancellations and the pl of positions already running are
+        only picked up by a full refresh, which fetches every position of
+        the states again and replaces them in the book.
+        Raises ValueError if token belongs to another account.
+
+        Parameters-
+        states: 'open', 'running' and/or 'closed'. (optional)
+        full: fetch and replace the states entirely. (optional)
+        token: Authentication token. (optional)
+        """
+
+        book = self._ownBook(token)
+        for state in states:
+            cursor = self._bookCursor(state, full)
+            self._refreshBook(
+                book, state,
+                await self.newPositions(cursor, token=token), full,
+            )
+        return book
+
+    async def isOpen(self, pid, token=None):
+        """
+        Checks if a position is open. With a PositionBook attached, the
+        book answers without a request, unless token belongs to another
+        account.
+
+        Parameters-
+        pid: ID of the position.
+        token: Authentication token. (optional)
+        """
+
+        book = self._bookFor(token)
+        if book is not None:
+            return book.isOpen(pid)
+        running = await self.getPositions("running", token=token)
+        for position in positionList(running, "running"):
+            if (position['pid'] == pid):
+                return True
+
+        return False
+
+    async def closePositions(self, pids, workers=50, token=None):
+        """
+        Close many positions concurrently.
+        A failure to close one position does not stop the others.
+
+        Parameters-
+        pids: IDs of the positions.
+        workers: Maximum number of simultaneous requests. (optional)
+        token: Authentication token. (optional)
+
+        Returns-
+        BulkResult keyed by pid.
+        """
+
+        return await self._bulk(
+            lambda pid: self.closePosition(pid, token=token),
+            pids,
+            workers,
+        )
+
+    async def _closeSide(self, side, token=None, workers=1):
+        book = self._bookFor(token)
+        if book is None:
+            positions = positionList(
+                await self.getPositions("running", token=token), "running",
+            )
+        else:
+            positions = book.positions("running", side)
+        pids = [
+            position['pid'] for position in positions
+            if self._isClosable(position, side)
+        ]
+        result = await self.closePositions(
+            pids, workers=workers, token=token,
+        )
+        if result.errors:
+            raise BulkError('Unable to close positions', result)
+
+        return result.pl
+
+    async def closeAllLongs(self, token=None, workers=1):
+        """
+        Close all positions on long side, taken from the attached
+        PositionBook if any.
+        Raises BulkError after every position was attempted if some could
+        not be closed.
+
+        Parameters-
+        token: Authentication token. (optional)
+        workers: Number of positions closed simultaneously. (optional)
+        """
+
+        return await self._closeSide("b", token=token, workers=workers)
+
+    async def closeAllShorts(self, token=None, workers=1):
+        """
+        Close all positions on short side, taken from the attached
+        PositionBook if any.
+        Raises BulkError after every position was attempted if some could
+        not be closed.
+
+        Parameters-
+        token: Authentication token. (optional)
+        workers: Number of positions closed simultaneously. (optional)
+        """
+
+        return await self._closeSide("s", token=token, workers=workers)
+
+    async def closeAll(self, token=None):
+        """
+        Close all positions.
+
+        Parameters-
+        token: Authentication token. (optional)
+        """
+
+        data = await self._request(
+            'DELETE', APIUrls.closeAllUrl,
+            'Unable to close all positions',
+            token=token,
+        )
+        book = self._bookFor(token)
+        if book is not None:
+            book.closeRunning()
+        return data['pl']
+
+    async def realizedProfit(self, token=None, start=None, end=None):
+        """
+        Calculates the total profit/loss from closed positions.
+
+        Parameters-
+        token: Authentication token. (optional)
+        start: start of the closing time interval (optional)
+        end: end of the closing time interval (optional)
+        """
+
+        if start is None and end is None:
+            positions = positionList(
+                await self.getPositions("closed", token=token), "closed",
+            )
+        else:
+            positions = [
+                position async for position in self.iterPositions(
+                    "closed", start=start, end=end, token=token,
+                )
+            ]
+        return sum(float(position['pl']) for position in positions)
+
+    async def unrealizedProfit(self, token=None):
+        """
+        Calculates the total profit/loss from open positions. With a
+        PositionBook attached, sums the pl stored in the book without a
+        request.
+
+        Parameters-
+        token: Authentication token. (optional)
+        """
+
+        book = self._bookFor(token)
+        if book is not None:
+            return book.unrealizedProfit()
+        return sum(
+            float(position['pl'])
+            for position in positionList(
+                await self.getPositions("running", token=token), "running",
+            )
+        )
+
+    async def addMargin(self, pid, amount, token=None):
+        """
+        Adds margin to a running position.
+
+        Parameters-
+        pid: ID of the position.
+        amount: amount to add in sats.
+        token: Authentication token. (optional)
+        """
+
+        data = await self._request(
+            'POST', APIUrls.addMarginUrl,
+            f'Unable to add margin to position {pid}',
+            token=token,
+            payload={
+                'amount': amount,
+                'pid': pid,
+            },
+        )
+        self._track(data, pid=pid, token=token)
+        return data
+
+    async def cashin(self, pid, amount, token=None):
+        """
+        Retrieves part of a running position's profit.
+
+        Parameters-
+        pid: ID of the position.
+        amount: amount to retrieve in sats.
+        token: Authentication token. (optional)
+        """
+
+        data = await self._request(
+            'POST', APIUrls.cashinUrl,
+            f'Unable to cash-in position {pid}',
+            token=token,
+            payload={
+                'amount': amount,
+                'pid': pid,
+            },
+        )
+        self._track(data, pid=pid, token=token)
+        return data
+
+    async def cancelPosition(self, pid, token=None):
+        """
+        Cancel the position linked to the given pid.
+        Only works on positions that are not currently filled.
+
+        Parameters-
+        pid: ID of the position.
+        token: Authentication token. (optional)
+        """
+
+        data = await self._request(
+            'POST', APIUrls.cancelUrl,
+            f'Unable to cancel position {pid}',
+            token=token,
+            payload={'pid': pid},
+        )
+        self._track(data, pid=pid, state='canceled', token=token)
+        return data
+
+    # State
+
+    async def getState(self):
+        """
+        Shows informations about api.
+        """
+
+        stateData = await self._cached('getState', lambda: self._request(
+            'GET', APIUrls.stateUrl,
+            'Unable to fetch State Information',
+            auth=False,
+        ))
+        if stateData['state']['newPosition']:
+            return stateData
+        else:
+            raise ValueError('New Positions currently not allowed')
+
+    async def getNodeInformation(self):
+        """
+        Shows informations about the lightning node.
+        """
+
+        return await self._cached(
+            'getNodeInformation',
+            lambda: self._request(
+                'GET', APIUrls.nodeUrl,
+                'Unable to fetch Node Information',
+                auth=False,
+            ),
+        )
+
+    # History
+
+    async def getIndex(self, columnar=False, start=None, end=None,
+                       limit=None):
+        """
+        Retrieves index value.
+
+        Parameters-
+        columnar: True to return a dict of numpy column arrays instead of
+        the list of entries, see Columnar.toColumns. (optional)
+        start: start of time interval in ms (optional)
+        end: end of time interval in ms (optional)
+        limit: maximum number of entries (optional)
+        """
+
+        data = await self._request(
+            'GET', APIUrls.indexUrl,
+            'Unable to fetch index data',
+            params=self._historyParams(start, end, limit),
+            auth=False,
+        )
+        return self._columns(data) if columnar else data
+
+    async def getBidOffer(self, columnar=False, start=None, end=None,
+                          limit=None):
+        """
+        Retrieves bid-offer values.
+
+        Parameters-
+        columnar: True to return a dict of numpy column arrays instead of
+        the list of entries, see Columnar.toColumns. (optional)
+        start: start of time interval in ms (optional)
+        end: end of time interval in ms (optional)
+        limit: maximum number of entries (optional)
+        """
+
+        data = await self._request(
+            'GET', APIUrls.bidOfferUrl,
+            'Unable to fetch bid-offer data',
+            params=self._historyParams(start, end, limit),
+            auth=False,
+        )
+        return self._columns(data) if columnar else data
@@ -0,0 +1,163 @@
+import threading
+import time
+from .Errors import AuthError
+
+
+class SessionAuth:
+    """
+    Logged-in session of a Client or AsyncClient, from which short-lived
+    API tokens are generated and renewed before they expire, so a
+    long-running client never sends an expired token nor logs in again on
+    every call.
+
+    The login cookie is kept on the client's own connection pool. When the
+    session itself has expired, generating a token logs in again with the
+    login token. An AsyncClient uses the coroutine variants, suffixed
+    Async.
+
+    Parameters-
+    client: Client or AsyncClient to authenticate.
+    loginToken: token used to log in.
+    expiry: lifetime in seconds of the generated tokens. (optional)
+    refreshBefore: seconds before expiry at which a token is renewed.
+    (optional)
+    scopes: Dict of generateToken scopes, eg. {'positions': True}.
+    (optional)
+    """
+
+    def __init__(self, client, loginToken, expiry=3600, refreshBefore=60,
+                 scopes=None):
+        if refreshBefore >= expiry:
+            raise ValueError('refreshBefore must be shorter than expiry')
+        self.client = client
+        self.loginToken = loginToken
+        self.expiry = expiry
+        self.refreshBefore = refreshBefore
+        self.scopes = dict(scopes or {})
+        self.expiresAt = None
+        self.refreshes = 0
+        self._token = None
+        self._lock = threading.Lock()
+        self._asyncLock = None
+
+    def login(self):
+        """
+        Logs the client's session in with the login token.
+        """
+
+        self.client.login(self.loginToken, session=self.client.session)
+
+    def _generate(self):
+        return self.client.generateToken(self.expiry, **self.scopes)
+
+    def refresh(self):
+        """
+        Generates a new token now and returns it.
+        """
+
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        requested = time.monotonic()
+        try:
+            token = self._generate()
+        except AuthError:
+            self.login()
+            token = self._generate()
+        return self._store(token, requested)
+
+    def _store(self, token, requested):
+        self._token = token
+        self.expiresAt = requested + self.expiry
+        self.refreshes += 1
+        self.client.token = token
+        return token
+
+    def _due(self):
+        return self._token is None or (
+            time.monotonic() >= self.expiresAt - self.refreshBefore
+        )
+
+    def token(self):
+        """
+        Returns the current token, renewed first if it expires within
+        refreshBefore seconds.
+        """
+
+        with self._lock:
+            if self._due():
+                return self._refresh()
+            return self._token
+
+    def renew(self, rejected):
+        """
+        Replaces a token the API rejected, unless another thread already
+        did, and returns the current token.
+
+        Parameters-
+        rejected: token of the failed request.
+        """
+
+        with self._lock:
+            if rejected == self._token:
+                return self._refresh()
+            return self._token
+
+    def logout(self):
+        """
+        Deletes the session cookie. The client falls back to its last
+        token.
+        """
+
+        with self._lock:
+            if self.client.auth is self:
+                self.client.auth = None
+            return self.client.logout(self.client.session)
+
+    # AsyncClient
+
+    def _getAsyncLock(self):
+        if self._asyncLock is None:
+            import asyncio
+            self._asyncLock = asyncio.Lock()
+        return self._asyncLock
+
+    async def loginAsync(self):
+        await self.client.login(
+            self.loginToken, session=self.client._getSession(),
+        )
+
+    async def _refreshAsync(self):
+        requested = time.monotonic()
+        try:
+            token = await self.client.generateToken(
+                self.expiry, **self.scopes,
+            )
+        except AuthError:
+            await self.loginAsync()
+            token = await self.client.generateToken(
+                self.expiry, **self.scopes,
+            )
+        return self._store(token, requested)
+
+    async def refreshAsync(self):
+        async with self._getAsyncLock():
+            return await self._refreshAsync()
+
+    async def tokenAsync(self):
+        async with self._getAsyncLock():
+            if self._due():
+                return await self._refreshAsync()
+            return self._token
+
+    async def renewAsync(self, rejected):
+        async with self._getAsyncLock():
+            if rejected == self._token:
+                return await self._refreshAsync()
+            return self._token
+
+    async def logoutAsync(self):
+        if self.client.auth is self:
+            self.client.auth = None
+        return await self.client.logout(self.client._getSession())
@@ -0,0 +1,389 @@
+"""
+Benchmark of the client against a MockServer running in a child process.
+
+    python -m LNMarkets.Benchmark --calls 200 --output benchmarks
+    python -m LNMarkets.Benchmark --compare benchmarks/<previous>.json
+
+The cold import time of the package and its main modules is measured in
+fresh interpreters. Every case is measured in three modes:
+sync: one request at a time on a new connection, like the original
+module functions.
+pooled: one request at a time on the keep-alive pool of a Client.
+concurrent: requests from many threads sharing one Client.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from . import Client
+from .MockServer import MockServer
+
+MODES = ('sync', 'pooled', 'concurrent')
+IMPORTS = (
+    'LNMarkets', 'LNMarkets.User', 'LNMarkets.Positions',
+    'LNMarkets.AsyncClient',
+)
+
+
+def _serve(connection, options):
+    with MockServer(**options) as server:
+        connection.send((server.url, server.token))
+        connection.recv()
+
+
+class RemoteServer:
+    """
+    MockServer running in a child process, so its CPU time and
+    allocations are not counted as the client's.
+
+    Parameters-
+    options: keyword arguments of MockServer. (optional)
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self.url = None
+        self.token = None
+        self._connection = None
+        self._process = None
+
+    def __enter__(self):
+        self._connection, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(child, self.options), daemon=True,
+        )
+        self._process.start()
+        self.url, self.token = self._connection.recv()
+        return self
+
+    def __exit__(self, *exc):
+        self._connection.send(None)
+        self._process.join(5)
+
+
+class Case:
+    """
+    One benchmarked call.
+
+    Parameters-
+    name: name of the case in the results.
+    call: function of a client making the call.
+    setup: function of a client run untimed before each call. (optional)
+    concurrent: False if concurrent calls would conflict. (optional)
+    """
+
+    def __init__(self, name, call, setup=None, concurrent=True):
+        self.name = name
+        self.call = call
+        self.setup = setup
+        self.concurrent = concurrent
+
+
+def _openLongs(client, count=5):
+    for _ in range(count):
+        client.buy(10, quantity=1)
+
+
+CASES = (
+    Case('getPositions', lambda client: client.getPositions('running')),
+    Case('createPosition', lambda client: client.buy(10, quantity=1)),
+    Case('closeAllLongs', lambda client: client.closeAllLongs(),
+         setup=_openLongs, concurrent=False),
+    Case('getTransactions',
+         lambda client: client.getTransactions('deposit', nbitem=100)),
+    Case('getIndex', lambda client: client.getIndex(limit=1000)),
+    Case('getBidOffer', lambda client: client.getBidOffer(limit=1000)),
+)
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of values.
+
+    Parameters-
+    values: Array of numbers.
+    fraction: 0.5 for the median, 0.99 for p99.
+    """
+
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1,
+                      int(round(fraction * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def _timeCall(client, case, mode):
+    if case.setup is not None:
+        case.setup(client)
+    started = time.perf_counter()
+    case.call(client)
+    elapsed = time.perf_counter() - started
+    if mode == 'sync':
+        client.session.close()
+    return elapsed
+
+
+def _allocations(client, case, mode, calls):
+    tracemalloc.start()
+    total = 0
+    blocks = 0
+    try:
+        for _ in range(calls):
+            if case.setup is not None:
+                case.setup(client)
+            before = tracemalloc.take_snapshot()
+            case.call(client)
+            after = tracemalloc.take_snapshot()
+            for stat in after.compare_to(before, 'filename'):
+                if stat.size_diff > 0:
+                    total += stat.size_diff
+                    blocks += max(stat.count_diff, 0)
+            if mode == 'sync':
+                client.session.close()
+    finally:
+        tracemalloc.stop()
+    return total / calls, blocks / calls
+
+
+def measure(client, case, mode, calls, workers=16, allocationCalls=10):
+    """
+    Measures one case in one mode and returns a dict of results.
+
+    Parameters-
+    client: Client connected to the server.
+    case: Case to measure.
+    mode: 'sync', 'pooled' or 'concurrent'.
+    calls: number of timed calls.
+    workers: threads of the concurrent mode. (optional)
+    allocationCalls: calls traced for allocations, 0 to skip. (optional)
+    """
+
+    case.call(client)
+    cpuStarted = time.process_time()
+    started = time.perf_counter()
+    if mode == 'concurrent':
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(
+                lambda _: _timeCall(client, case, mode), range(calls),
+            ))
+    else:
+        latencies = [_timeCall(client, case, mode) for _ in range(calls)]
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpuStarted
+    result = {
+        'case': case.name,
+        'mode': mode,
+        'calls': calls,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+        'mean': statistics.mean(latencies),
+        'rps': calls / wall,
+        'cpu': cpu / calls,
+    }
+    if allocationCalls and mode != 'concurrent':
+        result['allocBytes'], result['allocBlocks'] = _allocations(
+            client, case, mode, allocationCalls,
+        )
+    return result
+
+
+def importTime(module, repeat=5):
+    """
+    Cold import time of a module in seconds, the best of repeat fresh
+    interpreters as reported by python -X importtime.
+
+    Parameters-
+    module: dotted module name.
+    repeat: number of interpreters started. (optional)
+    """
+
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        ).stderr
+        microseconds = int(output.strip().splitlines()[-1].split('|')[1])
+        if best is None or microseconds < best:
+            best = microseconds
+    return best / 1e6
+
+
+def run(calls=100, modes=MODES, cases=None, workers=16, latency=0.0,
+        allocationCalls=10, imports=IMPORTS):
+    """
+    Runs the benchmark against a new MockServer and returns the report.
+
+    Parameters-
+    calls: timed calls per case and mode. (optional)
+    modes: modes to measure. (optional)
+    cases: names of the cases to run, all by default. (optional)
+    workers: threads of the concurrent mode. (optional)
+    latency: seconds of latency added by the server. (optional)
+    allocationCalls: calls traced for allocations, 0 to skip. (optional)
+    imports: modules whose import time is measured. (optional)
+    """
+
+    importTimes = {module: importTime(module) for module in imports}
+    selected = [
+        case for case in CASES if cases is None or case.name in cases
+    ]
+    results = []
+    options = {
+        'latency': latency,
+        'transactions': 1000,
+        'balance': 10 ** 12,
+    }
+    with RemoteServer(**options) as server:
+        for mode in modes:
+            client = Client.Client(
+                server.token, baseUrl=server.url, poolSize=workers,
+            )
+            with client:
+                client.closeAll()
+                _openLongs(client, 100)
+                for case in selected:
+                    if mode == 'concurrent' and not case.concurrent:
+                        continue
+                    results.append(measure(
+                        client, case, mode, calls, workers, allocationCalls,
+                    ))
+    return {
+        'label': _version(),
+        'time': int(time.time()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'latency': latency,
+        'imports': importTimes,
+        'results': results,
+    }
+
+
+def _version():
+    try:
+        from importlib.metadata import version
+        return version('LNMarkets')
+    except Exception:
+        return 'unknown'
+
+
+def save(report, directory):
+    """
+    Writes a report as <directory>/<label>-<time>.json and returns the path.
+
+    Parameters-
+    report: run result.
+    directory: folder of the stored reports, created if missing.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(
+        directory, f"{report['label']}-{report['time']}.json",
+    )
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=1)
+    return path
+
+
+def compare(report, previous):
+    """
+    Returns the ratio new / previous of p50, p99, rps and cpu for each
+    case and mode present in both reports.
+
+    Parameters-
+    report: new run result.
+    previous: older run result.
+    """
+
+    old = {
+        (result['case'], result['mode']): result
+        for result in previous['results']
+    }
+    ratios = {}
+    for result in report['results']:
+        before = old.get((result['case'], result['mode']))
+        if before is None:
+            continue
+        ratios[(result['case'], result['mode'])] = {
+            key: result[key] / before[key] if before[key] else None
+            for key in ('p50', 'p99', 'rps', 'cpu')
+        }
+    for module, seconds in report.get('imports', {}).items():
+        before = previous.get('imports', {}).get(module)
+        if before:
+            ratios[('import', module)] = {'time': seconds / before}
+    return ratios
+
+
+def render(report, ratios=None):
+    """
+    Renders a report as a text table.
+
+    Parameters-
+    report: run result.
+    ratios: compare result shown next to each row. (optional)
+    """
+
+    lines = [
+        f"{report['label']} python {report['python']}",
+        f"{'case':<16}{'mode':<12}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>9}"
+        f"{'cpu ms':>9}{'alloc kB':>10}",
+    ]
+    for result in report['results']:
+        alloc = result.get('allocBytes')
+        line = (
+            f"{result['case']:<16}{result['mode']:<12}"
+            f"{result['p50'] * 1000:>9.2f}{result['p99'] * 1000:>9.2f}"
+            f"{result['rps']:>9.0f}{result['cpu'] * 1000:>9.2f}"
+            f"{'' if alloc is None else f'{alloc / 1024:.1f}':>10}"
+        )
+        if ratios and (result['case'], result['mode']) in ratios:
+            ratio = ratios[(result['case'], result['mode'])]
+            line += f"  p50 x{ratio['p50']:.2f} rps x{ratio['rps']:.2f}"
+        lines.append(line)
+    for module, seconds in report.get('imports', {}).items():
+        line = f"{'import':<16}{module:<24}{seconds * 1000:>9.2f} ms"
+        if ratios and ('import', module) in ratios:
+            line += f"  x{ratios[('import', module)]['time']:.2f}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m LNMarkets.Benchmark',
+        description='Benchmark the client against a local MockServer.',
+    )
+    parser.add_argument('--calls', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--cases', nargs='+',
+                        choices=[case.name for case in CASES])
+    parser.add_argument('--output', help='folder to store the report in')
+    parser.add_argument('--compare', help='previous report to compare to')
+    args = parser.parse_args(argv)
+    report = run(
+        calls=args.calls, modes=args.modes, cases=args.cases,
+        workers=args.workers, latency=args.latency,
+    )
+    ratios = None
+    if args.compare:
+        with open(args.compare) as file:
+            ratios = compare(report, json.load(file))
+    print(render(report, ratios))
+    if args.output:
+        print(f'Saved to {save(report, args.output)}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
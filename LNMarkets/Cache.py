@@ -0,0 +1,110 @@
+import threading
+import time
+
+DEFAULT_TTLS = {
+    'getState': 1.0,
+    'getNodeInformation': 300.0,
+}
+
+FRESH = 'fresh'
+STALE = 'stale'
+MISSING = 'missing'
+
+
+class TTLCache:
+    """
+    Time based cache of endpoint responses.
+
+    An entry younger than its ttl is fresh. Up to maxStale seconds after
+    that it is stale: it is still served while one background refresh
+    replaces it. Older entries are reloaded before returning.
+
+    Parameters-
+    ttls: Dict of endpoint name to ttl in seconds, see DEFAULT_TTLS.
+    Endpoints missing from the dict are not cached. (optional)
+    maxStale: Dict of endpoint name to seconds a stale entry may be served
+    while revalidating, the ttl by default. (optional)
+    """
+
+    def __init__(self, ttls=None, maxStale=None):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.maxStale = dict(self.ttls if maxStale is None else maxStale)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._refreshing = set()
+
+    def caches(self, key):
+        return key in self.ttls
+
+    def lookup(self, key):
+        """
+        Returns (value, status) with status FRESH, STALE or MISSING.
+
+        Parameters-
+        key: endpoint name.
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, MISSING
+        value, storedAt = entry
+        age = time.monotonic() - storedAt
+        ttl = self.ttls[key]
+        if age < ttl:
+            return value, FRESH
+        if age < ttl + self.maxStale.get(key, 0):
+            return value, STALE
+        return None, MISSING
+
+    def store(self, key, value):
+        """
+        Stores a fresh value.
+
+        Parameters-
+        key: endpoint name.
+        value: response to cache.
+        """
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._refreshing.discard(key)
+
+    def startRefresh(self, key):
+        """
+        Returns True if the caller should refresh the entry, False if a
+        refresh is already in flight.
+
+        Parameters-
+        key: endpoint name.
+        """
+
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def endRefresh(self, key):
+        """
+        Marks a failed refresh as finished, keeping the stale entry.
+
+        Parameters-
+        key: endpoint name.
+        """
+
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def invalidate(self, key=None):
+        """
+        Drops one cached entry, or all of them.
+
+        Parameters-
+        key: endpoint name. (optional)
+        """
+
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
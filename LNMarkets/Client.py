@@ -0,0 +1,1641 @@
+import threading
+import time
+import requests
+from urllib3.exceptions import NewConnectionError
+from . import APIUrls, Models
+from .PositionBook import (
+    PositionBook, PositionCursor, TIME_FIELDS, newerPositions, positionList,
+)
+from .Auth import SessionAuth
+from .Cache import TTLCache, FRESH, STALE
+from .Coalescer import Coalescer, flightKey
+from .RateLimiter import RateLimiter, priorityOf, retryAfter
+from .Retry import RetryPolicy
+from .Errors import LNMarketsError, NetworkError, errorFor
+from .Metrics import EVENTS, Call, TimedAdapter, recordPhases
+from .Serializer import Serializer
+
+
+class BulkResult:
+    """
+    Outcome of a bulk operation, collected per key without aborting on the
+    first failure.
+
+    Attributes-
+    keys: Keys of the operation in input order.
+    results: Dict of key to response for the successful calls.
+    errors: Dict of key to raised exception for the failed calls.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.results = {}
+        self.errors = {}
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def pl(self):
+        """
+        Summed profit/loss of the successful calls.
+        """
+
+        return sum(float(data['pl']) for data in self.results.values())
+
+    @property
+    def total(self):
+        """
+        Sum of the numeric responses of the successful calls, eg. balances.
+        """
+
+        return sum(float(data) for data in self.results.values())
+
+    def ordered(self):
+        """
+        Returns the response or the exception of every key in input order.
+        """
+
+        return [
+            self.errors[key] if key in self.errors else self.results[key]
+            for key in self.keys
+        ]
+
+    def _errorMessage(self, message):
+        reasons = '\n'.join(
+            f'{key}: {error}' for key, error in self.errors.items()
+        )
+        return f'{message}:\n{reasons}'
+
+
+class BulkError(LNMarketsError):
+    """
+    Raised when some calls of a bulk operation failed.
+    The partial outcome is available as `result`.
+    """
+
+    def __init__(self, message, result):
+        super().__init__(result._errorMessage(message))
+        self.result = result
+
+
+def runBulk(function, keys, workers):
+    """
+    Calls a function with every key on up to workers threads and returns
+    the BulkResult.
+
+    Parameters-
+    function: function taking a key.
+    keys: keys of the operation.
+    workers: Maximum number of simultaneous calls.
+    """
+
+    result = BulkResult(keys)
+
+    def run(key):
+        try:
+            result.results[key] = function(key)
+        except Exception as error:
+            result.errors[key] = error
+
+    if workers <= 1 or len(result.keys) <= 1:
+        for key in result.keys:
+            run(key)
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(
+                max_workers=min(workers, len(result.keys))
+        ) as pool:
+            list(pool.map(run, result.keys))
+    return result
+
+
+class BaseClient:
+    """
+    State and request building shared by Client and AsyncClient.
+
+    Parameters-
+    token: Authentication token. (optional)
+    baseUrl: API root url. (optional)
+    poolSize: Maximum number of pooled connections kept alive. (optional)
+    retry: RetryPolicy with timeouts, retries and circuit breaker.
+    (optional)
+    serializer: Serializer encoding payloads and decoding responses, the
+    fastest installed JSON backend by default. (optional)
+    """
+
+    def __init__(self, token=None, baseUrl=APIUrls.lnapi, poolSize=10,
+                 retry=None, serializer=None):
+        self.token = token
+        self.baseUrl = baseUrl
+        self.poolSize = poolSize
+        self.retry = RetryPolicy() if retry is None else retry
+        self.serializer = Serializer() if serializer is None else serializer
+        self.book = None
+        self._bookCursors = {}
+        self.cache = None
+        self.limiter = None
+        self.coalescer = None
+        self.auth = None
+        self.hooks = {event: [] for event in EVENTS}
+        self._headerCache = {}
+
+    def addHook(self, event, function):
+        """
+        Calls a function with the Metrics.Call of every HTTP attempt.
+
+        beforeSend runs before each attempt is sent, afterReceive after
+        each response is read and decoded, and onError after each network
+        error and before each API error is raised.
+
+        Parameters-
+        event: 'beforeSend', 'afterReceive' or 'onError'.
+        function: function taking the Call.
+        """
+
+        if event not in self.hooks:
+            raise ValueError(f'Unknown event {event}')
+        self.hooks[event].append(function)
+
+    def removeHook(self, event, function):
+        """
+        Unregisters a function added with addHook.
+
+        Parameters-
+        event: 'beforeSend', 'afterReceive' or 'onError'.
+        function: function to remove.
+        """
+
+        self.hooks[event].remove(function)
+
+    def _emit(self, event, call):
+        for hook in self.hooks[event]:
+            hook(call)
+
+    def trackPositions(self, book=None):
+        """
+        Attaches a PositionBook updated from every position call made
+        through this client, and returns it.
+
+        The book holds the positions of the client's own account. Calls
+        made with another token neither update it nor are answered from
+        it.
+
+        Parameters-
+        book: PositionBook to attach, a new one by default. (optional)
+        """
+
+        self.book = PositionBook() if book is None else book
+        self._bookCursors = {}
+        return self.book
+
+    def _bookFor(self, token=None):
+        """
+        Returns the attached PositionBook if it tracks the account of
+        token, else None.
+        """
+
+        if token is None or token == self.token:
+            return self.book
+        return None
+
+    def _ownBook(self, token=None):
+        if self.book is None:
+            self.trackPositions()
+        book = self._bookFor(token)
+        if book is None:
+            raise ValueError(
+                'The PositionBook tracks the account of the client token',
+            )
+        return book
+
+    def _bookCursor(self, state, full=False):
+        cursor = self._bookCursors.get(state)
+        if full or cursor is None:
+            cursor = self._bookCursors[state] = PositionCursor(state)
+        return cursor
+
+    @staticmethod
+    def _refreshBook(book, state, positions, full=False):
+        if full:
+            book.replace(state, positions)
+            return
+        for position in positions:
+            book.apply(position, state=state)
+
+    def _track(self, data, pid=None, state=None, token=None):
+        book = self._bookFor(token)
+        if book is not None:
+            book.apply(data, pid=pid, state=state)
+
+    def enableCache(self, ttls=None, maxStale=None):
+        """
+        Caches the responses of getState and getNodeInformation, and
+        returns the TTLCache.
+
+        Parameters-
+        ttls: Dict of method name to ttl in seconds. (optional)
+        maxStale: Dict of method name to seconds a stale response is
+        served while it is refreshed in the background. (optional)
+        """
+
+        self.cache = TTLCache(ttls, maxStale)
+        return self.cache
+
+    def limitRate(self, rate=None, burst=None, limiter=None):
+        """
+        Rate limits every request of this client and returns the
+        RateLimiter. Closes and cancels go first, then position changes,
+        then reads, then history. A 429 response pauses all lanes for its
+        Retry-After delay.
+
+        Parameters-
+        rate: requests per second. (optional)
+        burst: bucket size, the rate by default. (optional)
+        limiter: existing RateLimiter to share between clients. (optional)
+        """
+
+        self.limiter = RateLimiter(rate, burst) if limiter is None else limiter
+        return self.limiter
+
+    def enableCoalescing(self, coalescer=None):
+        """
+        Shares one request between concurrent identical GETs, eg. many
+        strategies reading the running positions at the same moment, and
+        returns the Coalescer counting the requests saved. Callers of a
+        shared request receive the same object.
+
+        Parameters-
+        coalescer: existing Coalescer to share between clients. (optional)
+        """
+
+        self.coalescer = Coalescer() if coalescer is None else coalescer
+        return self.coalescer
+
+    def _flightKey(self, method, url, token, params, auth, decode):
+        if method != 'GET' or self.coalescer is None:
+            return None
+        if auth and token is None:
+            token = self.token
+        return flightKey(method, url, token if auth else None, params,
+                         decode)
+
+    def _sessionAuth(self, token, expiry, refreshBefore, deposit, withdraw,
+                     positions, user):
+        return SessionAuth(
+            self,
+            self.token if token is None else token,
+            expiry=expiry,
+            refreshBefore=refreshBefore,
+            scopes={
+                'deposit': deposit,
+                'withdraw': withdraw,
+                'positions': positions,
+                'user': user,
+            },
+        )
+
+    def _limited(self, response):
+        if self.limiter is not None and response.status_code == 429:
+            self.limiter.pause(retryAfter(response.headers))
+        return response
+
+    def invalidateCache(self, key=None):
+        """
+        Drops the cached response of one method, or all of them.
+
+        Parameters-
+        key: method name, eg. 'getState'. (optional)
+        """
+
+        if self.cache is not None:
+            self.cache.invalidate(key)
+
+    def _headers(self, token=None, hasBody=False):
+        key = (token, hasBody)
+        headers = self._headerCache.get(key)
+        if headers is None:
+            headers = {'Accept': "application/json"}
+            if hasBody:
+                headers['Content-Type'] = "application/json"
+            if token is not None:
+                headers['Authorization'] = f"Bearer {token}"
+            self._headerCache[key] = headers
+        return headers
+
+    @staticmethod
+    def _page(data):
+        if isinstance(data, dict):
+            return data.get('data', [])
+        return data
+
+    @staticmethod
+    def _historyParams(start=None, end=None, limit=None):
+        params = {}
+        if start is not None:
+            params['from'] = start
+        if end is not None:
+            params['to'] = end
+        if limit is not None:
+            params['limit'] = limit
+        return params or None
+
+    @staticmethod
+    def _positionParams(type_=None, start=None, end=None, limit=None):
+        params = {} if type_ is None else {"type": type_}
+        params.update(BaseClient._historyParams(start, end, limit) or {})
+        return params or None
+
+    @staticmethod
+    def _positionPage(page, type_, start, end, seen):
+        """
+        Keeps the positions of a page inside [start, end] and not already
+        yielded at its upper bound, in case the server ignored the window.
+        Returns (new positions, end, seen) of the next page, which is
+        requested with len(seen) more positions so it always moves past the
+        ones it repeats. No new positions means the cursor did not move and
+        paging must stop.
+        """
+
+        field = TIME_FIELDS[type_]
+        if start is not None or end is not None:
+            page = [
+                position for position in page
+                if position.get(field) is not None and (
+                    start is None or position[field] >= start
+                ) and (end is None or position[field] <= end)
+            ]
+        fresh = newerPositions(page, type_, end, seen)
+        if not fresh:
+            return fresh, end, seen
+        if any(position.get(field) is None for position in fresh):
+            raise ValueError(f'Positions without {field} cannot be paged')
+        oldest = min(position[field] for position in fresh)
+        boundary = {
+            position['pid'] for position in page
+            if position.get(field) == oldest
+        }
+        if oldest == end:
+            boundary |= seen
+        return fresh, oldest, boundary
+
+    @staticmethod
+    def _columns(data):
+        from . import Columnar
+        return Columnar.toColumns(data)
+
+    @staticmethod
+    def _pollResult(response, url, etag):
+        if response.status_code == 304:
+            return etag, None
+        if response.status_code == 200:
+            return response.headers.get('ETag'), response.json()
+        raise errorFor(response, f'Unable to fetch {url}', 'GET', url)
+
+    @staticmethod
+    def _userPayload(leaderboard=None, showUsername=None, username=None):
+        payloadDict = dict()
+        if showUsername is not None:
+            payloadDict['show_username'] = showUsername
+        if leaderboard is not None:
+            payloadDict['show_leaderboard'] = leaderboard
+        if username is not None:
+            payloadDict['username'] = username
+        return payloadDict
+
+    @staticmethod
+    def _transactionParams(type, nbitem=-1, index=1, getLength=False,
+                           start=None, end=None):
+        params = {
+            "type": type,
+            "getLength": str(getLength).lower()
+        }
+        if nbitem != -1:
+            params['nbitem'] = nbitem
+            params['index'] = index
+        if start is not None:
+            params['start'] = start
+        if end is not None:
+            params['end'] = end
+        return params
+
+    @staticmethod
+    def _tokenPayload(expiry, deposit=False, withdraw=False, positions=False,
+                      user=False):
+        scopes = []
+        if deposit:
+            scopes.append("deposit")
+        if withdraw:
+            scopes.append("withdraw")
+        if positions:
+            scopes.append("positions")
+        if user:
+            scopes.append("user")
+        return {
+            'expiry': expiry,
+            'scopes': scopes,
+        }
+
+    @staticmethod
+    def _loginPayload(token):
+        return {'token': token}
+
+    @staticmethod
+    def _positionPayload(type_, side, leverage, margin=None, quantity=None,
+                         stoploss=None, takeprofit=None, price=None):
+        if margin is None and quantity is None:
+            raise ValueError('Either margin or quantity must be provided')
+        if type_ == "l" and price is None:
+            raise ValueError('Limit Price must be pprovided for limit order')
+
+        payloadDict = {
+            'type': type_,
+            'side': side,
+            'leverage': leverage,
+            }
+
+        if type_ == "l":
+            payloadDict['price'] = price
+        if margin is None:
+            payloadDict['quantity'] = quantity
+        else:
+            payloadDict['margin'] = margin
+        if stoploss is not None:
+            payloadDict['stoploss'] = stoploss
+        if takeprofit is not None:
+            payloadDict['takeprofit'] = takeprofit
+        return payloadDict
+
+    @classmethod
+    def _orderPayloads(cls, orders):
+        payloads = []
+        for index, order in enumerate(orders):
+            try:
+                payloads.append(cls._positionPayload(**order))
+            except (TypeError, ValueError) as error:
+                raise ValueError(f'Invalid order {index}: {error}')
+        return payloads
+
+    @staticmethod
+    def _isClosable(position, side):
+        return (
+            position['side'] == side and
+            not position['closed'] and
+            not position['canceled']
+        )
+
+
+class Client(BaseClient):
+    """
+    LN Markets API client owning a keep-alive connection pool.
+
+    Every endpoint of User, Positions, State and History is exposed as a
+    method. Methods needing authentication take an optional token, which
+    defaults to the token the client was created with. A Session returned
+    by login may be passed instead of a token to authenticate with its
+    cookie over its connections.
+
+    Parameters-
+    token: Authentication token. (optional)
+    baseUrl: API root url. (optional)
+    poolSize: Maximum number of pooled connections kept alive. (optional)
+    retry: RetryPolicy with timeouts, retries and circuit breaker, by
+    default 5s connect and 30s read timeouts and 2 retries of idempotent
+    requests. (optional)
+    serializer: Serializer encoding payloads and decoding responses, the
+    fastest installed JSON backend by default. (optional)
+    session: requests.Session to share with other clients instead of
+    opening a new pool. (optional)
+    """
+
+    def __init__(self, token=None, baseUrl=APIUrls.lnapi, poolSize=10,
+                 retry=None, serializer=None, session=None):
+        super().__init__(token, baseUrl, poolSize, retry, serializer)
+        self.session = self._newSession() if session is None else session
+
+    def _newSession(self):
+        session = requests.Session()
+        adapter = TimedAdapter(
+            pool_connections=1,
+            pool_maxsize=self.poolSize,
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        """
+        Closes all pooled connections.
+        """
+
+        self.session.close()
+
+    def authenticate(self, token=None, expiry=3600, refreshBefore=60,
+                     deposit=False, withdraw=False, positions=True,
+                     user=True):
+        """
+        Logs the client's session in and switches it to tokens generated
+        from that session, renewed before they expire and after a 401.
+        Returns the SessionAuth.
+
+        Parameters-
+        token: token used to log in, the client's token by default.
+        (optional)
+        expiry: lifetime in seconds of the generated tokens. (optional)
+        refreshBefore: seconds before expiry at which a token is renewed.
+        (optional)
+        deposit: Allow deposit (optional)
+        withdraw: Allow withdraw (optional)
+        positions: Allow opening or closing trade positions (optional)
+        user: Allow access to user information (optional)
+        """
+
+        auth = self._sessionAuth(token, expiry, refreshBefore, deposit,
+                                 withdraw, positions, user)
+        auth.login()
+        auth.refresh()
+        self.auth = auth
+        return auth
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _bulk(self, function, keys, workers):
+        return runBulk(function, keys, workers)
+
+    def _cached(self, key, loader):
+        if self.cache is None or not self.cache.caches(key):
+            return loader()
+        value, status = self.cache.lookup(key)
+        if status == FRESH:
+            return value
+        if status == STALE:
+            if self.cache.startRefresh(key):
+                threading.Thread(
+                    target=self._revalidate,
+                    args=(key, loader),
+                    daemon=True,
+                ).start()
+            return value
+        value = loader()
+        self.cache.store(key, value)
+        return value
+
+    def _revalidate(self, key, loader):
+        try:
+            self.cache.store(key, loader())
+        except Exception:
+            self.cache.endRefresh(key)
+
+    @staticmethod
+    def _notSent(error):
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def _send(self, method, url, token=None, params=None, payload=None,
+              auth=True, headers=None, session=None, call=None):
+        if isinstance(token, requests.Session):
+            session, token, auth = token, None, False
+        renewable = auth and token is None and self.auth is not None
+        if auth and token is None:
+            token = self.token if self.auth is None else self.auth.token()
+        if session is None:
+            session = self.session
+        data = None if payload is None else self.serializer.dumps(payload)
+
+        def headersFor(token):
+            requestHeaders = self._headers(token if auth else None,
+                                           data is not None)
+            if headers:
+                requestHeaders = {**requestHeaders, **headers}
+            return requestHeaders
+
+        requestHeaders = headersFor(token)
+        retry = self.retry
+        final = call is None
+        if call is None:
+            call = Call(method, url)
+        attempt = 0
+        while True:
+            call.begin(attempt)
+            try:
+                retry.check(url)
+            except LNMarketsError as error:
+                call.error = error
+                self._emit('onError', call.finish())
+                raise
+            if self.limiter is not None:
+                self.limiter.acquire(priorityOf(method, url))
+            call.add('wait', time.perf_counter() - call.started)
+            self._emit('beforeSend', call)
+            sentAt = time.monotonic()
+            recordPhases(call)
+            try:
+                response = self._limited(session.request(
+                    method,
+                    self.baseUrl+url,
+                    params=params,
+                    data=data,
+                    headers=requestHeaders,
+                    timeout=retry.timeout,
+                ))
+            except requests.exceptions.RequestException as error:
+                recordPhases(None)
+                retry.failure()
+                call.error = error
+                self._emit('onError', call.finish())
+                if not retry.shouldRetry(
+                        method, url, attempt, sent=not self._notSent(error),
+                ):
+                    raise NetworkError(
+                        f'Unable to reach {url}: {error}',
+                        method=method,
+                        url=url,
+                        elapsed=time.monotonic() - sentAt,
+                    ) from error
+                time.sleep(retry.delay(attempt))
+            else:
+                recordPhases(None)
+                call.received(
+                    response.status_code,
+                    time.monotonic() - sentAt,
+                    response.elapsed.total_seconds(),
+                )
+                retry.record(response.status_code)
+                if response.status_code == 401 and renewable:
+                    renewable = False
+                    self._emit('afterReceive', call.finish())
+                    token = self.auth.renew(token)
+                    requestHeaders = headersFor(token)
+                    attempt += 1
+                    continue
+                if response.status_code < 400 or not retry.shouldRetry(
+                        method, url, attempt, response.status_code,
+                ):
+                    if final:
+                        self._emit('afterReceive', call.finish())
+                    return response
+                self._emit('afterReceive', call.finish())
+                time.sleep(retry.delay(
+                    attempt, retryAfter(response.headers, 0.0),
+                ))
+            attempt += 1
+
+    def _request(self, method, url, errorMessage, token=None, params=None,
+                 payload=None, auth=True, decode=None):
+        key = self._flightKey(method, url, token, params, auth, decode)
+        if key is None:
+            return self._fetch(method, url, errorMessage, token, params,
+                               payload, auth, decode)
+        return self.coalescer.run(key, lambda: self._fetch(
+            method, url, errorMessage, token, params, payload, auth, decode,
+        ))
+
+    def _fetch(self, method, url, errorMessage, token, params, payload,
+               auth, decode):
+        call = Call(method, url)
+        response = self._send(
+            method,
+            url,
+            token=token,
+            params=params,
+            payload=payload,
+            auth=auth,
+            call=call,
+        )
+        if response.status_code == 200:
+            decodeStarted = time.perf_counter()
+            data = self.serializer.loads(response.content)
+            if decode is not None:
+                data = decode(data)
+            call.add('decode', time.perf_counter() - decodeStarted)
+            self._emit('afterReceive', call.finish())
+            return data
+        else:
+            self._emit('afterReceive', call.finish())
+            call.error = errorFor(response, errorMessage, method, url)
+            self._emit('onError', call)
+            raise call.error
+
+    def _poll(self, url, etag=None, params=None):
+        """
+        Conditional GET of a public endpoint.
+        Returns (etag, data) with data None when unchanged.
+        """
+
+        response = self._send(
+            'GET', url,
+            params=params,
+            auth=False,
+            headers=None if etag is None else {'If-None-Match': etag},
+        )
+        return self._pollResult(response, url, etag)
+
+    # User
+
+    def userInformation(self, token=None):
+        """
+        Get the user account Information.
+
+        Parameters-
+        token: Authentication token. (optional)
+        """
+
+        return self._request(
+            'GET', APIUrls.userUrl,
+            'Unable to get user information',
+            token=token,
+        )
+
+    def getBalance(self, token=None):
+        """
+        Get the user account balance.
+
+        Parameters-
+        token: Authentication token. (optional)
+        """
+
+        return self.userInformation(token)['balance']
+
+    def updateUser(self, token=None, leaderboard=None, showUsername=None,
+                   username=None):
+        """
+        Update user account information.
+
+        Parameters-
+        token: Authentication token. (optional)
+        leaderboard: True to show user's profit on leaderboard.
+        showUsername: True to show the username on LN Marktes public data.
+        username: username to display.
+        """
+
+        return self._request(
+            'PUT', APIUrls.userUrl,
+            'Unable to update user information',
+            token=token,
+            payload=self._userPayload(leaderboard, showUsername, username),
+        )
+
+    def updatePassword(self, previousPassword, newPassword, token=None):
+        """
+        Update user account password.
+
+        Parameters-
+        previousPassword: Previous Password.
+        newPassword: New Password.
+        token: Authentication token. (optional)
+        """
+
+        return self._send(
+            'PUT', APIUrls.updateUrl,
+            token=token,
+            payload={
+                'previousPassword': previousPassword,
+                'newPassword': newPassword,
+            },
+        ).ok
+
+    def getTransactions(self, type, nbitem=-1, index=1, getLength=False,
+                        start=None, end=None, models=False, token=None):
+        """
+        Retrieves all withdraw or deposit you did with LN Markets or just
+        one page
+
+        Parameters-
+        type: what kind of transactions ('withdraw' or 'deposit') to fetch
+        nbitem: maximum length of returned table (optional)
+        index: page offset (optional)
+        getLength: Boolean. True if need length of date splice (optional)
+        start: start of time interval (optional)
+        end: end of time interval (optional)
+        models: True to return Transaction models instead of dicts
+        (optional)
+        token: Authentication token. (optional)
+        """
+
+        return self._request(
+            'GET', APIUrls.userHistoryUrl,
+            'Unable to get user transactions',
+            token=token,
+            params=self._transactionParams(
+                type, nbitem, index, getLength, start, end,
+            ),
+            decode=Models.transactions if models else None,
+        )
+
+    def iterTransactions(self, type, pageSize=100, start=None, end=None,
+                         prefetch=True, models=False, token=None):
+        """
+        Yields withdraw or deposit transactions one at a time, fetching
+        pages lazily. While a page is consumed the next one is fetched in
+        the background, so only two pages are held in memory.
+
+        Parameters-
+        type: what kind of transactions ('withdraw' or 'deposit') to fetch
+        pageSize: transactions per request (optional)
+        start: start of time interval (optional)
+        end: end of time interval (optional)
+        prefetch: False to fetch each page only when needed (optional)
+        models: True to yield Transaction models instead of dicts
+        (optional)
+        token: Authentication token. (optional)
+        """
+
+        def fetch(index):
+            page = self._page(self.getTransactions(
+                type, nbitem=pageSize, index=index, start=start, end=end,
+                token=token,
+            ))
+            return Models.Transaction.fromList(page) if models else page
+
+        if not prefetch:
+            index = 1
+            while True:
+                page = fetch(index)
+                yield from page
+                if len(page) < pageSize:
+                    return
+                index += 1
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            index = 1
+            future = pool.submit(fetch, index)
+            while future is not None:
+                page = future.result()
+                index += 1
+                future = (
+                    pool.submit(fetch, index)
+                    if len(page) >= pageSize else None
+                )
+                yield from page
+
+    def getTokens(self, session=None):
+        """
+        Retrieves the list of active JSON Web Token user currently holds.
+
+        Parameters-
+        session: Session returned by login, the client's session by
+        default. (optional)
+        """
+
+        return self._request(
+            'GET', APIUrls.tokenUrl,
+            'Unable to get user tokens',
+            token=session,
+            auth=False,
+        )
+
+    def revokeToken(self, token=None, session=None):
+        """
+        identifies and revoke usage of a given JWT.
+
+        Parameters-
+        token: Identifier of Token to be removed (optional)
+        session: Session returned by login, the client's session by
+        default. (optional)
+        """
+
+        params = None if token is None else {"jti": token}
+        self._request(
+            'DELETE', APIUrls.tokenUrl,
+            'Unable to revoke user tokens',
+            token=session,
+            params=params,
+            auth=False,
+        )
+        return True
+
+    def generateToken(self, expiry, deposit=False, withdraw=False,
+                      positions=False, user=False, session=None):
+        """
+        Using the given scopes, generate token to give access to different
+        parts of the public API.
+
+        Parameters-
+        expiry: token expiry in seconds.
+        deposit: Allow deposit (optional)
+        withdraw: Allow withdraw (optional)
+        positions: Allow opening or closing trade positions (optional)
+        user: Allow access to user information (optional)
+        session: Session returned by login, the client's session by
+        default. (optional)
+        """
+
+        return self._request(
+            'POST', APIUrls.tokenUrl,
+            'Unable to generate user tokens',
+            token=session,
+            payload=self._tokenPayload(
+                expiry, deposit, withdraw, positions, user,
+            ),
+            auth=False,
+        )['token']
+
+    def deposit(self, amount, unit="sat", token=None):
+        """
+        Add fund to your LN Markets balance.
+
+        Parameters-
+        amount: amount to deposit
+        unit: sat by default (optional)
+        token: Authentication token (optional)
+        """
+
+        return self._request(
+            'POST', APIUrls.depositUrl,
+            'Unable to get invoice',
+            token=token,
+            payload={
+                'amount': amount,
+                'unit': unit,
+            },
+        )
+
+    def withdrawInvoice(self, amount, invoice, unit="sat", token=None):
+        """
+        Move funds from the Lightning channel with LN Markets to user wallet
+        by using an invoice directly.
+
+        Parameters-
+        amount: amount to withdraw
+        invoice: BOLT 11 invoice with same amount
+        unit: Currently only sat (optional)
+        token: Authentication token (optional)
+        """
+
+        return self._request(
+            'POST', APIUrls.withdrawUrl,
+            'Unable to make payment',
+            token=token,
+            payload={
+                'amount': amount,
+                'unit': unit,
+                'invoice': invoice,
+            },
+        )
+
+    def withdrawLNURL(self, amount, unit="sat", token=None):
+        """
+        Move funds from the Lightning channel with LN Markets to user wallet
+        by using an LNURL.
+
+        Parameters-
+        amount: amount to withdraw
+        unit: Currently only sat (optional)
+        token: Authentication token (optional)
+        """
+
+        return self._request(
+            'POST', APIUrls.withdrawLNUrl,
+            'Unable to create LNURL',
+            token=token,
+            payload={
+                'amount': amount,
+                'unit': unit,
+            },
+        )
+
+    def login(self, token=None, session=None):
+        """
+        Use existing credentials to log in.
+        Returns the session holding the login cookie, which can be passed
+        in place of a token to the other methods.
+
+        Parameters-
+        token: Authentication token. (optional)
+        session: Session to log in, a new one by default. (optional)
+        """
+
+        if token is None:
+            token = self.token
+        if session is None:
+            session = self._newSession()
+        loginResp = self._send(
+            'POST', APIUrls.loginUrl,
+            payload=self._loginPayload(token),
+            auth=False,
+            session=session,
+        )
+        if loginResp.status_code == 200:
+            return session
+        else:
+            raise errorFor(
+                loginResp, 'Unable to login', 'POST', APIUrls.loginUrl,
+            )
+
+    def logout(self, session):
+        """
+        Deletes session cookie
+
+        Parameters-
+        session: Session returned by login.
+        """
+
+        return self._send(
+            'POST', APIUrls.logoutUrl,
+            auth=False,
+            session=session,
+        ).ok
+
+    # Positions
+
+    def getPositions(self, type_=None, models=False, token=None,
+                     start=None, end=None, limit=None):
+        """
+        Retrieves either opened, closed or all positions.
+
+        Parameters-
+        type_: kind of positions ('open' or 'closed' or 'all') to fetch
+        (optional)
+        models: True to return Position models instead of dicts (optional)
+        token: Authentication token. (optional)
+        start: start of time interval, newest positions first (optional)
+        end: end of time interval (optional)
+        limit: maximum number of positions of each kind (optional)
+        """
+
+        params = self._positionParams(type_, start, end, limit)
+        return self._request(
+            'GET', APIUrls.positionUrl,
+            'Unable to get positions',
+            token=token,
+            params=params,
+            decode=Models.positions if models else None,
+        )
+
+    def iterPositions(self, type_='closed', pageSize=100, start=None,
+                      end=None, prefetch=True, models=False, token=None):
+        """
+        Yields the positions of one kind within a time interval, newest
+        first, fetching pages lazily. While a page is consumed the next one
+        is fetched in the background.
+
+        Parameters-
+        type_: kind of positions ('open', 'running' or 'closed') to fetch
+        (optional)
+        pageSize: positions per request (optional)
+        start: start of time interval (optional)
+        end: end of time interval (optional)
+        prefetch: False to fetch each page only when needed (optional)
+        models: True to yield Position models instead of dicts (optional)
+        token: Authentication token. (optional)
+        """
+
+        def fetch(end, limit):
+            return positionList(self.getPositions(
+                type_, token=token, start=start, end=end, limit=limit,
+            ), type_)
+
+        def convert(page):
+            return Models.Position.fromList(page) if models else page
+
+        seen = set()
+        if not prefetch:
+            while True:
+                limit = pageSize + len(seen)
+                page = fetch(end, limit)
+                fresh, end, seen = self._positionPage(
+                    page, type_, start, end, seen,
+                )
+                yield from convert(fresh)
+                if not fresh or len(page) < limit:
+                    return
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            limit = pageSize
+            future = pool.submit(fetch, end, limit)
+            while future is not None:
+                page = future.result()
+                fresh, end, seen = self._positionPage(
+                    page, type_, start, end, seen,
+                )
+                more = fresh and len(page) >= limit
+                limit = pageSize + len(seen)
+                future = pool.submit(fetch, end, limit) if more else None
+                yield from convert(fresh)
+
+    def newPositions(self, cursor, pageSize=100, token=None):
+        """
+        Returns the positions timed after those already seen by a cursor,
+        newest first, and advances the cursor. Only the new positions are
+        transferred.
+
+        Parameters-
+        cursor: PositionCursor kept between calls.
+        pageSize: positions per request (optional)
+        token: Authentication token. (optional)
+        """
+
+        return cursor.advance(list(self.iterPositions(
+            cursor.state, pageSize, start=cursor.since, token=token,
+        )))
+
+    def createPosition(self, type_, side, leverage, margin=None,
+                       quantity=None, stoploss=None, takeprofit=None,
+                       price=None, token=None):
+        """
+        Send the order form parameters to add a new position in database.
+        See Positions.createPosition for details.
+
+        Parameters-
+        type_: "l" for limit order, "m" for market order.
+        side: "b" for buy, "s" for sell.
+        leverage: Leverage of the order.
+        margin: margin or quantity must be given (optional)
+        quantity: margin or quantity must be given (optional)
+        stoploss: StopLoss level. (optional)
+        takeprofit: Profit taking level. (optional)
+        price: limit price for limit order. (optional)
+        token: Authentication token. (optional)
+        """
+
+        return self._submitPosition(
+            self._positionPayload(
+                type_, side, leverage, margin, quantity, stoploss,
+                takeprofit, price,
+            ),
+            token=token,
+        )
+
+    def _submitPosition(self, payload, token=None):
+        data = self._request(
+            'POST', APIUrls.positionUrl,
+            'Unable to create position',
+            token=token,
+            payload=payload,
+        )
+        self._track(data, token=token)
+        return data
+
+    def createPositions(self, orders, workers=8, token=None):
+        """
+        Submit a batch of orders concurrently.
+        Every order is validated before any of them is sent.
+
+        Parameters-
+        orders: List of dicts of createPosition arguments, eg.
+        {'type_': "l", 'side': "b", 'leverage': 10, 'quantity': 1,
+        'price': 20000}
+        workers: Maximum number of simultaneous requests. (optional)
+        token: Authentication token. (optional)
+
+        Returns-
+        BulkResult keyed by order index, use ordered() for the responses
+        and errors in input order.
+        """
+
+        payloads = self._orderPayloads(orders)
+        return self._bulk(
+            lambda index: self._submitPosition(payloads[index], token=token),
+            range(len(payloads)),
+            workers,
+        )
+
+    def buy(self, leverage, margin=None, quantity=None, stoploss=None,
+            takeprofit=None, token=None):
+        """
+        Send the buy order.
+        """
+
+        return self.createPosition(
+            "m", "b", leverage,
+            margin=margin,
+            quantity=quantity,
+            stoploss=stoploss,
+            takeprofit=takeprofit,
+            token=token,
+        )
+
+    def sell(self, leverage, margin=None, quantity=None, stoploss=None,
+             takeprofit=None, token=None):
+        """
+        Send the sell order.
+        """
+
+        return self.createPosition(
+            "m", "s", leverage,
+            margin=margin,
+            quantity=quantity,
+            stoploss=stoploss,
+            takeprofit=takeprofit,
+            token=token,
+        )
+
+    def limitBuy(self, leverage, price, margin=None, quantity=None,
+                 stoploss=None, takeprofit=None, token=None):
+        """
+        Send the limit buy order.
+        """
+
+        return self.createPosition(
+            "l", "b", leverage,
+            margin=margin,
+            quantity=quantity,
+            stoploss=stoploss,
+            takeprofit=takeprofit,
+            price=price,
+            token=token,
+        )
+
+    def limitSell(self, leverage, price, margin=None, quantity=None,
+                  stoploss=None, takeprofit=None, token=None):
+        """
+        Send the limit sell order.
+        """
+
+        return self.createPosition(
+            "l", "s", leverage,
+            margin=margin,
+            quantity=quantity,
+            stoploss=stoploss,
+            takeprofit=takeprofit,
+            price=price,
+            token=token,
+        )
+
+    def updatePosition(self, pid, type_, value, token=None):
+        """
+        Modifies stoploss or takeprofit parameters of an existing position.
+
+        Parameters-
+        pid: ID of the position.
+        type_: "takeprofit" or "stoploss".
+        value: Price level to set.
+        token: Authentication token. (optional)
+        """
+
+        data = self._request(
+            'PUT', APIUrls.positionUrl,
+            f'Unable to update position {pid}',
+            token=token,
+            payload={
+                'pid': pid,
+                'type': type_,
+                'value': value,
+            },
+        )
+        self._track(data, pid=pid, token=token)
+        return data
+
+    def closePosition(self, pid, token=None):
+        """
+        Close the user position.
+
+        Parameters-
+        pid: ID of the position.
+        token: Authentication token. (optional)
+        """
+
+        data = self._request(
+            'DELETE', APIUrls.positionUrl,
+            f'Unable to close position {pid}',
+            token=token,
+            params={"pid": pid},
+        )
+        self._track(data, pid=pid, state='closed', token=token)
+        return data
+
+    def refreshPositions(self, states=('open', 'running', 'closed'),
+                         full=False, token=None):
+        """
+        Brings the attached PositionBook up to date with the API,
+        attaching a new one if needed, and returns it.
+
+        Each state keeps a PositionCursor, so a refresh only transfers the
+        positions created, filled or closed since the previous one and
+        applies them to the book. The first refresh of a state fetches all
+        of it. Cancellations and the pl of positions already running are
+        only picked up by a full refresh, which fetches every position of
+        the states again and replaces them in the book.
+        Raises ValueError if token belongs to another account.
+
+        Parameters-
+        states: 'open', 'running' and/or 'closed'. (optional)
+        full: fetch and replace the states entirely. (optional)
+        token: Authentication token. (optional)
+        """
+
+        book = self._ownBook(token)
+        for state in states:
+            cursor = self._bookCursor(state, full)
+            self._refreshBook(
+                book, state,
+                self.newPositions(cursor, token=token), full,
+            )
+        return book
+
+    def isOpen(self, pid, token=None):
+        """
+        Checks if a position is open. With a PositionBook attached, the
+        book answers without a request, unless token belongs to another
+        account.
+
+        Parameters-
+        pid: ID of the position.
+        token: Authentication token. (optional)
+        """
+
+        book = self._bookFor(token)
+        if book is not None:
+            return book.isOpen(pid)
+        running = self.getPositions("running", token=token)
+        for position in positionList(running, "running"):
+            if (position['pid'] == pid):
+                return True
+
+        return False
+
+    def closePositions(self, pids, workers=8, token=None):
+        """
+        Close many positions concurrently.
+        A failure to close one position does not stop the others.
+
+        Parameters-
+        pids: IDs of the positions.
+        workers: Maximum number of simultaneous requests. (optional)
+        token: Authentication token. (optional)
+
+        Returns-
+        BulkResult keyed by pid.
+        """
+
+        return self._bulk(
+            lambda pid: self.closePosition(pid, token=token),
+            pids,
+            workers,
+        )
+
+    def _closeSide(self, side, token=None, workers=1):
+        book = self._bookFor(token)
+        if book is None:
+            positions = positionList(
+                self.getPositions("running", token=token), "running",
+            )
+        else:
+            positions = book.positions("running", side)
+        pids = [
+            position['pid'] for position in positions
+            if self._isClosable(position, side)
+        ]
+        result = self.closePositions(pids, workers=workers, token=token)
+        if result.errors:
+            raise BulkError('Unable to close positions', result)
+
+        return result.pl
+
+    def closeAllLongs(self, token=None, workers=1):
+        """
+        Close all positions on long side, taken from the attached
+        PositionBook if any.
+        Raises BulkError after every position was attempted if some could
+        not be closed.
+
+        Parameters-
+        token: Authentication token. (optional)
+        workers: Number of positions closed simultaneously. (optional)
+        """
+
+        return self._closeSide("b", token=token, workers=workers)
+
+    def closeAllShorts(self, token=None, workers=1):
+        """
+        Close all positions on short side, taken from the attached
+        PositionBook if any.
+        Raises BulkError after every position was attempted if some could
+        not be closed.
+
+        Parameters-
+        token: Authentication token. (optional)
+        workers: Number of positions closed simultaneously. (optional)
+        """
+
+        return self._closeSide("s", token=token, workers=workers)
+
+    def closeAll(self, token=None):
+        """
+        Close all positions.
+
+        Parameters-
+        token: Authentication token. (optional)
+        """
+
+        data = self._request(
+            'DELETE', APIUrls.closeAllUrl,
+            'Unable to close all positions',
+            token=token,
+        )
+        book = self._bookFor(token)
+        if book is not None:
+            book.closeRunning()
+        return data['pl']
+
+    def realizedProfit(self, token=None, start=None, end=None):
+        """
+        Calculates the total profit/loss from closed positions.
+
+        Parameters-
+        token: Authentication token. (optional)
+        start: start of the closing time interval (optional)
+        end: end of the closing time interval (optional)
+        """
+
+        if start is None and end is None:
+            positions = positionList(
+                self.getPositions("closed", token=token), "closed",
+            )
+        else:
+            positions = self.iterPositions(
+                "closed", start=start, end=end, token=token,
+            )
+        return sum(float(position['pl']) for position in positions)
+
+    def unrealizedProfit(self, token=None):
+        """
+        Calculates the total profit/loss from open positions. With a
+        PositionBook attached, sums the pl stored in the book without a
+        request.
+
+        Parameters-
+        token: Authentication token. (optional)
+        """
+
+        book = self._bookFor(token)
+        if book is not None:
+            return book.unrealizedProfit()
+        return sum(
+            float(position['pl'])
+            for position in positionList(
+                self.getPositions("running", token=token), "running",
+            )
+        )
+
+    def addMargin(self, pid, amount, token=None):
+        """
+        Adds margin to a running position.
+
+        Parameters-
+        pid: ID of the position.
+        amount: amount to add in sats.
+        token: Authentication token. (optional)
+        """
+
+        data = self._request(
+            'POST', APIUrls.addMarginUrl,
+            f'Unable to add margin to position {pid}',
+            token=token,
+            payload={
+                'amount': amount,
+                'pid': pid,
+            },
+        )
+        self._track(data, pid=pid, token=token)
+        return data
+
+    def cashin(self, pid, amount, token=None):
+        """
+        Retrieves part of a running position's profit.
+
+        Parameters-
+        pid: ID of the position.
+        amount: amount to retrieve in sats.
+        token: Authentication token. (optional)
+        """
+
+        data = self._request(
+            'POST', APIUrls.cashinUrl,
+            f'Unable to cash-in position {pid}',
+            token=token,
+            payload={
+                'amount': amount,
+                'pid': pid,
+            },
+        )
+        self._track(data, pid=pid, token=token)
+        return data
+
+    def cancelPosition(self, pid, token=None):
+        """
+        Cancel the position linked to the given pid.
+        Only works on positions that are not currently filled.
+
+        Parameters-
+        pid: ID of the position.
+        token: Authentication token. (optional)
+        """
+
+        data = self._request(
+            'POST', APIUrls.cancelUrl,
+            f'Unable to cancel position {pid}',
+            token=token,
+            payload={'pid': pid},
+        )
+        self._track(data, pid=pid, state='canceled', token=token)
+        return data
+
+    # State
+
+    def getState(self):
+        """
+        Shows informations about api.
+        """
+
+        stateData = self._cached('getState', lambda: self._request(
+            'GET', APIUrls.stateUrl,
+            'Unable to fetch State Information',
+            auth=False,
+        ))
+        if stateData['state']['newPosition']:
+            return stateData
+        else:
+            raise ValueError('New Positions currently not allowed')
+
+    def getNodeInformation(self):
+        """
+        Shows informations about the lightning node.
+        """
+
+        return self._cached('getNodeInformation', lambda: self._request(
+            'GET', APIUrls.nodeUrl,
+            'Unable to fetch Node Information',
+            auth=False,
+        ))
+
+    # History
+
+    def getIndex(self, columnar=False, start=None, end=None, limit=None):
+        """
+        Retrieves index value.
+
+        Parameters-
+        columnar: True to return a dict of numpy column arrays instead of
+        the list of entries, see Columnar.toColumns. (optional)
+        start: start of time interval in ms (optional)
+        end: end of time interval in ms (optional)
+        limit: maximum number of entries (optional)
+        """
+
+        data = self._request(
+            'GET', APIUrls.indexUrl,
+            'Unable to fetch index data',
+            params=self._historyParams(start, end, limit),
+            auth=False,
+        )
+        return self._columns(data) if columnar else data
+
+    def getBidOffer(self, columnar=False, start=None, end=None, limit=None):
+        """
+        Retrieves bid-offer values.
+
+        Parameters-
+        columnar: True to return a dict of numpy column arrays instead of
+        the list of entries, see Columnar.toColumns. (optional)
+        start: start of time interval in ms (optional)
+        end: end of time interval in ms (optional)
+        limit: maximum number of entries (optional)
+        """
+
+        data = self._request(
+            'GET', APIUrls.bidOfferUrl,
+            'Unable to fetch bid-offer data',
+            params=self._historyParams(start, end, limit),
+            auth=False,
+        )
+        return self._columns(data) if columnar else data
+
+
+_defaultClient = None
+_defaultLock = threading.Lock()
+
+
+def getDefaultClient():
+    """
+    Returns the shared client used by the module level functions.
+    """
+
+    global _defaultClient
+    if _defaultClient is None:
+        with _defaultLock:
+            if _defaultClient is None:
+                _defaultClient = Client()
+    return _defaultClient
+
+
+def setDefaultClient(client):
+    """
+    Replaces the shared client used by the module level functions.
+
+    Parameters-
+    client: Client instance.
+    """
+
+    global _defaultClient
+    with _defaultLock:
+        _defaultClient = client
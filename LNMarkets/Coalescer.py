@@ -0,0 +1,120 @@
+import threading
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class Coalescer:
+    """
+    Single-flight execution of identical reads. While a request is in
+    flight, callers asking for the same key wait for it and share its
+    result or error instead of sending their own.
+
+    Every caller receives the same decoded object, so results should be
+    treated as read-only.
+
+    Attributes-
+    requests: loads actually run.
+    saved: calls served by a load started by another caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._tasks = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.saved = 0
+
+    @property
+    def inFlight(self):
+        return len(self._flights) + len(self._tasks)
+
+    def run(self, key, loader):
+        """
+        Returns loader(), or the result of the identical load in flight.
+
+        Parameters-
+        key: hashable identity of the request.
+        loader: function sending the request.
+        """
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.requests += 1
+            else:
+                self.saved += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = loader()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    async def runAsync(self, key, loader):
+        """
+        Coroutine version of run for the callers of one event loop. The
+        load runs as its own task, so cancelling one caller does not
+        cancel it for the others.
+
+        Parameters-
+        key: hashable identity of the request.
+        loader: coroutine function sending the request.
+        """
+
+        import asyncio
+        key = (id(asyncio.get_event_loop()), key)
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(loader())
+                task.add_done_callback(
+                    lambda _: self._tasks.pop(key, None),
+                )
+                self.requests += 1
+            else:
+                self.saved += 1
+        return await asyncio.shield(task)
+
+
+def flightKey(method, url, token=None, params=None, decode=None):
+    """
+    Identity of a request for the Coalescer, or None if its parameters are
+    not hashable.
+
+    Parameters-
+    method: HTTP method.
+    url: endpoint url relative to the API root.
+    token: token the request is authenticated with. (optional)
+    params: query parameters. (optional)
+    decode: function applied to the decoded response. (optional)
+    """
+
+    try:
+        params = None if params is None else tuple(sorted(params.items()))
+        key = (method, url, token, params, decode)
+        hash(key)
+    except TypeError:
+        return None
+    return key
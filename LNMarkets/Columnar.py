@@ -0,0 +1,116 @@
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(
+        'Columnar history requires numpy: pip install LNMarkets[numpy]'
+    )
+
+
+def toColumns(entries, timeField='time'):
+    """
+    Converts history entries to a dict of column arrays sorted by time.
+    The time column is int64, every other field is float64.
+
+    Parameters-
+    entries: Array of history entries, eg. getIndex() response.
+    timeField: name of the timestamp field. (optional)
+    """
+
+    count = len(entries)
+    if count == 0:
+        return {timeField: np.empty(0, dtype=np.int64)}
+    fields = [field for field in entries[0] if field != timeField]
+    columns = {
+        timeField: np.fromiter(
+            (entry[timeField] for entry in entries),
+            dtype=np.int64,
+            count=count,
+        ),
+    }
+    for field in fields:
+        columns[field] = np.fromiter(
+            (entry[field] for entry in entries),
+            dtype=np.float64,
+            count=count,
+        )
+    order = np.argsort(columns[timeField], kind='stable')
+    if np.any(order[1:] < order[:-1]):
+        columns = {name: column[order] for name, column in columns.items()}
+    return columns
+
+
+def ohlc(time, price, interval):
+    """
+    Resamples a price series to OHLC bars.
+
+    Parameters-
+    time: int64 array of timestamps sorted ascending.
+    price: float64 array of prices.
+    interval: bar length in the unit of time.
+
+    Returns-
+    Dict of 'time' (bar start), 'open', 'high', 'low', 'close' and
+    'count' arrays.
+    """
+
+    if len(time) == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return {
+            'time': np.empty(0, dtype=np.int64),
+            'open': empty, 'high': empty, 'low': empty, 'close': empty,
+            'count': np.empty(0, dtype=np.int64),
+        }
+    buckets = time // interval
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], len(price)) - 1
+    return {
+        'time': buckets[starts] * interval,
+        'open': price[starts],
+        'high': np.maximum.reduceat(price, starts),
+        'low': np.minimum.reduceat(price, starts),
+        'close': price[ends],
+        'count': ends - starts + 1,
+    }
+
+
+def rollingMean(values, window):
+    """
+    Mean of every window of consecutive values.
+    Returns len(values) - window + 1 values.
+
+    Parameters-
+    values: float64 array.
+    window: number of values per window.
+    """
+
+    if window <= 0:
+        raise ValueError('window must be positive')
+    sums = np.cumsum(np.insert(values, 0, 0.0))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def rollingStd(values, window):
+    """
+    Population standard deviation of every window of consecutive values.
+    Returns len(values) - window + 1 values.
+
+    Parameters-
+    values: float64 array.
+    window: number of values per window.
+    """
+
+    if window <= 0:
+        raise ValueError('window must be positive')
+    windows = np.lib.stride_tricks.sliding_window_view(values, window)
+    return windows.std(axis=1)
+
+
+def returns(price):
+    """
+    Simple returns between consecutive prices.
+
+    Parameters-
+    price: float64 array.
+    """
+
+    return np.diff(price) / price[:-1]
@@ -0,0 +1,105 @@
+from .RateLimiter import retryAfter
+
+
+class LNMarketsError(RuntimeError):
+    """
+    Base class of the errors raised by the API calls.
+    Subclasses RuntimeError, which the package raised before.
+
+    Attributes-
+    status: HTTP status, None when no response was received.
+    body: parsed JSON body of the response, None if not JSON.
+    text: raw body of the response.
+    method: HTTP method of the request.
+    url: endpoint url of the request.
+    elapsed: seconds between sending the request and the failure.
+    """
+
+    def __init__(self, message, status=None, body=None, text=None,
+                 method=None, url=None, elapsed=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+        self.text = text
+        self.method = method
+        self.url = url
+        self.elapsed = elapsed
+
+
+class AuthError(LNMarketsError):
+    """
+    Missing, expired or insufficiently scoped token (401, 403).
+    """
+
+
+class RateLimitError(LNMarketsError):
+    """
+    Request rejected by the rate limit (429).
+    retryAfter holds the seconds to wait, None if not given.
+    """
+
+    def __init__(self, message, retryAfter=None, **kwargs):
+        super().__init__(message, **kwargs)
+        self.retryAfter = retryAfter
+
+
+class ValidationError(LNMarketsError):
+    """
+    Request rejected by the API (other 4xx).
+    """
+
+
+class ServerError(LNMarketsError):
+    """
+    Failure of the API server (5xx).
+    """
+
+
+class NetworkError(LNMarketsError):
+    """
+    No response received: connection failure or timeout.
+    """
+
+
+class CircuitOpenError(NetworkError):
+    """
+    Raised without sending the request while the circuit breaker is open.
+    """
+
+
+def errorFor(response, message, method=None, url=None):
+    """
+    Builds the error matching a failed response.
+
+    Parameters-
+    response: requests.Response or AsyncResponse.
+    message: description of the failed call.
+    method: HTTP method of the request. (optional)
+    url: endpoint url of the request. (optional)
+    """
+
+    status = response.status_code
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    kwargs = {
+        'status': status,
+        'body': body,
+        'text': response.text,
+        'method': method,
+        'url': url,
+        'elapsed': response.elapsed.total_seconds(),
+    }
+    message = f'{message}:\n{response.text}'
+    if status in (401, 403):
+        return AuthError(message, **kwargs)
+    if status == 429:
+        return RateLimitError(
+            message, retryAfter=retryAfter(response.headers, None), **kwargs
+        )
+    if 400 <= status < 500:
+        return ValidationError(message, **kwargs)
+    if status >= 500:
+        return ServerError(message, **kwargs)
+    return LNMarketsError(message, **kwargs)
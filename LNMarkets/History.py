@@ -1,47 +1,54 @@
+from . import Client
 
-import requests
-from . import APIUrls
 
-
-def getIndex():
+def getIndex(columnar=False, start=None, end=None, limit=None):
     """
     Retrieves index value.
+
+    Parameters-
+    columnar: True to return a dict of numpy column arrays (int64 'time',
+    float64 values) instead of the list of entries. (optional)
+    start: start of time interval in ms (optional)
+    end: end of time interval in ms (optional)
+    limit: maximum number of entries (optional)
     """
 
-    headers = {
-        'accept': 'application/json',
-    }
-    indexData = requests.get(
-        APIUrls.lnapi+APIUrls.indexUrl,
-        headers=headers,
+    return Client.getDefaultClient().getIndex(
+        columnar, start=start, end=end, limit=limit,
     )
 
-    if indexData.status_code == 200:
-        return indexData.json()
-    else:
-        raise RuntimeError(
-            'Unable to fetch index data:\n'
-            f'{indexData.text}'
-        )
-
 
-def getBidOffer():
+def getBidOffer(columnar=False, start=None, end=None, limit=None):
     """
     Retrieves bid-offer values.
+
+    Parameters-
+    columnar: True to return a dict of numpy column arrays (int64 'time',
+    float64 values) instead of the list of entries. (optional)
+    start: start of time interval in ms (optional)
+    end: end of time interval in ms (optional)
+    limit: maximum number of entries (optional)
     """
 
-    headers = {
-        'accept': 'application/json',
-    }
-    bidOfferData = requests.get(
-        APIUrls.lnapi+APIUrls.bidOfferUrl,
-        headers=headers,
+    return Client.getDefaultClient().getBidOffer(
+        columnar, start=start, end=end, limit=limit,
     )
 
-    if bidOfferData.status_code == 200:
-        return bidOfferData.json()
-    else:
-        raise RuntimeError(
-            'Unable to fetch index data:\n'
-            f'{bidOfferData.text}'
-        )
+
+def priceFeed(series=('index', 'bidOffer'), minInterval=0.5, maxInterval=5.0):
+    """
+    Returns a PriceFeed streaming new index and bid-offer entries to its
+    subscribers from a single upstream poller.
+
+    Parameters-
+    series: series to poll, 'index' and/or 'bidOffer'. (optional)
+    minInterval: shortest delay between polls in seconds. (optional)
+    maxInterval: longest delay between polls in seconds. (optional)
+    """
+
+    from . import PriceFeed
+    return PriceFeed.PriceFeed(
+        series=series,
+        minInterval=minInterval,
+        maxInterval=maxInterval,
+    )
@@ -0,0 +1,203 @@
+import os
+import threading
+from . import Client
+from .Columnar import np
+
+PAGE_SIZE = 1000
+FIELDS = {
+    'index': ('index',),
+    'bidOffer': ('bid', 'offer'),
+}
+
+
+def recordType(series):
+    """
+    Returns the numpy record dtype stored for a series.
+
+    Parameters-
+    series: 'index' or 'bidOffer'.
+    """
+
+    return np.dtype(
+        [('time', '<i8')] + [(field, '<f8') for field in FIELDS[series]]
+    )
+
+
+class HistoryStore:
+    """
+    Append-only on-disk store of index and bid-offer history.
+
+    Each series is one file of fixed size little-endian records
+    (int64 time followed by float64 fields) sorted by time. update fetches
+    only entries newer than the last stored one, and reads are served from
+    a memory map of the file.
+
+    Parameters-
+    directory: folder holding the series files, created if missing.
+    client: Client used to fetch history, the default client if None.
+    (optional)
+    """
+
+    def __init__(self, directory, client=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.client = Client.getDefaultClient() if client is None else client
+        self._lock = threading.Lock()
+        for series in FIELDS:
+            self._truncatePartial(series)
+
+    def path(self, series):
+        if series not in FIELDS:
+            raise ValueError(f'Unknown series {series}')
+        return os.path.join(self.directory, f'{series}.bin')
+
+    def _truncatePartial(self, series):
+        path = self.path(series)
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            extra = size % recordType(series).itemsize
+            if extra:
+                with open(path, 'r+b') as file:
+                    file.truncate(size - extra)
+
+    def __len__(self):
+        return sum(self.count(series) for series in FIELDS)
+
+    def count(self, series):
+        """
+        Number of stored records of a series.
+
+        Parameters-
+        series: 'index' or 'bidOffer'.
+        """
+
+        path = self.path(series)
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // recordType(series).itemsize
+
+    def lastTime(self, series):
+        """
+        Timestamp of the newest stored record, or None if empty.
+
+        Parameters-
+        series: 'index' or 'bidOffer'.
+        """
+
+        dtype = recordType(series)
+        count = self.count(series)
+        if count == 0:
+            return None
+        with open(self.path(series), 'rb') as file:
+            file.seek((count - 1) * dtype.itemsize)
+            return int(np.frombuffer(file.read(dtype.itemsize), dtype)[0][0])
+
+    def append(self, series, entries):
+        """
+        Appends the entries newer than the last stored record and returns
+        how many were written.
+
+        Parameters-
+        series: 'index' or 'bidOffer'.
+        entries: Array of history entries.
+        """
+
+        dtype = recordType(series)
+        with self._lock:
+            last = self.lastTime(series)
+            records = np.fromiter(
+                (
+                    tuple(entry[name] for name in dtype.names)
+                    for entry in entries
+                    if last is None or entry['time'] > last
+                ),
+                dtype=dtype,
+            )
+            if len(records) == 0:
+                return 0
+            records.sort(order='time', kind='stable')
+            keep = np.diff(records['time'], prepend=records['time'][0] - 1)
+            records = records[keep > 0]
+            with open(self.path(series), 'ab') as file:
+                file.write(records.tobytes())
+            return len(records)
+
+    @staticmethod
+    def _fetchSince(fetch, start, limit):
+        # The API returns the newest entries first and caps the page size,
+        # so the gap is walked backwards until its start or an empty page
+        # is reached. A short page does not prove the gap is covered when
+        # the server returned fewer entries than asked.
+        entries = []
+        end = None
+        while True:
+            page = fetch(start=start, end=end, limit=limit)
+            if not page:
+                return entries
+            entries.extend(page)
+            oldest = min(entry['time'] for entry in page)
+            if (start is not None and oldest <= start) or (
+                    end is not None and oldest > end
+            ):
+                return entries
+            end = oldest - 1
+
+    def update(self, series=('index', 'bidOffer'), limit=PAGE_SIZE):
+        """
+        Fetches and stores the history missing since the last stored
+        record of each series, the whole history on an empty store.
+        Returns a dict of appended counts.
+
+        Parameters-
+        series: series to update. (optional)
+        limit: entries per request, the whole gap being fetched in pages.
+        (optional)
+        """
+
+        fetch = {
+            'index': self.client.getIndex,
+            'bidOffer': self.client.getBidOffer,
+        }
+        appended = {}
+        for name in series:
+            last = self.lastTime(name)
+            entries = self._fetchSince(
+                fetch[name], None if last is None else last + 1, limit,
+            )
+            appended[name] = self.append(name, entries)
+        return appended
+
+    def read(self, series, start=None, end=None):
+        """
+        Returns the records with start <= time <= end as a read-only
+        memory-mapped record array.
+
+        Parameters-
+        series: 'index' or 'bidOffer'.
+        start: start of time interval in ms (optional)
+        end: end of time interval in ms (optional)
+        """
+
+        dtype = recordType(series)
+        if self.count(series) == 0:
+            return np.empty(0, dtype=dtype)
+        records = np.memmap(self.path(series), dtype=dtype, mode='r')
+        time = records['time']
+        first = 0 if start is None else np.searchsorted(time, start, 'left')
+        last = len(records) if end is None else np.searchsorted(
+            time, end, 'right',
+        )
+        return records[first:last]
+
+    def columns(self, series, start=None, end=None):
+        """
+        Same as read, as a dict of column arrays like Columnar.toColumns.
+
+        Parameters-
+        series: 'index' or 'bidOffer'.
+        start: start of time interval in ms (optional)
+        end: end of time interval in ms (optional)
+        """
+
+        records = self.read(series, start, end)
+        return {name: records[name] for name in records.dtype.names}
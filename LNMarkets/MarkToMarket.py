@@ -0,0 +1,234 @@
+import threading
+
+SATOSHIS = 100000000
+
+
+def positionProfit(position, price):
+    """
+    PL in sats of a position closed at a price. Quantities are in USD, so
+    a long earns quantity * (1 / entry - 1 / exit) BTC. Fees are not
+    included.
+
+    Parameters-
+    position: position dict with 'side', 'quantity' and 'price'.
+    price: closing price, the bid for longs and the offer for shorts.
+    """
+
+    quantity = float(position['quantity'])
+    pl = quantity / float(position['price']) - quantity / price
+    if position['side'] == 's':
+        pl = -pl
+    return pl * SATOSHIS
+
+
+class _Side:
+    """
+    Sums over the running positions of one side, from which the PL of the
+    whole side at any price is quantity / entry - quantity / price.
+    """
+
+    __slots__ = ('count', 'quantity', 'inverse', 'margin', 'liquidation',
+                 'pl')
+
+    def __init__(self, positions, side):
+        self.count = len(positions)
+        self.quantity = 0.0
+        self.inverse = 0.0
+        self.margin = 0.0
+        self.pl = 0.0
+        liquidations = []
+        for position in positions:
+            quantity = float(position['quantity'])
+            self.quantity += quantity
+            self.inverse += quantity / float(position['price'])
+            self.margin += float(position['margin'])
+            if position.get('liquidation') is not None:
+                liquidations.append(float(position['liquidation']))
+        if not liquidations:
+            self.liquidation = None
+        elif side == 'b':
+            self.liquidation = max(liquidations)
+        else:
+            self.liquidation = min(liquidations)
+
+    def mark(self, price, sign):
+        self.pl = sign * (self.inverse - self.quantity / price) * SATOSHIS
+
+
+class MarkToMarket:
+    """
+    Values the running positions of a PositionBook locally from bid and
+    offer prices, without requesting the positions from the API.
+
+    Each side is kept as a few sums rebuilt only when the book changes, so
+    a tick costs the same whatever the number of positions. A new bid
+    only revalues the longs and a new offer only the shorts.
+
+    Parameters-
+    book: PositionBook of the positions, eg. Client.trackPositions().
+    bid: initial bid price. (optional)
+    offer: initial offer price. (optional)
+    """
+
+    def __init__(self, book, bid=None, offer=None):
+        self.book = book
+        self.bid = None
+        self.offer = None
+        self.time = None
+        self._version = None
+        self._sides = {}
+        self._lock = threading.Lock()
+        if bid is not None or offer is not None:
+            self.update(bid, offer)
+
+    def _sync(self):
+        if self._version == self.book.version:
+            return
+        with self.book._lock:
+            self._version = self.book.version
+            self._sides = {
+                side: _Side(self.book.positions('running', side), side)
+                for side in ('b', 's')
+            }
+        self._mark('b', self.bid)
+        self._mark('s', self.offer)
+
+    def _mark(self, side, price):
+        if price is not None:
+            self._sides[side].mark(price, 1 if side == 'b' else -1)
+
+    def update(self, bid=None, offer=None, time=None):
+        """
+        Revalues the positions for new prices.
+
+        Parameters-
+        bid: new bid price, unchanged if None. (optional)
+        offer: new offer price, unchanged if None. (optional)
+        time: timestamp of the prices. (optional)
+        """
+
+        with self._lock:
+            self._sync()
+            if bid is not None and bid != self.bid:
+                self.bid = float(bid)
+                self._mark('b', self.bid)
+            if offer is not None and offer != self.offer:
+                self.offer = float(offer)
+                self._mark('s', self.offer)
+            if time is not None:
+                self.time = time
+
+    def apply(self, data):
+        """
+        Revalues the positions from bid-offer history entries, eg. the
+        response of History.getBidOffer or a PriceFeed tick. Only the
+        newest entry is used.
+
+        Parameters-
+        data: bid-offer entry, Array of entries or (series, entry) tick.
+        """
+
+        if isinstance(data, tuple):
+            data = data[1]
+        if isinstance(data, list):
+            if not data:
+                return
+            data = max(data, key=lambda entry: entry.get('time', 0))
+        self.update(data.get('bid'), data.get('offer'), data.get('time'))
+
+    def follow(self, feed):
+        """
+        Applies every bid-offer tick of a PriceFeed on a daemon thread,
+        until the feed is stopped. Returns the thread.
+
+        Parameters-
+        feed: PriceFeed polling 'bidOffer'.
+        """
+
+        subscription = feed.subscribe(series=('bidOffer',))
+
+        def run():
+            for tick in subscription:
+                self.apply(tick)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def _side(self, side):
+        with self._lock:
+            self._sync()
+            return self._sides[side]
+
+    def unrealizedProfit(self, side=None):
+        """
+        PL in sats of the running positions at the current prices.
+
+        Parameters-
+        side: "b" or "s". (optional)
+        """
+
+        sides = ('b', 's') if side is None else (side,)
+        return sum(self._side(side).pl for side in sides)
+
+    def marginWithheld(self, side=None):
+        """
+        Margin of the running positions.
+
+        Parameters-
+        side: "b" or "s". (optional)
+        """
+
+        sides = ('b', 's') if side is None else (side,)
+        return sum(self._side(side).margin for side in sides)
+
+    def marginRatio(self, side=None):
+        """
+        Equity over margin of the running positions, (margin + pl) /
+        margin, or None without running positions.
+
+        Parameters-
+        side: "b" or "s". (optional)
+        """
+
+        margin = self.marginWithheld(side)
+        if margin == 0:
+            return None
+        return (margin + self.unrealizedProfit(side)) / margin
+
+    def liquidationDistance(self, side=None):
+        """
+        Relative price move to the nearest liquidation, eg. 0.05 when a
+        5% move against the positions liquidates one of them. None when
+        unknown.
+
+        Parameters-
+        side: "b" or "s". (optional)
+        """
+
+        distances = []
+        if side in (None, 'b'):
+            liquidation = self._side('b').liquidation
+            if liquidation is not None and self.bid is not None:
+                distances.append((self.bid - liquidation) / self.bid)
+        if side in (None, 's'):
+            liquidation = self._side('s').liquidation
+            if liquidation is not None and self.offer is not None:
+                distances.append((liquidation - self.offer) / self.offer)
+        return min(distances) if distances else None
+
+    def profitOf(self, pid):
+        """
+        PL in sats of one running position at the current prices, or None.
+
+        Parameters-
+        pid: ID of the position.
+        """
+
+        position = self.book.get(pid)
+        if position is None or not self.book.isOpen(pid):
+            return None
+        price = self.bid if position['side'] == 'b' else self.offer
+        if price is None:
+            return None
+        return positionProfit(position, price)
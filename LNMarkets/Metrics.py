@@ -0,0 +1,329 @@
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+EVENTS = ('beforeSend', 'afterReceive', 'onError')
+PHASES = ('wait', 'dns', 'connect', 'tls', 'server', 'download', 'decode')
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Call:
+    """
+    One attempt of an HTTP call, passed to the client hooks.
+
+    Attributes-
+    method: HTTP method.
+    url: endpoint url relative to the API root.
+    attempt: number of the attempt, starting at 0.
+    status: response status, None before a response or on network errors.
+    error: exception of a failed attempt or call, else None.
+    phases: dict of seconds spent in 'wait' (rate limiter), 'dns' (async
+    client only, included in 'connect' otherwise), 'connect', 'tls',
+    'server', 'download' and 'decode'. Connection phases are missing when
+    a pooled connection was reused.
+    elapsed: seconds from the start of the attempt to the hook.
+    """
+
+    __slots__ = ('method', 'url', 'attempt', 'status', 'error', 'phases',
+                 'started', 'elapsed')
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.begin(0)
+
+    def begin(self, attempt):
+        self.attempt = attempt
+        self.status = None
+        self.error = None
+        self.phases = {}
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + max(seconds, 0.0)
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def received(self, status, total, headers):
+        """
+        Splits the time of a request into server and download phases.
+
+        Parameters-
+        status: response status.
+        total: seconds from sending the request to reading its body.
+        headers: seconds from sending the request to reading its headers.
+        """
+
+        self.status = status
+        connecting = sum(
+            self.phases.get(phase, 0.0) for phase in ('dns', 'connect', 'tls')
+        )
+        self.add('server', headers - connecting)
+        self.add('download', total - headers)
+
+    def __repr__(self):
+        return (
+            f'Call({self.method} {self.url} attempt={self.attempt} '
+            f'status={self.status} elapsed={self.elapsed})'
+        )
+
+
+# Connection phases of the requests based Client. urllib3 opens pooled
+# connections inside session.request, so the timings are written to the
+# Call of the current thread.
+
+_current = threading.local()
+
+
+def recordPhases(call):
+    """
+    Directs the connection timings of this thread to a Call, or nowhere if
+    None.
+
+    Parameters-
+    call: Call of the request about to be sent.
+    """
+
+    _current.call = call
+
+
+def _record(phase, started):
+    call = getattr(_current, 'call', None)
+    if call is not None:
+        call.add(phase, time.perf_counter() - started)
+
+
+class _TimedConnection(HTTPConnection):
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            _record('connect', started)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            _record('connect', started)
+
+    def connect(self):
+        call = getattr(_current, 'call', None)
+        connecting = 0.0 if call is None else call.phases.get('connect', 0.0)
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            if call is not None:
+                connected = call.phases.get('connect', 0.0) - connecting
+                call.add('tls', time.perf_counter() - started - connected)
+
+
+class _TimedPool(HTTPConnectionPool):
+    ConnectionCls = _TimedConnection
+
+
+class _TimedHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections report their connect and TLS handshake
+    times to the Call of the current thread.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedPool,
+            'https': _TimedHTTPSPool,
+        }
+
+
+def traceConfig():
+    """
+    aiohttp TraceConfig reporting DNS and connect times to the Call given
+    as trace_request_ctx.
+    """
+
+    import aiohttp
+
+    def starter(name):
+        async def start(session, context, params):
+            setattr(context, name, time.perf_counter())
+        return start
+
+    def ender(phase, name):
+        async def end(session, context, params):
+            call = context.trace_request_ctx
+            started = getattr(context, name, None)
+            if isinstance(call, Call) and started is not None:
+                seconds = time.perf_counter() - started
+                if phase == 'connect':
+                    seconds -= call.phases.get('dns', 0.0)
+                call.add(phase, seconds)
+        return end
+
+    config = aiohttp.TraceConfig()
+    config.on_dns_resolvehost_start.append(starter('dnsStarted'))
+    config.on_dns_resolvehost_end.append(ender('dns', 'dnsStarted'))
+    config.on_connection_create_start.append(starter('connectStarted'))
+    config.on_connection_create_end.append(
+        ender('connect', 'connectStarted'),
+    )
+    return config
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+class MetricsCollector:
+    """
+    Counters and latency histograms per endpoint, fed by client hooks and
+    rendered in the Prometheus text format.
+
+        metrics = MetricsCollector()
+        metrics.attach(client)
+        metrics.render()
+
+    Parameters-
+    buckets: upper bounds in seconds of the latency histogram. (optional)
+    prefix: prefix of the metric names. (optional)
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='lnmarkets'):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.errors = {}
+            self._histograms = {}
+            self._phases = {}
+
+    def attach(self, client):
+        """
+        Registers the collector hooks on a Client or AsyncClient and
+        returns the collector.
+
+        Parameters-
+        client: client to observe.
+        """
+
+        client.addHook('afterReceive', self.observe)
+        client.addHook('onError', self.observeError)
+        return self
+
+    def detach(self, client):
+        client.removeHook('afterReceive', self.observe)
+        client.removeHook('onError', self.observeError)
+
+    def observe(self, call):
+        """
+        Records a received response.
+
+        Parameters-
+        call: Call passed to the afterReceive hook.
+        """
+
+        endpoint = (call.method, call.url)
+        with self._lock:
+            key = endpoint + (call.status,)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self._histograms.get(endpoint)
+            if histogram is None:
+                histogram = self._histograms[endpoint] = [
+                    [0] * len(self.buckets), 0.0, 0,
+                ]
+            for index, bound in enumerate(self.buckets):
+                if call.elapsed <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += call.elapsed
+            histogram[2] += 1
+            for phase, seconds in call.phases.items():
+                key = endpoint + (phase,)
+                total = self._phases.get(key, (0.0, 0))
+                self._phases[key] = (total[0] + seconds, total[1] + 1)
+
+    def observeError(self, call):
+        """
+        Records a failed attempt or call.
+
+        Parameters-
+        call: Call passed to the onError hook.
+        """
+
+        key = (call.method, call.url, type(call.error).__name__)
+        with self._lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+
+        prefix = self.prefix
+        lines = [
+            f'# HELP {prefix}_requests_total Responses received.',
+            f'# TYPE {prefix}_requests_total counter',
+        ]
+        with self._lock:
+            for (method, url, status), count in sorted(
+                    self.requests.items(), key=str,
+            ):
+                labels = _labels(method=method, endpoint=url, status=status)
+                lines.append(f'{prefix}_requests_total{{{labels}}} {count}')
+            lines += [
+                f'# HELP {prefix}_errors_total Failed attempts and calls.',
+                f'# TYPE {prefix}_errors_total counter',
+            ]
+            for (method, url, error), count in sorted(self.errors.items()):
+                labels = _labels(method=method, endpoint=url, error=error)
+                lines.append(f'{prefix}_errors_total{{{labels}}} {count}')
+            name = f'{prefix}_request_duration_seconds'
+            lines += [
+                f'# HELP {name} Duration of the requests.',
+                f'# TYPE {name} histogram',
+            ]
+            for (method, url), histogram in sorted(self._histograms.items()):
+                labels = _labels(method=method, endpoint=url)
+                counts, total, count = histogram
+                for bound, bucketCount in zip(self.buckets, counts):
+                    lines.append(
+                        f'{name}_bucket{{{labels},le="{bound}"}} '
+                        f'{bucketCount}'
+                    )
+                lines += [
+                    f'{name}_bucket{{{labels},le="+Inf"}} {count}',
+                    f'{name}_sum{{{labels}}} {total}',
+                    f'{name}_count{{{labels}}} {count}',
+                ]
+            name = f'{prefix}_request_phase_seconds'
+            lines += [
+                f'# HELP {name} Time spent in each phase of the requests.',
+                f'# TYPE {name} summary',
+            ]
+            for (method, url, phase), (total, count) in sorted(
+                    self._phases.items(),
+            ):
+                labels = _labels(method=method, endpoint=url, phase=phase)
+                lines += [
+                    f'{name}_sum{{{labels}}} {total}',
+                    f'{name}_count{{{labels}}} {count}',
+                ]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,711 @@
+import json
+import math
+import random
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit, parse_qs
+from . import APIUrls
+
+SATOSHIS = 100000000
+_TIME_FIELDS = {
+    'open': 'creation_ts',
+    'running': 'market_filled_ts',
+    'closed': 'closed_ts',
+}
+_PREFIX = urlsplit(APIUrls.lnapi).path
+
+
+class _Reply(Exception):
+    def __init__(self, status, body=None, headers=None):
+        super().__init__(status)
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+def _reject(status, message):
+    return _Reply(status, {'message': message})
+
+
+def _number(data, field, required=True):
+    value = data.get(field)
+    if value is None:
+        if required:
+            raise _reject(400, f'{field} is required')
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise _reject(400, f'{field} must be a number')
+
+
+class MockServer:
+    """
+    Local stand-in for the LN Markets API, serving the endpoints of
+    APIUrls from memory so tests and benchmarks run offline.
+
+    One account is simulated: positions are valued against the current
+    bid and offer, margins and PL move the balance, and deposits and
+    withdraws are recorded in the user history. Index and bid-offer
+    history is a seeded random walk, so runs are reproducible.
+
+    Parameters-
+    token: accepted Bearer token. (optional)
+    latency: seconds added to every response. (optional)
+    jitter: up to this many random seconds added to the latency.
+    (optional)
+    errorRate: fraction of requests answered with errorStatus. (optional)
+    errorStatus: status of the injected errors. (optional)
+    seed: seed of the prices, ids, jitter and error draws. (optional)
+    balance: initial balance in sats. (optional)
+    bid: initial bid price. (optional)
+    spread: offer minus bid. (optional)
+    history: number of history entries generated before the start.
+    (optional)
+    historyLimit: most history entries returned by one request, with or
+    without a limit. (optional)
+    transactions: number of deposits generated before the start.
+    (optional)
+    host: interface to listen on. (optional)
+    port: port to listen on, a free one if 0. (optional)
+    """
+
+    def __init__(self, token='mock-token', latency=0.0, jitter=0.0,
+                 errorRate=0.0, errorStatus=503, seed=0, balance=10000000,
+                 bid=10000.0, spread=5.0, history=1000, transactions=0,
+                 historyLimit=1000, host='127.0.0.1', port=0):
+        self.token = token
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self.errorStatus = errorStatus
+        self.spread = spread
+        self.historyLimit = historyLimit
+        self.host = host
+        self.port = port
+        self.requests = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._failures = []
+        self._sessions = set()
+        self._tokens = [token]
+        self._expiries = {}
+        self._server = None
+        self._thread = None
+        self.user = {
+            'uid': self._uuid(),
+            'username': 'mock',
+            'show_username': False,
+            'show_leaderboard': True,
+            'balance': balance,
+            'account_type': 'credentials',
+        }
+        self.positions = {}
+        self.transactions = []
+        self.index = []
+        self.bidOffer = []
+        now = self._now() - history * 1000
+        price = bid
+        for offset in range(history):
+            price = max(1.0, price * (1 + self._random.gauss(0, 0.001)))
+            self._tick(now + offset * 1000, price)
+        self._tick(self._now(), bid)
+        for number in range(transactions):
+            self._record('deposit', 1000 + number, now + number)
+
+    @property
+    def url(self):
+        """
+        Base url to give as the baseUrl of a client.
+        """
+
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def bid(self):
+        return self.bidOffer[-1]['bid']
+
+    @property
+    def offer(self):
+        return self.bidOffer[-1]['offer']
+
+    @staticmethod
+    def _now():
+        return int(time.time() * 1000)
+
+    def _uuid(self):
+        return str(uuid.UUID(int=self._random.getrandbits(128), version=4))
+
+    def _tick(self, ts, bid):
+        if self.bidOffer and ts <= self.bidOffer[-1]['time']:
+            ts = self.bidOffer[-1]['time'] + 1
+        offer = bid + self.spread
+        self.bidOffer.append({'time': ts, 'bid': bid, 'offer': offer})
+        self.index.append({'time': ts, 'index': (bid + offer) / 2})
+
+    def _record(self, type, amount, ts=None):
+        transaction = {
+            'id': self._uuid(),
+            'type': type,
+            'amount': amount,
+            'fee': 0,
+            'ts': self._now() if ts is None else ts,
+            'success': True,
+        }
+        self.transactions.append(transaction)
+        return transaction
+
+    # Control
+
+    def start(self):
+        """
+        Starts serving on a daemon thread and returns the server.
+        """
+
+        server = self
+
+        class Handler(_Handler):
+            mock = server
+
+        self._server = _Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving.
+        """
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail(self, method, url, status=500, times=1, body=None):
+        """
+        Answers the next matching requests with an error.
+
+        Parameters-
+        method: HTTP method.
+        url: endpoint url relative to the API root, eg. APIUrls.userUrl.
+        status: response status. (optional)
+        times: number of requests to fail. (optional)
+        body: JSON body of the error. (optional)
+        """
+
+        body = {'message': 'Injected error'} if body is None else body
+        with self._lock:
+            self._failures.append([method, url, status, times, body])
+
+    def expire(self, tokens=True, sessions=True):
+        """
+        Expires the generated tokens and the login sessions, as when they
+        outlive their expiry. The token given to the server stays valid.
+
+        Parameters-
+        tokens: expire the generated tokens. (optional)
+        sessions: expire the login sessions. (optional)
+        """
+
+        with self._lock:
+            if tokens:
+                for token in self._tokens[1:]:
+                    self._expiries[token] = 0.0
+            if sessions:
+                self._sessions.clear()
+
+    def setPrice(self, bid):
+        """
+        Moves the market, filling the limit orders it crosses.
+
+        Parameters-
+        bid: new bid price, the offer being bid + spread.
+        """
+
+        with self._lock:
+            self._tick(self._now(), float(bid))
+            for position in self.positions.values():
+                if self._state(position) != 'open':
+                    continue
+                long = position['side'] == 'b'
+                if (
+                        long and self.offer <= position['price'] or
+                        not long and self.bid >= position['price']
+                ):
+                    position['market_filled_ts'] = self._now()
+
+    # Dispatch
+
+    def _handle(self, method, path, query, headers, body):
+        if path.startswith(_PREFIX):
+            path = path[len(_PREFIX):]
+        with self._lock:
+            self.requests[(method, path)] = (
+                self.requests.get((method, path), 0) + 1
+            )
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failure = self._failure(method, path)
+        if delay:
+            time.sleep(delay)
+        if failure is not None:
+            raise failure
+        route = _ROUTES.get((method, path))
+        if route is None:
+            raise _reject(404, f'Cannot {method} {path}')
+        function, private = route
+        if private:
+            self._authenticate(headers)
+        with self._lock:
+            return function(self, query, body)
+
+    def _failure(self, method, path):
+        for failure in self._failures:
+            if failure[0] == method and failure[1] == path:
+                failure[3] -= 1
+                if failure[3] <= 0:
+                    self._failures.remove(failure)
+                return _Reply(failure[2], failure[4])
+        if self.errorRate and self._random.random() < self.errorRate:
+            return _reject(self.errorStatus, 'Injected error')
+        return None
+
+    def _authenticate(self, headers):
+        authorization = headers.get('Authorization') or ''
+        if authorization.startswith('Bearer '):
+            token = authorization[len('Bearer '):]
+            if token in self._tokens and (
+                    time.monotonic() < self._expiries.get(token, math.inf)
+            ):
+                return
+        cookie = headers.get('Cookie') or ''
+        for part in cookie.split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == 'session' and value in self._sessions:
+                return
+        raise _reject(401, 'Unauthorized')
+
+    # Positions
+
+    def _state(self, position):
+        if position['canceled']:
+            return 'canceled'
+        if position['closed']:
+            return 'closed'
+        if position['market_filled_ts'] is None:
+            return 'open'
+        return 'running'
+
+    def _profit(self, position, price=None):
+        if price is None:
+            price = self.bid if position['side'] == 'b' else self.offer
+        quantity = position['quantity']
+        pl = quantity / position['price'] - quantity / price
+        if position['side'] == 's':
+            pl = -pl
+        return math.floor(pl * SATOSHIS) - position['sum_cashin']
+
+    def _liquidation(self, position):
+        price = position['price']
+        ratio = position['margin'] / SATOSHIS / position['quantity']
+        if position['side'] == 'b':
+            return round(1 / (1 / price + ratio), 1)
+        if 1 / price - ratio <= 0:
+            return None
+        return round(1 / (1 / price - ratio), 1)
+
+    def _view(self, position):
+        if self._state(position) == 'running':
+            position['pl'] = self._profit(position)
+        return {
+            key: value for key, value in position.items()
+            if key != 'sum_cashin'
+        }
+
+    def _position(self, data):
+        position = self.positions.get(data.get('pid'))
+        if position is None:
+            raise _reject(404, 'Position not found')
+        return position
+
+    def getPositions(self, query, body):
+        states = ('open', 'running', 'closed')
+        requested = query.get('type')
+        if requested not in (None, 'all'):
+            if requested not in states:
+                raise _reject(400, f'Unknown type {requested}')
+            states = (requested,)
+        start = int(query['from']) if 'from' in query else None
+        end = int(query['to']) if 'to' in query else None
+        limit = int(query['limit']) if 'limit' in query else None
+        result = {}
+        for state in states:
+            field = _TIME_FIELDS[state]
+            positions = [
+                position for position in self.positions.values()
+                if self._state(position) == state and (
+                    start is None or position[field] >= start
+                ) and (end is None or position[field] <= end)
+            ]
+            if start is not None or end is not None or limit is not None:
+                positions.sort(key=lambda position: position[field],
+                               reverse=True)
+                positions = positions[:limit]
+            result[state] = [self._view(position) for position in positions]
+        return result
+
+    def createPosition(self, query, body):
+        type_ = body.get('type')
+        side = body.get('side')
+        if type_ not in ('l', 'm'):
+            raise _reject(400, 'type must be "l" or "m"')
+        if side not in ('b', 's'):
+            raise _reject(400, 'side must be "b" or "s"')
+        leverage = _number(body, 'leverage')
+        if not 1 <= leverage <= 100:
+            raise _reject(400, 'leverage must be between 1 and 100')
+        if type_ == 'l':
+            price = _number(body, 'price')
+        else:
+            price = self.offer if side == 'b' else self.bid
+        margin = _number(body, 'margin', required=False)
+        if margin is None:
+            quantity = _number(body, 'quantity')
+            margin = math.ceil(quantity / price * SATOSHIS / leverage)
+        else:
+            quantity = math.floor(margin * leverage * price / SATOSHIS)
+        if quantity < 1 or margin < 1:
+            raise _reject(400, 'Position is too small')
+        if margin > self.user['balance']:
+            raise _reject(400, 'Not enough balance')
+        self.user['balance'] -= margin
+        now = self._now()
+        pid = self._uuid()
+        position = {
+            'pid': pid,
+            'id': pid,
+            'type': type_,
+            'side': side,
+            'leverage': leverage,
+            'margin': margin,
+            'quantity': quantity,
+            'price': price,
+            'liquidation': None,
+            'stoploss': body.get('stoploss', 0),
+            'takeprofit': body.get('takeprofit', 0),
+            'exit_price': None,
+            'pl': 0,
+            'opening_fee': 0,
+            'closing_fee': 0,
+            'sum_carry_fees': 0,
+            'creation_ts': now,
+            'market_filled_ts': now if type_ == 'm' else None,
+            'closed_ts': None,
+            'closed': False,
+            'canceled': False,
+            'sum_cashin': 0,
+        }
+        position['liquidation'] = self._liquidation(position)
+        self.positions[pid] = position
+        return {'position': self._view(position)}
+
+    def updatePosition(self, query, body):
+        position = self._position(body)
+        if self._state(position) in ('closed', 'canceled'):
+            raise _reject(400, 'Position is closed')
+        if body.get('type') not in ('stoploss', 'takeprofit'):
+            raise _reject(400, 'type must be "stoploss" or "takeprofit"')
+        position[body['type']] = _number(body, 'value')
+        return self._view(position)
+
+    def _close(self, position):
+        price = self.bid if position['side'] == 'b' else self.offer
+        pl = self._profit(position, price)
+        position.update({
+            'pl': pl,
+            'exit_price': price,
+            'closed': True,
+            'closed_ts': self._now(),
+        })
+        self.user['balance'] += max(0, position['margin'] + pl)
+        return self._view(position)
+
+    def closePosition(self, query, body):
+        position = self._position(query)
+        if self._state(position) != 'running':
+            raise _reject(400, 'Position is not running')
+        return self._close(position)
+
+    def closeAll(self, query, body):
+        closed = [
+            self._close(position) for position in self.positions.values()
+            if self._state(position) == 'running'
+        ]
+        return {
+            'positions': closed,
+            'pl': sum(position['pl'] for position in closed),
+        }
+
+    def addMargin(self, query, body):
+        position = self._position(body)
+        amount = _number(body, 'amount')
+        if self._state(position) != 'running':
+            raise _reject(400, 'Position is not running')
+        if amount > self.user['balance']:
+            raise _reject(400, 'Not enough balance')
+        self.user['balance'] -= amount
+        position['margin'] += amount
+        position['liquidation'] = self._liquidation(position)
+        return self._view(position)
+
+    def cashin(self, query, body):
+        position = self._position(body)
+        amount = _number(body, 'amount')
+        if self._state(position) != 'running':
+            raise _reject(400, 'Position is not running')
+        if amount > self._profit(position):
+            raise _reject(400, 'Amount is above the position profit')
+        position['sum_cashin'] += amount
+        self.user['balance'] += amount
+        return self._view(position)
+
+    def cancelPosition(self, query, body):
+        position = self._position(body)
+        if self._state(position) != 'open':
+            raise _reject(400, 'Position is not open')
+        position['canceled'] = True
+        self.user['balance'] += position['margin']
+        return self._view(position)
+
+    # User
+
+    def getUser(self, query, body):
+        return dict(self.user)
+
+    def updateUser(self, query, body):
+        for field in ('show_username', 'show_leaderboard', 'username'):
+            if field in body:
+                self.user[field] = body[field]
+        return dict(self.user)
+
+    def updatePassword(self, query, body):
+        if not body.get('newPassword'):
+            raise _reject(400, 'newPassword is required')
+        return {}
+
+    def getHistory(self, query, body):
+        transactions = [
+            transaction for transaction in self.transactions
+            if transaction['type'] == query.get('type')
+        ]
+        if 'start' in query:
+            transactions = [
+                transaction for transaction in transactions
+                if transaction['ts'] >= int(query['start'])
+            ]
+        if 'end' in query:
+            transactions = [
+                transaction for transaction in transactions
+                if transaction['ts'] <= int(query['end'])
+            ]
+        length = len(transactions)
+        if 'nbitem' in query:
+            size = int(query['nbitem'])
+            first = (int(query.get('index', 1)) - 1) * size
+            transactions = transactions[first:first + size]
+        if query.get('getLength') == 'true':
+            return {'data': transactions, 'length': length}
+        return transactions
+
+    def deposit(self, query, body):
+        amount = _number(body, 'amount')
+        self.user['balance'] += amount
+        transaction = self._record('deposit', amount)
+        return {
+            'depositId': transaction['id'],
+            'paymentRequest': f'lnbcmock{int(amount)}',
+        }
+
+    def _withdraw(self, body, type):
+        amount = _number(body, 'amount')
+        if amount > self.user['balance']:
+            raise _reject(400, 'Not enough balance')
+        self.user['balance'] -= amount
+        return self._record(type, amount)
+
+    def withdraw(self, query, body):
+        if not body.get('invoice'):
+            raise _reject(400, 'invoice is required')
+        transaction = self._withdraw(body, 'withdraw')
+        return {'id': transaction['id'], 'amount': transaction['amount']}
+
+    def withdrawLNURL(self, query, body):
+        transaction = self._withdraw(body, 'withdraw')
+        return {'lnurl': f'lnurlmock{transaction["id"]}'}
+
+    def getTokens(self, query, body):
+        return [{'jti': token} for token in self._tokens]
+
+    def generateToken(self, query, body):
+        token = self._uuid()
+        self._tokens.append(token)
+        expiry = body.get('expiry')
+        if expiry is not None:
+            self._expiries[token] = time.monotonic() + float(expiry)
+        return {'token': token}
+
+    def revokeToken(self, query, body):
+        jti = query.get('jti')
+        self._tokens = [
+            token for token in self._tokens if jti not in (None, token)
+        ]
+        return {}
+
+    def login(self, query, body):
+        if set(body) != {'token'} or body['token'] not in self._tokens:
+            raise _reject(401, 'Invalid token')
+        session = self._uuid()
+        self._sessions.add(session)
+        raise _Reply(200, {}, {
+            'Set-Cookie': f'session={session}; Path=/; HttpOnly',
+        })
+
+    def logout(self, query, body):
+        return {}
+
+    # State and history
+
+    def getState(self, query, body):
+        return {
+            'version': 'mock',
+            'state': {'newPosition': True},
+            'bid': self.bid,
+            'offer': self.offer,
+        }
+
+    def getNode(self, query, body):
+        return {'alias': 'mock', 'pubkey': '0' * 66, 'uris': []}
+
+    def _history(self, series, query):
+        start = int(query['from']) if 'from' in query else None
+        end = int(query['to']) if 'to' in query else None
+        entries = [
+            entry for entry in series
+            if (start is None or entry['time'] >= start) and
+            (end is None or entry['time'] <= end)
+        ]
+        entries.reverse()
+        limit = self.historyLimit
+        if 'limit' in query:
+            limit = min(limit, int(query['limit']))
+        return entries[:limit]
+
+    def getIndex(self, query, body):
+        return self._history(self.index, query)
+
+    def getBidOffer(self, query, body):
+        return self._history(self.bidOffer, query)
+
+
+_ROUTES = {
+    ('GET', APIUrls.positionUrl): (MockServer.getPositions, True),
+    ('POST', APIUrls.positionUrl): (MockServer.createPosition, True),
+    ('PUT', APIUrls.positionUrl): (MockServer.updatePosition, True),
+    ('DELETE', APIUrls.positionUrl): (MockServer.closePosition, True),
+    ('DELETE', APIUrls.closeAllUrl): (MockServer.closeAll, True),
+    ('POST', APIUrls.addMarginUrl): (MockServer.addMargin, True),
+    ('POST', APIUrls.cashinUrl): (MockServer.cashin, True),
+    ('POST', APIUrls.cancelUrl): (MockServer.cancelPosition, True),
+    ('GET', APIUrls.userUrl): (MockServer.getUser, True),
+    ('PUT', APIUrls.userUrl): (MockServer.updateUser, True),
+    ('PUT', APIUrls.updateUrl): (MockServer.updatePassword, True),
+    ('GET', APIUrls.userHistoryUrl): (MockServer.getHistory, True),
+    ('POST', APIUrls.depositUrl): (MockServer.deposit, True),
+    ('POST', APIUrls.withdrawUrl): (MockServer.withdraw, True),
+    ('POST', APIUrls.withdrawLNUrl): (MockServer.withdrawLNURL, True),
+    ('GET', APIUrls.tokenUrl): (MockServer.getTokens, True),
+    ('POST', APIUrls.tokenUrl): (MockServer.generateToken, True),
+    ('DELETE', APIUrls.tokenUrl): (MockServer.revokeToken, True),
+    ('POST', APIUrls.loginUrl): (MockServer.login, False),
+    ('POST', APIUrls.logoutUrl): (MockServer.logout, False),
+    ('GET', APIUrls.stateUrl): (MockServer.getState, False),
+    ('GET', APIUrls.nodeUrl): (MockServer.getNode, False),
+    ('GET', APIUrls.indexUrl): (MockServer.getIndex, False),
+    ('GET', APIUrls.bidOfferUrl): (MockServer.getBidOffer, False),
+}
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    mock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method):
+        parts = urlsplit(self.path)
+        query = {
+            key: values[-1] for key, values in parse_qs(parts.query).items()
+        }
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        headers = {}
+        try:
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                raise _reject(400, 'Invalid JSON body')
+            status, data = 200, self.mock._handle(
+                method, parts.path, query, self.headers, body,
+            )
+        except _Reply as reply:
+            status, data, headers = reply.status, reply.body, reply.headers
+        payload = b'' if data is None else json.dumps(data).encode()
+        etag = f'"{zlib.crc32(payload):08x}"'
+        if (
+                method == 'GET' and status == 200 and
+                self.headers.get('If-None-Match') == etag
+        ):
+            status, payload = 304, b''
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json')
+        if method == 'GET' and status in (200, 304):
+            self.send_header('ETag', etag)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
@@ -0,0 +1,221 @@
+def _number(value):
+    return None if value is None else float(value)
+
+
+def _integer(value):
+    return None if value is None else int(value)
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _flag(value):
+    return None if value is None else bool(value)
+
+
+def _keep(value):
+    return value
+
+
+class Model:
+    """
+    Base of the slotted models. Fields are converted once when the model is
+    built, unknown keys are kept in `extra`.
+
+    Models also behave as read-only mappings, so code written for the raw
+    dicts (position['margin'], position.get('pl'), **order) keeps working.
+    """
+
+    __slots__ = ('extra',)
+    _fields = {}
+
+    def __init__(self, **fields):
+        converters = self._fields
+        for name, converter in converters.items():
+            setattr(self, name, converter(fields.pop(name, None)))
+        self.extra = fields or None
+
+    @classmethod
+    def fromDict(cls, data):
+        """
+        Builds a model from an API response dict.
+
+        Parameters-
+        data: dict of fields.
+        """
+
+        return cls(**data)
+
+    @classmethod
+    def fromList(cls, data):
+        """
+        Builds a list of models from an array of API response dicts.
+
+        Parameters-
+        data: Array of dicts.
+        """
+
+        return [cls(**entry) for entry in data]
+
+    def keys(self):
+        keys = [
+            name for name in self._fields if getattr(self, name) is not None
+        ]
+        if self.extra:
+            keys += list(self.extra)
+        return keys
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def toDict(self):
+        """
+        Returns the fields as a dict, without the unset ones.
+        """
+
+        return {key: self[key] for key in self.keys()}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.toDict() == other.toDict()
+
+    def __repr__(self):
+        fields = ', '.join(
+            f'{name}={getattr(self, name)!r}' for name in self._fields
+            if getattr(self, name) is not None
+        )
+        return f'{type(self).__name__}({fields})'
+
+
+class Position(Model):
+    """
+    Futures position with numeric fields as floats and timestamps as ints.
+    """
+
+    _fields = {
+        'pid': _text,
+        'id': _text,
+        'type': _text,
+        'side': _text,
+        'margin': _number,
+        'pl': _number,
+        'price': _number,
+        'quantity': _number,
+        'leverage': _number,
+        'liquidation': _number,
+        'stoploss': _number,
+        'takeprofit': _number,
+        'exit_price': _number,
+        'opening_fee': _number,
+        'closing_fee': _number,
+        'sum_carry_fees': _number,
+        'creation_ts': _integer,
+        'market_filled_ts': _integer,
+        'closed_ts': _integer,
+        'closed': _flag,
+        'canceled': _flag,
+    }
+    __slots__ = tuple(_fields)
+
+
+class Order(Model):
+    """
+    Order form of createPosition, usable in createPositions batches.
+    Values are sent as given.
+
+    Parameters-
+    type_: "l" for limit order, "m" for market order.
+    side: "b" for buy, "s" for sell.
+    leverage: Leverage of the order.
+    margin: margin or quantity must be given (optional)
+    quantity: margin or quantity must be given (optional)
+    stoploss: StopLoss level. (optional)
+    takeprofit: Profit taking level. (optional)
+    price: limit price for limit order. (optional)
+    """
+
+    _fields = {
+        'type_': _text,
+        'side': _text,
+        'leverage': _keep,
+        'margin': _keep,
+        'quantity': _keep,
+        'stoploss': _keep,
+        'takeprofit': _keep,
+        'price': _keep,
+    }
+    __slots__ = tuple(_fields)
+
+    def __init__(self, type_, side, leverage, margin=None, quantity=None,
+                 stoploss=None, takeprofit=None, price=None):
+        super().__init__(
+            type_=type_, side=side, leverage=leverage, margin=margin,
+            quantity=quantity, stoploss=stoploss, takeprofit=takeprofit,
+            price=price,
+        )
+
+
+class Transaction(Model):
+    """
+    Deposit or withdraw of the user history.
+    """
+
+    _fields = {
+        'id': _text,
+        'type': _text,
+        'amount': _number,
+        'fee': _number,
+        'ts': _integer,
+        'success': _flag,
+    }
+    __slots__ = tuple(_fields)
+
+
+def positions(data):
+    """
+    Converts a getPositions response, a list or a dict of lists, to
+    Position models.
+
+    Parameters-
+    data: getPositions response.
+    """
+
+    if isinstance(data, dict):
+        return {
+            key: Position.fromList(value) if isinstance(value, list)
+            else value
+            for key, value in data.items()
+        }
+    return Position.fromList(data)
+
+
+def transactions(data):
+    """
+    Converts a getTransactions response, a list or a page dict, to
+    Transaction models.
+
+    Parameters-
+    data: getTransactions response.
+    """
+
+    if isinstance(data, dict):
+        return {
+            **data, 'data': Transaction.fromList(data.get('data', [])),
+        }
+    return Transaction.fromList(data)
@@ -0,0 +1,194 @@
+from .Columnar import np
+
+NUMBERS = (
+    'margin', 'pl', 'price', 'quantity', 'leverage', 'liquidation',
+    'exit_price', 'opening_fee', 'closing_fee', 'sum_carry_fees',
+)
+TIMES = ('creation_ts', 'market_filled_ts', 'closed_ts')
+SIDES = {'b': 1, 's': -1}
+
+
+def _value(position, field, default):
+    value = position.get(field)
+    return default if value is None else value
+
+
+def toArrays(positions):
+    """
+    Loads positions into a dict of column arrays.
+
+    Numeric fields are float64 and timestamps int64, missing values being
+    NaN and 0. 'side' is int8, 1 for long and -1 for short, and 'closed',
+    'canceled', 'open' and 'running' are bool. Like the API's lists, open
+    positions are limit orders not filled yet and running ones are filled
+    and not closed.
+
+    Parameters-
+    positions: Array of positions, as dicts or Models.Position.
+    """
+
+    count = len(positions)
+
+    def column(field, dtype, default):
+        return np.fromiter(
+            (_value(position, field, default) for position in positions),
+            dtype=dtype,
+            count=count,
+        )
+
+    arrays = {
+        'pid': np.array(
+            [position.get('pid') for position in positions], dtype=object,
+        ),
+        'side': np.fromiter(
+            (SIDES.get(position.get('side'), 0) for position in positions),
+            dtype=np.int8,
+            count=count,
+        ),
+        'closed': column('closed', bool, False),
+        'canceled': column('canceled', bool, False),
+    }
+    for field in NUMBERS:
+        arrays[field] = column(field, np.float64, np.nan)
+    for field in TIMES:
+        arrays[field] = column(field, np.int64, 0)
+    active = ~(arrays['closed'] | arrays['canceled'])
+    filled = arrays['market_filled_ts'] > 0
+    arrays['open'] = active & ~filled
+    arrays['running'] = active & filled
+    return arrays
+
+
+def _select(arrays, side=None, running=None):
+    mask = np.ones(len(arrays['side']), dtype=bool)
+    if side is not None:
+        mask &= arrays['side'] == SIDES[side]
+    if running:
+        mask &= arrays['running']
+    elif running is not None:
+        mask &= arrays['closed'] | arrays['canceled']
+    return mask
+
+
+def profit(arrays, side=None, running=None):
+    """
+    Sums the PL of the positions.
+
+    Parameters-
+    arrays: toArrays result.
+    side: 'b' or 's' to only sum one side. (optional)
+    running: True for running positions only, False for closed and
+    canceled ones only. (optional)
+    """
+
+    mask = _select(arrays, side, running)
+    return float(np.nansum(arrays['pl'][mask]))
+
+
+def marginWithheld(arrays, side=None):
+    """
+    Sums the margin of the running positions.
+
+    Parameters-
+    arrays: toArrays result.
+    side: 'b' or 's' to only sum one side. (optional)
+    """
+
+    mask = _select(arrays, side, running=True)
+    return float(np.nansum(arrays['margin'][mask]))
+
+
+def exposure(arrays, by='side'):
+    """
+    Groups the running positions and sums their quantity, margin and PL.
+
+    Parameters-
+    arrays: toArrays result.
+    by: 'side' or 'leverage'. (optional)
+
+    Returns-
+    Dict of 'side' or 'leverage' keys and 'quantity', 'margin', 'pl' and
+    'count' arrays, one value per group. Quantities of shorts are
+    negative when grouping by leverage, so each group holds its net
+    exposure.
+    """
+
+    if by not in ('side', 'leverage'):
+        raise ValueError(f'Cannot group positions by {by}')
+    mask = arrays['running']
+    keys, groups = np.unique(arrays[by][mask], return_inverse=True)
+    quantity = arrays['quantity'][mask]
+    if by == 'leverage':
+        quantity = quantity * arrays['side'][mask]
+    size = len(keys)
+    return {
+        by: keys,
+        'quantity': np.bincount(
+            groups, np.nan_to_num(quantity), minlength=size,
+        ),
+        'margin': np.bincount(
+            groups, np.nan_to_num(arrays['margin'][mask]), minlength=size,
+        ),
+        'pl': np.bincount(
+            groups, np.nan_to_num(arrays['pl'][mask]), minlength=size,
+        ),
+        'count': np.bincount(groups, minlength=size),
+    }
+
+
+def liquidationDistance(arrays, bid, offer=None):
+    """
+    Relative distance between the closing price of each position and its
+    liquidation price, eg. 0.1 when the price may still move 10% against
+    it. Longs close at the bid and shorts at the offer. Closed and
+    canceled positions are NaN.
+
+    Parameters-
+    arrays: toArrays result.
+    bid: current bid price.
+    offer: current offer price, the bid if not given. (optional)
+    """
+
+    offer = bid if offer is None else offer
+    side = arrays['side']
+    price = np.where(side > 0, bid, offer)
+    distance = side * (price - arrays['liquidation']) / price
+    return np.where(arrays['running'], distance, np.nan)
+
+
+def drawdown(arrays):
+    """
+    Realized PL curve of the closed positions in closing order, and its
+    drawdown from the running peak.
+
+    Parameters-
+    arrays: toArrays result.
+
+    Returns-
+    Dict of 'time' (closed_ts), 'equity' (cumulated PL) and 'drawdown'
+    (equity minus its peak so far, zero or negative) arrays.
+    """
+
+    mask = arrays['closed'] & ~arrays['canceled']
+    time = arrays['closed_ts'][mask]
+    order = np.argsort(time, kind='stable')
+    equity = np.cumsum(np.nan_to_num(arrays['pl'][mask][order]))
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+    return {
+        'time': time[order],
+        'equity': equity,
+        'drawdown': equity - peak,
+    }
+
+
+def maxDrawdown(arrays):
+    """
+    Largest drop of the realized PL curve from a previous peak, as a
+    positive number.
+
+    Parameters-
+    arrays: toArrays result.
+    """
+
+    curve = drawdown(arrays)['drawdown']
+    return float(-curve.min()) if len(curve) else 0.0
@@ -0,0 +1,327 @@
+import threading
+
+STATES = ('open', 'running', 'closed', 'canceled')
+TIME_FIELDS = {
+    'open': 'creation_ts',
+    'running': 'market_filled_ts',
+    'closed': 'closed_ts',
+}
+
+
+def positionList(data, state=None):
+    """
+    Returns the list of positions of a getPositions response, which is
+    either a list or a dict keyed by the requested kind of positions.
+
+    Parameters-
+    data: getPositions response.
+    state: kind of positions that was requested. (optional)
+    """
+
+    if isinstance(data, dict):
+        return data.get(state, [])
+    return data
+
+
+def newerPositions(positions, state, since, seen):
+    """
+    Returns the positions of a window query not already seen at its
+    boundary time, ie. all of them except those timed `since` whose pid is
+    in `seen`.
+
+    Parameters-
+    positions: Array of positions.
+    state: 'open', 'running' or 'closed', which picks the time field.
+    since: boundary time, None for no boundary.
+    seen: pids already returned at the boundary time.
+    """
+
+    if since is None or not seen:
+        return list(positions)
+    field = TIME_FIELDS[state]
+    return [
+        position for position in positions
+        if position.get(field) != since or position['pid'] not in seen
+    ]
+
+
+class PositionCursor:
+    """
+    Watermark of the positions of one kind already returned by
+    Client.newPositions, so each call only transfers the positions timed
+    after the previous ones, eg. the closures a periodic PL report has not
+    counted yet.
+
+    Attributes-
+    state: 'open', 'running' or 'closed'.
+    since: time of the newest position seen, None before the first call.
+    seen: pids of the positions seen at that time.
+    count: number of positions seen.
+    pl: summed pl of the positions seen.
+    """
+
+    def __init__(self, state='closed', since=None):
+        if state not in TIME_FIELDS:
+            raise ValueError(f'Unknown position state {state}')
+        self.state = state
+        self.since = since
+        self.seen = set()
+        self.count = 0
+        self.pl = 0.0
+
+    def advance(self, positions):
+        """
+        Records new positions and returns those not seen before.
+
+        Parameters-
+        positions: Array of positions timed at or after since.
+        """
+
+        field = TIME_FIELDS[self.state]
+        fresh = newerPositions(positions, self.state, self.since, self.seen)
+        for position in fresh:
+            time = position.get(field)
+            if time is None:
+                continue
+            if self.since is None or time > self.since:
+                self.since = time
+                self.seen = set()
+            if time == self.since:
+                self.seen.add(position['pid'])
+        self.count += len(fresh)
+        self.pl += sum(float(position.get('pl') or 0) for position in fresh)
+        return fresh
+
+
+class PositionBook:
+    """
+    In-memory book of positions indexed by pid, by state and by side.
+
+    Attach it to a client with Client.trackPositions to have it updated
+    from the responses of create, close, cancel, update, addMargin and
+    cashin calls, and call Client.refreshPositions to resynchronise it
+    with the API.
+    Membership checks and aggregates are answered from memory.
+    version is incremented on every change, so consumers can tell when
+    their derived state is outdated.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._lock = threading.RLock()
+        self._positions = {}
+        self._states = {}
+        self._index = {state: {'b': {}, 's': {}} for state in STATES}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, pid):
+        return pid in self._positions
+
+    def get(self, pid):
+        """
+        Returns the stored position or None.
+
+        Parameters-
+        pid: ID of the position.
+        """
+
+        return self._positions.get(pid)
+
+    def stateOf(self, pid):
+        """
+        Returns 'open', 'running', 'closed', 'canceled' or None if unknown.
+
+        Parameters-
+        pid: ID of the position.
+        """
+
+        return self._states.get(pid)
+
+    def isOpen(self, pid):
+        """
+        Checks if a position is running.
+
+        Parameters-
+        pid: ID of the position.
+        """
+
+        return self._states.get(pid) == 'running'
+
+    def positions(self, state=None, side=None):
+        """
+        Returns the stored positions, optionally filtered.
+
+        Parameters-
+        state: 'open', 'running', 'closed' or 'canceled'. (optional)
+        side: "b" or "s". (optional)
+        """
+
+        states = STATES if state is None else (state,)
+        sides = ('b', 's') if side is None else (side,)
+        with self._lock:
+            return [
+                position
+                for state in states
+                for side in sides
+                for position in self._index[state][side].values()
+            ]
+
+    def pids(self, state=None, side=None):
+        """
+        Returns the IDs of the stored positions, optionally filtered.
+
+        Parameters-
+        state: 'open', 'running', 'closed' or 'canceled'. (optional)
+        side: "b" or "s". (optional)
+        """
+
+        return [
+            position['pid'] for position in self.positions(state, side)
+        ]
+
+    def marginWithheld(self, side=None):
+        """
+        Calculates the margin withheld in the running positions.
+
+        Parameters-
+        side: "b" or "s". (optional)
+        """
+
+        return sum(
+            float(position['margin'])
+            for position in self.positions('running', side)
+        )
+
+    def profit(self, state, side=None):
+        """
+        Calculates the total profit/loss of the positions in a state.
+
+        Parameters-
+        state: 'open', 'running', 'closed' or 'canceled'.
+        side: "b" or "s". (optional)
+        """
+
+        return sum(
+            float(position['pl'])
+            for position in self.positions(state, side)
+        )
+
+    def realizedProfit(self):
+        """
+        Calculates the total profit/loss from closed positions.
+        """
+
+        return self.profit('closed')
+
+    def unrealizedProfit(self):
+        """
+        Calculates the total profit/loss from running positions.
+        """
+
+        return self.profit('running')
+
+    @staticmethod
+    def _inferState(position, previous=None):
+        if position.get('canceled'):
+            return 'canceled'
+        if position.get('closed'):
+            return 'closed'
+        if previous is not None:
+            return previous
+        if position.get('type') == 'm' or position.get('market_filled_ts'):
+            return 'running'
+        return 'open'
+
+    def _unindex(self, pid):
+        state = self._states.pop(pid, None)
+        position = self._positions.pop(pid, None)
+        if state is not None:
+            self._index[state][position['side']].pop(pid, None)
+            self.version += 1
+        return position
+
+    def update(self, position, state=None):
+        """
+        Merges a position into the book and returns the stored position.
+
+        Parameters-
+        position: position dict, must contain 'pid'.
+        state: state of the position, inferred when not given. (optional)
+        """
+
+        pid = position['pid']
+        with self._lock:
+            previousState = self._states.get(pid)
+            previous = self._unindex(pid)
+            if previous is not None:
+                position = {**previous, **position}
+            if state is None:
+                state = self._inferState(position, previousState)
+            self._positions[pid] = position
+            self._states[pid] = state
+            self._index[state][position['side']][pid] = position
+            self.version += 1
+        return position
+
+    def remove(self, pid):
+        """
+        Removes a position from the book.
+
+        Parameters-
+        pid: ID of the position.
+        """
+
+        with self._lock:
+            return self._unindex(pid)
+
+    def replace(self, state, positions):
+        """
+        Replaces every position in a state with a fresh list from the API.
+        Positions no longer listed are dropped.
+
+        Parameters-
+        state: 'open', 'running', 'closed' or 'canceled'.
+        positions: Array of positions.
+        """
+
+        with self._lock:
+            stale = set(self.pids(state))
+            for position in positions:
+                stale.discard(position['pid'])
+                self.update(position, state)
+            for pid in stale:
+                self._unindex(pid)
+
+    def apply(self, data, pid=None, state=None):
+        """
+        Updates the book from the response of a position call.
+
+        Parameters-
+        data: response of the call.
+        pid: ID of the position the call was made for. (optional)
+        state: state the call moved the position to. (optional)
+        """
+
+        if not isinstance(data, dict):
+            return
+        position = data.get('position', data)
+        if not isinstance(position, dict):
+            return
+        if 'pid' not in position:
+            if pid is None:
+                return
+            position = {**position, 'pid': pid}
+        if 'side' not in position and position['pid'] not in self:
+            return
+        self.update(position, state)
+
+    def closeRunning(self):
+        """
+        Marks every running position as closed.
+        """
+
+        with self._lock:
+            for position in self.positions('running'):
+                self.update({**position, 'closed': True}, 'closed')
@@ -1,42 +1,64 @@
+from . import Client
+from .PositionBook import positionList
 
-import requests
-import json
-from . import APIUrls
 
-
-def getPositions(token, type_=None):
+def getPositions(token, type_=None, models=False, start=None, end=None,
+                 limit=None):
     """
     Retrieves either opened, closed or all positions.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     type_: kind of positions ('open' or 'closed' or 'all') to fetch (optional)
+    models: True to return Position models instead of dicts (optional)
+    start: start of time interval, newest positions first (optional)
+    end: end of time interval (optional)
+    limit: maximum number of positions of each kind (optional)
 
     """
-    headers = {
-        'Accept': "application/json",
-        'Authorization': f"Bearer {token}",
-    }
-    if type_ is None:
-        positionData = requests.get(
-            APIUrls.lnapi+APIUrls.positionUrl,
-            headers=headers,
-        )
-        if positionData.status_code == 200:
-            return positionData.json()
-        else:
-            raise RuntimeError('Unable to get positions')
-    else:
-        params = {"type": type_}
-        positionData = requests.get(
-            APIUrls.lnapi+APIUrls.positionUrl,
-            params=params,
-            headers=headers,
-        )
-        if positionData.status_code == 200:
-            return positionData.json()
-        else:
-            raise RuntimeError(f'Unable to get positions: {positionData.text}')
+
+    return Client.getDefaultClient().getPositions(
+        type_, models=models, token=token, start=start, end=end, limit=limit,
+    )
+
+
+def iterPositions(token, type_='closed', pageSize=100, start=None, end=None,
+                  prefetch=True, models=False):
+    """
+    Yields the positions of one kind within a time interval, newest first,
+    fetching pages lazily.
+
+    Parameters-
+    token: Authentication token, or a Session returned by login.
+    type_: kind of positions ('open', 'running' or 'closed') to fetch
+    (optional)
+    pageSize: positions per request (optional)
+    start: start of time interval (optional)
+    end: end of time interval (optional)
+    prefetch: False to fetch each page only when needed (optional)
+    models: True to yield Position models instead of dicts (optional)
+    """
+
+    return Client.getDefaultClient().iterPositions(
+        type_, pageSize, start=start, end=end, prefetch=prefetch,
+        models=models, token=token,
+    )
+
+
+def newPositions(token, cursor, pageSize=100):
+    """
+    Returns the positions timed after those already seen by a cursor and
+    advances the cursor.
+
+    Parameters-
+    token: Authentication token, or a Session returned by login.
+    cursor: PositionBook.PositionCursor kept between calls.
+    pageSize: positions per request (optional)
+    """
+
+    return Client.getDefaultClient().newPositions(
+        cursor, pageSize, token=token,
+    )
 
 
 def createPosition(token, type_, side, leverage, margin=None, quantity=None,
@@ -49,7 +71,7 @@ def createPosition(token, type_, side, leverage, margin=None, quantity=None,
     you selected.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     type_: "l" for limit order, "m" for market order.
     side: "b" for buy, "s" for sell.
     leverage: Leverage of the order.
@@ -59,43 +81,40 @@ def createPosition(token, type_, side, leverage, margin=None, quantity=None,
     takeprofit: Profit taking level. (optional)
     price: limit price for limit order. (optional)
     """
-    if margin is None and quantity is None:
-        raise ValueError('Either margin or quantity must be provided')
-    if type_ == "l" and price is None:
-        raise ValueError('Limit Price must be pprovided for limit order')
-
-    payloadDict = {
-        'type': type_,
-        'side': side,
-        'leverage': leverage,
-        }
-
-    if type_ == "l":
-        payloadDict['price'] = price
-    if margin is None:
-        payloadDict['quantity'] = quantity
-    else:
-        payloadDict['margin'] = margin
-    if stoploss is not None:
-        payloadDict['stoploss'] = stoploss
-    if takeprofit is not None:
-        payloadDict['takeprofit'] = takeprofit
-
-    payload = json.dumps(payloadDict)
-    headers = {
-        'Content-Type': "application/json",
-        'Accept': "application/json",
-        'Authorization': f"Bearer {token}",
-    }
-    positionData = requests.post(
-        APIUrls.lnapi+APIUrls.positionUrl,
-        data=payload,
-        headers=headers,
+
+    return Client.getDefaultClient().createPosition(
+        type_,
+        side,
+        leverage,
+        margin=margin,
+        quantity=quantity,
+        stoploss=stoploss,
+        takeprofit=takeprofit,
+        price=price,
+        token=token,
+    )
+
+
+def createPositions(token, orders, workers=8):
+    """
+    Submit a batch of orders concurrently over the pooled connection.
+    Every order is validated before any of them is sent.
+
+    Parameters-
+    token: Authentication token, or a Session returned by login.
+    orders: List of dicts of createPosition arguments (without token), eg.
+    {'type_': "l", 'side': "b", 'leverage': 10, 'quantity': 1,
+    'price': 20000}
+    workers: Maximum number of simultaneous requests. (optional)
+
+    Returns-
+    Client.BulkResult keyed by order index, use ordered() for the responses
+    and errors in input order.
+    """
+
+    return Client.getDefaultClient().createPositions(
+        orders, workers=workers, token=token,
     )
-    if positionData.status_code == 200:
-        return positionData.json()
-    else:
-        raise RuntimeError(f'Unable to create position: {positionData.text}')
 
 
 def buy(token, leverage, margin=None, quantity=None, stoploss=None,
@@ -106,7 +125,7 @@ def buy(token, leverage, margin=None, quantity=None, stoploss=None,
     the other will be calculated with the one you selected.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     leverage: Leverage of the order.
     margin: margin or quantity must be given (optional)
     quantity: margin or quantity must be given (optional)
@@ -133,7 +152,7 @@ def sell(token, leverage, margin=None, quantity=None, stoploss=None,
     the other will be calculated with the one you selected.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     leverage: Leverage of the order.
     margin: margin or quantity must be given (optional)
     quantity: margin or quantity must be given (optional)
@@ -160,7 +179,7 @@ def limitBuy(token, leverage, price, margin=None, quantity=None, stoploss=None,
     the other will be calculated with the one you selected.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     leverage: Leverage of the order.
     price: Limit price of order.
     margin: margin or quantity must be given (optional)
@@ -189,7 +208,7 @@ def limitSell(token, leverage, price, margin=None, quantity=None,
     the other will be calculated with the one you selected.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     leverage: Leverage of the order.
     price: Limit price of order.
     margin: margin or quantity must be given (optional)
@@ -215,34 +234,15 @@ def updatePosition(token, pid, type_, value):
      Modifies stoploss or takeprofit parameters of an existing position.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     pid: ID of the position.
     type: "takeprofit" or "stoploss".
     value: Price level to set.
     """
 
-    payload = json.dumps({
-        'pid': pid,
-        'type': type_,
-        'value': value,
-        })
-    headers = {
-        'Content-Type': "application/json",
-        'Accept': "application/json",
-        'Authorization': f"Bearer {token}",
-    }
-    positionData = requests.put(
-        APIUrls.lnapi+APIUrls.positionUrl,
-        data=payload,
-        headers=headers,
+    return Client.getDefaultClient().updatePosition(
+        pid, type_, value, token=token,
     )
-    if positionData.status_code == 200:
-        return positionData.json()
-    else:
-        raise RuntimeError(
-            f'Unable to update position {pid},\n'
-            f'reason: {positionData.text}'
-        )
 
 
 def closePosition(token, pid):
@@ -252,90 +252,71 @@ def closePosition(token, pid):
     depending on the side of the position.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     pid: ID of the position.
     """
 
-    params = {
-        "pid": pid,
-    }
-    headers = {
-        'Accept': "application/json",
-        'Authorization': f"Bearer {token}",
-    }
-    positionData = requests.delete(
-        APIUrls.lnapi+APIUrls.positionUrl,
-        params=params,
-        headers=headers,
+    return Client.getDefaultClient().closePosition(pid, token=token)
+
+
+def closePositions(token, pids, workers=8):
+    """
+    Close many positions concurrently.
+    A failure to close one position does not stop the others.
+
+    Parameters-
+    token: Authentication token, or a Session returned by login.
+    pids: IDs of the positions.
+    workers: Maximum number of simultaneous requests. (optional)
+
+    Returns-
+    Client.BulkResult with per pid responses, errors and summed pl.
+    """
+
+    return Client.getDefaultClient().closePositions(
+        pids, workers=workers, token=token,
     )
-    if positionData.status_code == 200:
-        return positionData.json()
-    else:
-        raise RuntimeError(
-            f'Unable to close position {pid},\n'
-            f'reason: {positionData.text}'
-        )
 
 
 def isOpen(token, pid):
     """
-    Checks if a position is open.
+    Checks if a position is open, from the default client's PositionBook
+    when one is attached and token is the default client's own.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     pid: ID of the position.
     """
 
-    positionData = getPositions(token, "running")
-    for position in positionData:
-        if (position['pid'] == pid):
-            return True
-
-    return False
+    return Client.getDefaultClient().isOpen(pid, token=token)
 
 
-def closeAllLongs(token):
+def closeAllLongs(token, workers=1):
     """
     Close all positions on long side.
+    Every position is attempted; if some could not be closed,
+    Client.BulkError carrying the partial result is raised afterwards.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
+    workers: Number of positions closed simultaneously. (optional)
     """
 
-    positionData = getPositions(token, "running")
-    pl = 0.0
-    for position in positionData:
-        if (
-                position['side'] == "b" and
-                not position['closed'] and
-                not position['canceled']
-        ):
-            closeData = closePosition(token, position['pid'])
-            pl += float(closeData['pl'])
+    return Client.getDefaultClient().closeAllLongs(token, workers=workers)
 
-    return pl
 
-
-def closeAllShorts(token):
+def closeAllShorts(token, workers=1):
     """
     Close all positions on short side.
+    Every position is attempted; if some could not be closed,
+    Client.BulkError carrying the partial result is raised afterwards.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
+    workers: Number of positions closed simultaneously. (optional)
     """
 
-    positionData = getPositions(token, "running")
-    pl = 0.0
-    for position in positionData:
-        if (
-                position['side'] == "s" and
-                not position['closed'] and
-                not position['canceled']
-        ):
-            closeData = closePosition(token, position['pid'])
-            pl += float(closeData['pl'])
-
-    return pl
+    return Client.getDefaultClient().closeAllShorts(token, workers=workers)
 
 
 def closeAll(token):
@@ -343,26 +324,10 @@ def closeAll(token):
     Close all positions.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     """
 
-    headers = {
-        'Accept': "application/json",
-        'Authorization': f"Bearer {token}",
-    }
-    positionData = requests.delete(
-        APIUrls.lnapi+APIUrls.closeAllUrl,
-        headers=headers,
-    )
-    if positionData.status_code == 200:
-        return positionData.json()['pl']
-    else:
-        raise RuntimeError(
-            f'Unable to close all positions.\n'
-            f'reason: {positionData.text}'
-        )
-
-    return pl
+    return Client.getDefaultClient().closeAll(token)
 
 
 def marginWithheld(openPositions):
@@ -395,15 +360,22 @@ def calculateProfit(positions):
     return totalProfit
 
 
-def realizedProfit(token):
+def realizedProfit(token, start=None, end=None):
     """
     Calculates the total profit/loss from closed positions.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
+    start: start of the closing time interval (optional)
+    end: end of the closing time interval (optional)
     """
 
-    closedPositions = getPositions(token, "closed")
+    if start is None and end is None:
+        closedPositions = positionList(
+            getPositions(token, "closed"), "closed",
+        )
+    else:
+        closedPositions = iterPositions(token, "closed", start=start, end=end)
     return calculateProfit(closedPositions)
 
 
@@ -412,10 +384,10 @@ def unrealizedProfit(token):
     Calculates the total profit/loss from open positions.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     """
 
-    openPositions = getPositions(token, "running")
+    openPositions = positionList(getPositions(token, "running"), "running")
     return calculateProfit(openPositions)
 
 
@@ -424,32 +396,12 @@ def addMargin(token, pid, amount):
     Adds margin to a running position.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     pid: ID of the position.
     amount: amount to add in sats.
     """
 
-    headers = {
-        'Content-Type': "application/json",
-        'Accept': "application/json",
-        'Authorization': f"Bearer {token}",
-    }
-    payload = json.dumps({
-        'amount': amount,
-        'pid': pid,
-        })
-    positionData = requests.post(
-        APIUrls.lnapi+APIUrls.addMarginUrl,
-        data=payload,
-        headers=headers,
-    )
-    if positionData.status_code == 200:
-        return positionData.json()
-    else:
-        raise RuntimeError(
-            f'Unable to add margin to position {pid},\n'
-            f'reason: {positionData.text}'
-        )
+    return Client.getDefaultClient().addMargin(pid, amount, token=token)
 
 
 def cashin(token, pid, amount):
@@ -457,32 +409,12 @@ def cashin(token, pid, amount):
     Retrieves part of a running position's profit.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     pid: ID of the position.
     amount: amount to retrieve in sats.
     """
 
-    headers = {
-        'Content-Type': "application/json",
-        'Accept': "application/json",
-        'Authorization': f'Bearer {token}',
-    }
-    payload = json.dumps({
-        'amount': amount,
-        'pid': pid,
-        })
-    positionData = requests.post(
-        APIUrls.lnapi+APIUrls.cashinUrl,
-        data=payload,
-        headers=headers,
-    )
-    if positionData.status_code == 200:
-        return positionData.json()
-    else:
-        raise RuntimeError(
-            f'Unable to cash-in position {pid},\n'
-            f'reason: {positionData.text}'
-        )
+    return Client.getDefaultClient().cashin(pid, amount, token=token)
 
 
 def cancelPosition(token, pid):
@@ -491,27 +423,8 @@ def cancelPosition(token, pid):
     Only works on positions that are not currently filled.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     pid: ID of the position.
     """
 
-    headers = {
-        'Content-Type': "application/json",
-        'Accept': "application/json",
-        'Authorization': f"Bearer {token}",
-    }
-    payload = json.dumps({
-        'pid': pid,
-        })
-    positionData = requests.post(
-        APIUrls.lnapi+APIUrls.cancelUrl,
-        data=payload,
-        headers=headers,
-    )
-    if positionData.status_code == 200:
-        return positionData.json()
-    else:
-        raise RuntimeError(
-            f'Unable to cancel position {pid},\n'
-            f'reason: {positionData.text}'
-        )
+    return Client.getDefaultClient().cancelPosition(pid, token=token)
@@ -0,0 +1,407 @@
+import asyncio
+import queue
+import threading
+from . import APIUrls
+from . import Client
+
+SERIES = {
+    'index': APIUrls.indexUrl,
+    'bidOffer': APIUrls.bidOfferUrl,
+}
+
+_CLOSED = object()
+
+
+class BaseFeed:
+    """
+    Polling, de-duplication and interval adaptation shared by PriceFeed and
+    AsyncPriceFeed.
+
+    Parameters-
+    client: Client (or AsyncClient) used for the upstream requests.
+    series: names of the polled series, 'index' and/or 'bidOffer'.
+    minInterval: shortest delay between polls in seconds.
+    maxInterval: longest delay between polls in seconds.
+    maxQueue: ticks buffered per subscriber, oldest are dropped first.
+    limit: most entries fetched per poll.
+    """
+
+    def __init__(self, client, series, minInterval, maxInterval, maxQueue,
+                 limit):
+        for name in series:
+            if name not in SERIES:
+                raise ValueError(f'Unknown series {name}')
+        self.client = client
+        self.series = tuple(series)
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.maxQueue = maxQueue
+        self.limit = limit
+        self.interval = minInterval
+        self.lastError = None
+        self._etags = {}
+        self._last = {}
+        self.latest = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def _query(self, name):
+        """
+        Returns (params, etag) of the next poll of a series. Only the
+        entries from the last seen time are requested, so a poll transfers
+        the new ticks plus the last one, which is then dropped. The ETag is
+        only sent while that window is unchanged.
+        """
+
+        last = self._last.get(name)
+        params = {'limit': self.limit}
+        if isinstance(last, (int, float)):
+            params['from'] = last
+        since, etag = self._etags.get(name, (None, None))
+        return params, etag if since == params.get('from') else None
+
+    def _received(self, name, params, etag, data):
+        self._etags[name] = (params.get('from'), etag)
+        return [] if data is None else self._newTicks(name, data)
+
+    def _newTicks(self, name, data):
+        entries = data if isinstance(data, list) else [data]
+        last = self._last.get(name)
+        ticks = []
+        if entries and all('time' in entry for entry in entries):
+            for entry in sorted(entries, key=lambda entry: entry['time']):
+                if last is None or entry['time'] > last:
+                    ticks.append((name, entry))
+                    last = entry['time']
+        else:
+            for entry in entries:
+                if entry != last:
+                    ticks.append((name, entry))
+                    last = entry
+        self._last[name] = last
+        return ticks
+
+    def _adapt(self, changed):
+        if changed:
+            self.interval = max(self.minInterval, self.interval / 2)
+        else:
+            self.interval = min(self.maxInterval, self.interval * 1.5)
+
+    def _publish(self, ticks):
+        with self._lock:
+            for tick in ticks:
+                self.latest[tick[0]] = tick
+                for subscription in self._subscribers:
+                    if tick[0] in subscription.series:
+                        subscription._put(tick)
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscribers.append(subscription)
+            for name, tick in self.latest.items():
+                if name in subscription.series:
+                    subscription._put(tick)
+
+
+class Subscription:
+    """
+    Stream of (series, entry) ticks of a PriceFeed.
+    Iterate over it, or call get, until it is closed.
+    """
+
+    def __init__(self, feed, series):
+        self.feed = feed
+        self.series = series
+        self.queue = queue.Queue(feed.maxQueue)
+
+    def _put(self, tick):
+        while True:
+            try:
+                self.queue.put_nowait(tick)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """
+        Returns the next tick, or None once closed.
+        Raises queue.Empty after timeout seconds without a tick.
+
+        Parameters-
+        timeout: seconds to wait. (optional)
+        """
+
+        tick = self.queue.get(timeout=timeout)
+        if tick is _CLOSED:
+            self.queue.put_nowait(_CLOSED)
+            return None
+        return tick
+
+    def __iter__(self):
+        while True:
+            tick = self.get()
+            if tick is None:
+                return
+            yield tick
+
+    def close(self):
+        """
+        Stops the subscription.
+        """
+
+        self.feed.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PriceFeed(BaseFeed):
+    """
+    Index and bid-offer ticks polled by one background thread and fanned
+    out to any number of subscribers.
+
+    Polls use conditional requests for the entries from the last seen
+    time only, at most limit of them, unchanged entries are dropped, and
+    the delay between polls halves when new ticks arrive and grows by half
+    when nothing changed.
+
+    Parameters-
+    client: Client used for the requests, the default client if None.
+    (optional)
+    series: polled series among 'index' and 'bidOffer'. (optional)
+    minInterval: shortest delay between polls in seconds. (optional)
+    maxInterval: longest delay between polls in seconds. (optional)
+    maxQueue: ticks buffered per subscriber. (optional)
+    limit: most entries fetched per poll, the newest ones when more are
+    missing. (optional)
+    """
+
+    def __init__(self, client=None, series=('index', 'bidOffer'),
+                 minInterval=0.5, maxInterval=5.0, maxQueue=1000,
+                 limit=100):
+        if client is None:
+            client = Client.getDefaultClient()
+        super().__init__(client, series, minInterval, maxInterval, maxQueue,
+                         limit)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, series=None):
+        """
+        Returns a new Subscription, starting the feed if needed.
+        The latest tick of each series is delivered first.
+
+        Parameters-
+        series: series to receive, all polled series by default. (optional)
+        """
+
+        subscription = Subscription(
+            self, self.series if series is None else tuple(series),
+        )
+        self._add(subscription)
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True,
+                )
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Closes a subscription, stopping the feed after the last one.
+
+        Parameters-
+        subscription: Subscription returned by subscribe.
+        """
+
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            last = not self._subscribers
+        subscription._put(_CLOSED)
+        if last:
+            self.stop()
+
+    def stop(self):
+        """
+        Stops polling and closes every subscription.
+        """
+
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        for subscription in subscribers:
+            subscription._put(_CLOSED)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def poll(self):
+        """
+        Polls every series once and publishes the new ticks.
+        """
+
+        ticks = []
+        for name in self.series:
+            params, etag = self._query(name)
+            etag, data = self.client._poll(SERIES[name], etag, params)
+            ticks += self._received(name, params, etag, data)
+        self._publish(ticks)
+        return ticks
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._adapt(bool(self.poll()))
+                self.lastError = None
+            except Exception as error:
+                self.lastError = error
+                self.interval = self.maxInterval
+            self._stop.wait(self.interval)
+
+
+class AsyncSubscription:
+    """
+    Async stream of (series, entry) ticks of an AsyncPriceFeed.
+    Use it with `async for` until it is closed.
+    """
+
+    def __init__(self, feed, series):
+        self.feed = feed
+        self.series = series
+        self.queue = asyncio.Queue(feed.maxQueue)
+
+    def _put(self, tick):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(tick)
+
+    async def get(self):
+        """
+        Returns the next tick, or None once closed.
+        """
+
+        tick = await self.queue.get()
+        if tick is _CLOSED:
+            self.queue.put_nowait(_CLOSED)
+            return None
+        return tick
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        tick = await self.get()
+        if tick is None:
+            raise StopAsyncIteration
+        return tick
+
+    async def close(self):
+        """
+        Stops the subscription.
+        """
+
+        await self.feed.unsubscribe(self)
+
+
+class AsyncPriceFeed(BaseFeed):
+    """
+    asyncio version of PriceFeed, polling from one task of the running
+    event loop.
+
+    Parameters-
+    client: AsyncClient used for the requests.
+    series: polled series among 'index' and 'bidOffer'. (optional)
+    minInterval: shortest delay between polls in seconds. (optional)
+    maxInterval: longest delay between polls in seconds. (optional)
+    maxQueue: ticks buffered per subscriber. (optional)
+    limit: most entries fetched per poll, the newest ones when more are
+    missing. (optional)
+    """
+
+    def __init__(self, client, series=('index', 'bidOffer'),
+                 minInterval=0.5, maxInterval=5.0, maxQueue=1000,
+                 limit=100):
+        super().__init__(client, series, minInterval, maxInterval, maxQueue,
+                         limit)
+        self._task = None
+
+    def subscribe(self, series=None):
+        """
+        Returns a new AsyncSubscription, starting the feed if needed.
+        The latest tick of each series is delivered first.
+
+        Parameters-
+        series: series to receive, all polled series by default. (optional)
+        """
+
+        subscription = AsyncSubscription(
+            self, self.series if series is None else tuple(series),
+        )
+        self._add(subscription)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        """
+        Closes a subscription, stopping the feed after the last one.
+
+        Parameters-
+        subscription: AsyncSubscription returned by subscribe.
+        """
+
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+        subscription._put(_CLOSED)
+        if not self._subscribers:
+            await self.stop()
+
+    async def stop(self):
+        """
+        Stops polling and closes every subscription.
+        """
+
+        subscribers, self._subscribers = self._subscribers, []
+        task, self._task = self._task, None
+        for subscription in subscribers:
+            subscription._put(_CLOSED)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def poll(self):
+        """
+        Polls every series once and publishes the new ticks.
+        """
+
+        ticks = []
+        for name in self.series:
+            params, etag = self._query(name)
+            etag, data = await self.client._poll(SERIES[name], etag, params)
+            ticks += self._received(name, params, etag, data)
+        self._publish(ticks)
+        return ticks
+
+    async def _run(self):
+        while True:
+            try:
+                self._adapt(bool(await self.poll()))
+                self.lastError = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                self.lastError = error
+                self.interval = self.maxInterval
+            await asyncio.sleep(self.interval)
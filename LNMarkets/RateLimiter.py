@@ -0,0 +1,155 @@
+import threading
+import time
+from . import APIUrls
+
+CRITICAL = 0
+ORDER = 1
+READ = 2
+HISTORY = 3
+
+_PRIORITIES = {
+    ('DELETE', APIUrls.positionUrl): CRITICAL,
+    ('DELETE', APIUrls.closeAllUrl): CRITICAL,
+    ('POST', APIUrls.cancelUrl): CRITICAL,
+    ('POST', APIUrls.positionUrl): ORDER,
+    ('PUT', APIUrls.positionUrl): ORDER,
+    ('POST', APIUrls.addMarginUrl): ORDER,
+    ('POST', APIUrls.cashinUrl): ORDER,
+    ('GET', APIUrls.indexUrl): HISTORY,
+    ('GET', APIUrls.bidOfferUrl): HISTORY,
+    ('GET', APIUrls.userHistoryUrl): HISTORY,
+}
+
+
+def priorityOf(method, url):
+    """
+    Returns the lane of a request: CRITICAL for closes and cancels, ORDER
+    for position changes, HISTORY for history and transactions, READ for
+    everything else.
+
+    Parameters-
+    method: HTTP method.
+    url: endpoint url relative to the API root.
+    """
+
+    return _PRIORITIES.get((method, url), READ)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every request of the clients using it.
+
+    A request may only take a token once every waiting request of a more
+    urgent lane could be served first, so closes and cancels are never
+    queued behind reads or history fetches.
+
+    Parameters-
+    rate: requests per second.
+    burst: bucket size, the rate by default. (optional)
+    """
+
+    def __init__(self, rate, burst=None):
+        if rate is None or rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._pausedUntil = 0.0
+        self._waiting = [0, 0, 0, 0]
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.burst, self.tokens + (now - self._updated) * self.rate,
+        )
+        self._updated = now
+
+    def _take(self, priority, waiting):
+        """
+        Takes a token and returns 0, or returns the seconds to wait.
+        """
+
+        with self._lock:
+            if not waiting:
+                self._waiting[priority] += 1
+            now = time.monotonic()
+            if now < self._pausedUntil:
+                return self._pausedUntil - now
+            self._refill(now)
+            ahead = sum(self._waiting[:priority])
+            if self.tokens >= ahead + 1:
+                self.tokens -= 1
+                self._waiting[priority] -= 1
+                return 0
+            return (ahead + 1 - self.tokens) / self.rate
+
+    def _cancel(self, priority):
+        with self._lock:
+            self._waiting[priority] -= 1
+
+    def acquire(self, priority=READ):
+        """
+        Blocks until a request of the given lane may be sent.
+
+        Parameters-
+        priority: CRITICAL, ORDER, READ or HISTORY. (optional)
+        """
+
+        wait = self._take(priority, False)
+        try:
+            while wait:
+                time.sleep(wait)
+                wait = self._take(priority, True)
+        except BaseException:
+            self._cancel(priority)
+            raise
+
+    async def acquireAsync(self, priority=READ):
+        """
+        Waits without blocking the event loop until a request of the given
+        lane may be sent.
+
+        Parameters-
+        priority: CRITICAL, ORDER, READ or HISTORY. (optional)
+        """
+
+        import asyncio
+        wait = self._take(priority, False)
+        try:
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self._take(priority, True)
+        except BaseException:
+            self._cancel(priority)
+            raise
+
+    def pause(self, seconds):
+        """
+        Holds every lane for some seconds, eg. after a 429 response.
+
+        Parameters-
+        seconds: pause duration.
+        """
+
+        with self._lock:
+            self._pausedUntil = max(
+                self._pausedUntil, time.monotonic() + seconds,
+            )
+            self._updated = self._pausedUntil
+            self.tokens = 0
+
+
+def retryAfter(headers, default=1.0):
+    """
+    Seconds to wait according to a Retry-After header.
+
+    Parameters-
+    headers: response headers.
+    default: seconds when the header is missing or a date. (optional)
+    """
+
+    try:
+        return max(float(headers.get('Retry-After')), 0.0)
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+from . import APIUrls
+from .Errors import CircuitOpenError
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_SAFE_POSTS = (
+    APIUrls.cancelUrl,
+)
+
+
+class RetryPolicy:
+    """
+    Timeouts, retries and circuit breaker applied to every request of a
+    client.
+
+    Requests are retried with jittered exponential backoff when they
+    failed to connect, were rejected with 429, or are idempotent (GET,
+    PUT, DELETE and cancel) and failed with a network error or a status in
+    statuses. Position creation, margin, cash-in, deposit and withdraw are
+    never resent once they may have reached the server.
+
+    After failureThreshold consecutive failures the breaker opens and
+    requests fail fast with CircuitOpenError for resetTimeout seconds,
+    after which a single trial request is let through. Other requests keep
+    failing fast until it succeeds, which closes the breaker, or fails,
+    which opens it again. A trial that never reports back is replaced by
+    another after resetTimeout seconds.
+
+    Parameters-
+    retries: retries after the first attempt. (optional)
+    backoff: base delay in seconds. (optional)
+    maxBackoff: longest delay in seconds. (optional)
+    connectTimeout: seconds to establish a connection. (optional)
+    readTimeout: seconds to wait for the server between bytes. (optional)
+    statuses: response statuses considered transient. (optional)
+    failureThreshold: consecutive failures opening the breaker, None to
+    disable it. (optional)
+    resetTimeout: seconds the breaker stays open. (optional)
+    """
+
+    def __init__(self, retries=2, backoff=0.1, maxBackoff=5.0,
+                 connectTimeout=5.0, readTimeout=30.0,
+                 statuses=RETRY_STATUSES, failureThreshold=None,
+                 resetTimeout=30.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.connectTimeout = connectTimeout
+        self.readTimeout = readTimeout
+        self.statuses = frozenset(statuses)
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+        self.failures = 0
+        self._openedAt = None
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        return (self.connectTimeout, self.readTimeout)
+
+    @staticmethod
+    def idempotent(method, url):
+        """
+        Checks if sending a request twice has the same effect as once.
+
+        Parameters-
+        method: HTTP method.
+        url: endpoint url relative to the API root.
+        """
+
+        if method == 'POST':
+            return url in _SAFE_POSTS
+        return True
+
+    def shouldRetry(self, method, url, attempt, status=None, sent=True):
+        """
+        Decides if a failed attempt is retried.
+
+        Parameters-
+        method: HTTP method.
+        url: endpoint url relative to the API root.
+        attempt: number of the failed attempt, starting at 0.
+        status: response status, None for a network error. (optional)
+        sent: False if the request surely never reached the server.
+        (optional)
+        """
+
+        if attempt >= self.retries:
+            return False
+        if status == 429 or not sent:
+            return True
+        if status is not None and status not in self.statuses:
+            return False
+        return self.idempotent(method, url)
+
+    def delay(self, attempt, minimum=0.0):
+        """
+        Jittered exponential backoff before the next attempt.
+
+        Parameters-
+        attempt: number of the failed attempt, starting at 0.
+        minimum: lower bound, eg. a Retry-After delay. (optional)
+        """
+
+        ceiling = min(self.maxBackoff, self.backoff * 2 ** attempt)
+        return max(minimum, random.uniform(0, ceiling))
+
+    def check(self, url):
+        """
+        Raises CircuitOpenError while the breaker is open, or half-open
+        with the trial request still in flight.
+
+        Parameters-
+        url: endpoint url of the request about to be sent.
+        """
+
+        if self.failureThreshold is None:
+            return
+        with self._lock:
+            if self._openedAt is None:
+                return
+            now = time.monotonic()
+            if now - self._openedAt >= self.resetTimeout:
+                self._openedAt = now
+                self.failures = self.failureThreshold - 1
+                return
+        raise CircuitOpenError(
+            f'Circuit open after {self.failures} failures, '
+            f'not sending {url}',
+            url=url,
+        )
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._openedAt = None
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if (
+                    self.failureThreshold is not None and
+                    self.failures >= self.failureThreshold
+            ):
+                self._openedAt = time.monotonic()
+
+    def record(self, status):
+        """
+        Updates the breaker from a response status.
+
+        Parameters-
+        status: response status.
+        """
+
+        if status >= 500:
+            self.failure()
+        else:
+            self.success()
@@ -0,0 +1,95 @@
+import json
+import threading
+
+BACKENDS = ('orjson', 'ujson', 'json')
+
+
+class Serializer:
+    """
+    JSON encoding and decoding of the request and response bodies.
+
+    Payloads made only of scalar values, such as orders or pid payloads
+    repeated by a bot, are encoded once and served from a bounded cache
+    afterwards.
+
+    Parameters-
+    backend: 'orjson', 'ujson' or 'json', the fastest installed one by
+    default. (optional)
+    cacheSize: encoded payloads kept, 0 to disable the cache. (optional)
+    """
+
+    def __init__(self, backend=None, cacheSize=256):
+        if backend is None:
+            backend = available()[0]
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown JSON backend {backend}')
+        self.backend = backend
+        if backend == 'orjson':
+            import orjson
+            self._dumps = orjson.dumps
+            self._loads = orjson.loads
+        elif backend == 'ujson':
+            import ujson
+            self._dumps = ujson.dumps
+            self._loads = ujson.loads
+        else:
+            encoder = json.JSONEncoder(separators=(',', ':'))
+            self._dumps = encoder.encode
+            self._loads = json.loads
+        self.cacheSize = cacheSize
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def dumps(self, payload):
+        """
+        Encodes a payload to a JSON str or bytes.
+
+        Parameters-
+        payload: JSON serializable object.
+        """
+
+        if not self.cacheSize or type(payload) is not dict:
+            return self._dumps(payload)
+        try:
+            key = tuple(
+                (name, type(value), value)
+                for name, value in payload.items()
+            )
+            encoded = self._cache.get(key)
+        except TypeError:
+            return self._dumps(payload)
+        if encoded is None:
+            encoded = self._dumps(payload)
+            with self._lock:
+                if len(self._cache) >= self.cacheSize:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[key] = encoded
+        return encoded
+
+    def loads(self, data):
+        """
+        Decodes a JSON str or bytes.
+
+        Parameters-
+        data: JSON document.
+        """
+
+        return self._loads(data)
+
+    def __repr__(self):
+        return f'Serializer({self.backend!r})'
+
+
+def available():
+    """
+    Returns the installed backends, fastest first.
+    """
+
+    backends = []
+    for backend in BACKENDS[:-1]:
+        try:
+            __import__(backend)
+        except ImportError:
+            continue
+        backends.append(backend)
+    return backends + ['json']
@@ -1,6 +1,4 @@
-
-import requests
-from . import APIUrls
+from . import Client
 
 
 def getState():
@@ -8,25 +6,7 @@ def getState():
     Shows informations about api.
     """
 
-    headers = {
-        'accept': 'application/json',
-    }
-    stateData = requests.get(
-        APIUrls.lnapi+APIUrls.stateUrl,
-        headers=headers,
-    )
-
-    if stateData.status_code == 200:
-        stateData = stateData.json()
-        if stateData['state']['newPosition']:
-            return stateData
-        else:
-            raise ValueError('New Positions currently not allowed')
-    else:
-        raise RuntimeError(
-            'Unable to fetch State Information:\n'
-            f'{stateData.text}'
-        )
+    return Client.getDefaultClient().getState()
 
 
 def getNodeInformation():
@@ -34,18 +14,31 @@ def getNodeInformation():
     Shows informations about the lightning node.
     """
 
-    headers = {
-        'accept': 'application/json',
-    }
-    nodeData = requests.get(
-        APIUrls.lnapi+APIUrls.nodeUrl,
-        headers=headers,
-    )
-
-    if nodeData.status_code == 200:
-        return nodeData.json()
-    else:
-        raise RuntimeError(
-            'Unable to fetch Node Information:\n'
-            f'{nodeData.text}'
-        )
+    return Client.getDefaultClient().getNodeInformation()
+
+
+def enableCache(ttls=None, maxStale=None):
+    """
+    Caches getState and getNodeInformation responses of the module level
+    functions. Stale responses are served while being refreshed in the
+    background.
+
+    Parameters-
+    ttls: Dict of function name to ttl in seconds, eg.
+    {'getState': 1.0, 'getNodeInformation': 300.0} (optional)
+    maxStale: Dict of function name to seconds a stale response may be
+    served while revalidating, the ttl by default. (optional)
+    """
+
+    return Client.getDefaultClient().enableCache(ttls, maxStale)
+
+
+def invalidateCache(key=None):
+    """
+    Drops the cached response of one function, or all of them.
+
+    Parameters-
+    key: function name, eg. 'getState'. (optional)
+    """
+
+    Client.getDefaultClient().invalidateCache(key)
@@ -1,7 +1,4 @@
-
-import requests
-import json
-from . import APIUrls
+from . import Client
 
 
 def userInformation(token):
@@ -9,23 +6,10 @@ def userInformation(token):
     Get the user account Information.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     """
-    headers = {
-        'accept': "application/json",
-        'authorization': f"Bearer {token}",
-    }
-    userInfo = requests.get(
-        APIUrls.lnapi+APIUrls.userUrl,
-        headers=headers,
-    )
-    if userInfo.status_code == 200:
-        return userInfo.json()
-    else:
-        raise RuntimeError(
-            'Unable to get user information:\n'
-            f'{userInfo.text}'
-        )
+
+    return Client.getDefaultClient().userInformation(token)
 
 
 def getBalance(token):
@@ -33,10 +17,10 @@ def getBalance(token):
     Get the user account balance.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     """
 
-    return userInformation(token)['balance']
+    return Client.getDefaultClient().getBalance(token)
 
 
 def updateUser(token, leaderboard=None, showUsername=None, username=None):
@@ -44,37 +28,18 @@ def updateUser(token, leaderboard=None, showUsername=None, username=None):
     Update user account information.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     leaderboard: True to show user's profit on leaderboard.
     showUsername: True to show the username on LN Marktes public data.
     username: username to display.
     """
 
-    headers = {
-        'content-type': "application/json",
-        'accept': "application/json",
-        'authorization': f"Bearer {token}",
-    }
-    payloadDict = dict()
-    if showUsername is not None:
-        payloadDict['show_username'] = showUsername
-    if leaderboard is not None:
-        payloadDict['show_leaderboard'] = leaderboard
-    if username is not None:
-        payloadDict['username'] = username
-    payload = json.dumps(payloadDict)
-    userInfo = requests.put(
-        APIUrls.lnapi+APIUrls.userUrl,
-        data=payload,
-        headers=headers,
+    return Client.getDefaultClient().updateUser(
+        token,
+        leaderboard=leaderboard,
+        showUsername=showUsername,
+        username=username,
     )
-    if userInfo.status_code == 200:
-        return userInfo.json()
-    else:
-        raise RuntimeError(
-            'Unable to update user information:\n'
-            f'{userInfo.text}'
-            )
 
 
 def updatePassword(token, previousPassword, newPassword):
@@ -82,126 +47,97 @@ def updatePassword(token, previousPassword, newPassword):
     Update user account information.
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     previousPassword: Previous Password.
     newPassword: New Password.
     """
 
-    headers = {
-        'content-type': "application/json",
-        'authorization': f"Bearer {token}",
-    }
-    payload = json.dumps({
-        'previousPassword': previousPassword,
-        'newPassword': newPassword,
-        })
-
-    updateInfo = requests.put(
-        APIUrls.lnapi+APIUrls.updateUrl,
-        data=payload,
-        headers=headers,
+    return Client.getDefaultClient().updatePassword(
+        previousPassword, newPassword, token=token,
     )
-    return updateInfo.ok
 
 
 def getTransactions(token, type, nbitem=-1, index=1, getLength=False,
-                    start=None, end=None):
+                    start=None, end=None, models=False):
     """
     Retrieves all withdraw or deposit you did with LN Markets or just one page
 
     Parameters-
-    token: Authentication token.
+    token: Authentication token, or a Session returned by login.
     type: what kind of transactions ('withdraw' or 'deposit') to fetch
     nbitem: maximum length of returned table (optional)
     index: page offset (optional)
     getLength: Boolean. True if need length of date splice (optional)
     start: start of time interval (optional)
     end: end of time interval (optional)
+    models: True to return Transaction models instead of dicts (optional)
+    """
+
+    return Client.getDefaultClient().getTransactions(
+        type,
+        nbitem=nbitem,
+        index=index,
+        getLength=getLength,
+        start=start,
+        end=end,
+        models=models,
+        token=token,
+    )
+
+
+def iterTransactions(token, type, pageSize=100, start=None, end=None,
+                     prefetch=True, models=False):
     """
+    Yields withdraw or deposit transactions one at a time, walking the
+    pages lazily and fetching the next page in the background, so long
+    histories are processed in constant memory.
 
-    headers = {
-        'accept': "application/json",
-        'authorization': "Bearer {token}",
-    }
-    params = {
-        "type": type,
-        "getLength": str(getLength).lower()
-    }
-    if nbitem != -1:
-        params['nbitem'] = nbitem
-        params['index'] = index
-    if start is not None:
-        params['start'] = start
-    if end is not None:
-        params['end'] = end
-
-    transactions = requests.get(
-        APIUrls.lnapi+APIUrls.userHistoryUrl,
-        headers=headers,
-        params=params,
+    Parameters-
+    token: Authentication token, or a Session returned by login.
+    type: what kind of transactions ('withdraw' or 'deposit') to fetch
+    pageSize: transactions per request (optional)
+    start: start of time interval (optional)
+    end: end of time interval (optional)
+    prefetch: False to fetch each page only when needed (optional)
+    models: True to yield Transaction models instead of dicts (optional)
+    """
+
+    return Client.getDefaultClient().iterTransactions(
+        type,
+        pageSize=pageSize,
+        start=start,
+        end=end,
+        prefetch=prefetch,
+        models=models,
+        token=token,
     )
-    if transactions.status_code == 200:
-        return transactions.json()
-    else:
-        raise RuntimeError(
-            'Unable to get user transactions:\n'
-            f'{transactions.text}'
-        )
 
 
-def getTokens():
+def getTokens(session=None):
     """
     Retrieves the list of active JSON Web Token user currently holds.
-    """
 
-    headers = {
-        'accept': "application/json",
-    }
+    Parameters-
+    session: Session returned by login. (optional)
+    """
 
-    tokens = requests.get(
-        APIUrls.lnapi+APIUrls.tokenUrl,
-        headers=headers,
-    )
-    if tokens.status_code == 200:
-        return tokens.json()
-    else:
-        raise RuntimeError(
-            'Unable to get user tokens:\n'
-            f'{tokens.text}'
-        )
+    return Client.getDefaultClient().getTokens(session)
 
 
-def revokeToken(token=None):
+def revokeToken(token=None, session=None):
     """
     identifies and revoke usage of a given JWT.
 
     Parameters-
     token: Identifier of Token to be removed (optional)
+    session: Session returned by login. (optional)
     """
 
-    if token is None:
-        tokenInfo = requests.delete(
-            APIUrls.lnapi + APIUrls.tokenUrl,
-        )
-    else:
-        params = {
-            "jti": token,
-        }
-        tokenInfo = requests.delete(
-            APIUrls.lnapi+APIUrls.tokenUrl,
-            params=params,
-        )
-    if tokenInfo.status_code == 200:
-        return True
-    else:
-        raise RuntimeError(
-            'Unable to revoke user tokens:\n'
-            f'{tokenInfo.text}'
-        )
+    return Client.getDefaultClient().revokeToken(token, session=session)
 
 
 def generateToken(expiry, deposit=False, withdraw=False, positions=False,
-                  user=False):
+                  user=False, session=None):
     """
     Using the given scopes, generate token to give access to different parts
     of the public API.
@@ -212,39 +148,17 @@ def generateToken(expiry, deposit=False, withdraw=False, positions=False,
     withdraw: Allow withdraw (optional)
     positions: Allow opening or closing trade positions (optional)
     user: Allow access to user information (optional)
+    session: Session returned by login. (optional)
     """
 
-    headers = {
-        'content-type': "application/json",
-        'accept': "application/json",
-    }
-    scopes = []
-    if deposit:
-        scopes += "deposit"
-    if withdraw:
-        scopes += "withdraw"
-    if positions:
-        scopes += "positions"
-    if user:
-        scopes += "user"
-    payloadDict = {
-        'expiry': expiry,
-        'scopes': scopes,
-        }
-    payload = json.dumps(payloadDict)
-
-    tokenInfo = requests.post(
-        APIUrls.lnapi+APIUrls.tokenUrl,
-        data=payload,
-        headers=headers,
+    return Client.getDefaultClient().generateToken(
+        expiry,
+        deposit=deposit,
+        withdraw=withdraw,
+        positions=positions,
+        user=user,
+        session=session,
     )
-    if tokenInfo.status_code == 200:
-        return tokenInfo.json()['token']
-    else:
-        raise RuntimeError(
-            'Unable to generate user tokens:\n'
-            f'{tokenInfo.text}'
-        )
 
 
 def deposit(token, amount, unit="sat"):
@@ -261,28 +175,7 @@ def deposit(token, amount, unit="sat"):
     expiry: time in seconds before expiry of request
     """
 
-    headers = {
-        'content-type': "application/json",
-        'accept': "application/json",
-        'authorization': f"Bearer {token}",
-    }
-    payload = json.dumps({
-        'amount': amount,
-        'unit': unit,
-    })
-
-    invoice = requests.post(
-        APIUrls.lnapi+APIUrls.depositUrl,
-        data=payload,
-        headers=headers,
-    )
-    if invoice.status_code == 200:
-        return invoice.json()
-    else:
-        raise RuntimeError(
-            'Unable to get invoice:\n'
-            f'{invoice.text}'
-        )
+    return Client.getDefaultClient().deposit(amount, unit=unit, token=token)
 
 
 def withdrawInvoice(token, amount, invoice, unit="sat"):
@@ -303,29 +196,9 @@ def withdrawInvoice(token, amount, invoice, unit="sat"):
     paymentHash: Payment hash of settled invoice
     """
 
-    headers = {
-        'content-type': "application/json",
-        'accept': "application/json",
-        'authorization': f"Bearer {token}",
-    }
-    payload = json.dumps({
-        'amount': amount,
-        'unit': unit,
-        'invoice': invoice,
-    })
-
-    payment = requests.post(
-        APIUrls.lnapi+APIUrls.withdrawUrl,
-        data=payload,
-        headers=headers,
+    return Client.getDefaultClient().withdrawInvoice(
+        amount, invoice, unit=unit, token=token,
     )
-    if payment.status_code == 200:
-        return payment.json()
-    else:
-        raise RuntimeError(
-            'Unable to make payment:\n'
-            f'{payment.text}'
-        )
 
 
 def withdrawLNURL(token, amount, unit="sat"):
@@ -342,58 +215,18 @@ def withdrawLNURL(token, amount, unit="sat"):
     lnurl: LNURL BECH32 encoded string for wallet
     """
 
-    headers = {
-        'content-type': "application/json",
-        'accept': "application/json",
-        'authorization': "Bearer {token}",
-    }
-    payload = json.dumps({
-        'amount': amount,
-        'unit': unit,
-    })
-
-    LNUrlInfo = requests.post(
-        APIUrls.lnapi+APIUrls.withdrawLNUrl,
-        data=payload,
-        headers=headers,
+    return Client.getDefaultClient().withdrawLNURL(
+        amount, unit=unit, token=token,
     )
-    if LNUrlInfo.status_code == 200:
-        return LNUrlInfo.json()
-    else:
-        raise RuntimeError(
-            'Unable to create LNURL:\n'
-            f'{LNUrlInfo.text}'
-        )
 
 
 def login(token):
     """
     Use existing credentials to log in.
+    Returns a Session which every function accepts in place of a token.
     """
 
-    headers = {
-        'Content-Type': "application/json",
-        'Accept': "application/json",
-    }
-    session = requests.Session()
-    payload = json.dumps({
-        'type': "object",
-        'additionalProperties': False,
-        'required': [token],
-        'properties': {"token": {"type": "string"}}
-    })
-    loginResp = session.post(
-        APIUrls.lnapi+APIUrls.loginUrl,
-        data=payload,
-        headers=headers,
-    )
-    if loginResp.status_code == 200:
-        return session
-    else:
-        raise RuntimeError(
-            'Unable to login:\n'
-            f'{loginResp.text}'
-        )
+    return Client.getDefaultClient().login(token)
 
 
 def logout(session):
@@ -401,4 +234,4 @@ def logout(session):
     Deletes session cookie
     """
 
-    return session.post(APIUrls.lnapi+APIUrls.logoutUrl).ok
+    return Client.getDefaultClient().logout(session)
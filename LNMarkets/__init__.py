@@ -1,4 +1,53 @@
-from . import User
-from . import Positions
-from . import State
-from . import History
+import importlib
+import sys
+
+# Submodules are imported on first access, so `import LNMarkets` stays
+# cheap and only the modules a program uses pay for requests, asyncio or
+# numpy.
+_SUBMODULES = (
+    'APIUrls',
+    'Client',
+    'AsyncClient',
+    'Accounts',
+    'Auth',
+    'PositionBook',
+    'MarkToMarket',
+    'Cache',
+    'Coalescer',
+    'PriceFeed',
+    'RateLimiter',
+    'Retry',
+    'Errors',
+    'Metrics',
+    'Serializer',
+    'Models',
+    'Columnar',
+    'Portfolio',
+    'HistoryStore',
+    'MockServer',
+    'Benchmark',
+    'User',
+    'Positions',
+    'State',
+    'History',
+)
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
+
+
+if sys.version_info < (3, 7):
+    for _name in _SUBMODULES:
+        try:
+            __getattr__(_name)
+        except ImportError:
+            # Columnar, Portfolio and HistoryStore need the numpy extra.
+            pass
@@ -20,9 +20,10 @@ class PyTest(TestCommand):
     def run_tests(self):
         import pytest
 
-        errno = pytest.main([
-            "--token", self.token,
-        ])
+        args = []
+        if self.token is not None:
+            args += ["--token", self.token]
+        errno = pytest.main(args)
         sys.exit(errno)
 
 
@@ -43,6 +44,11 @@ setup(
     author_email="divyanshu.baggar@pm.me",
     license='MIT',
     install_requires=['requests'],
+    extras_require={
+        'async': ['aiohttp'],
+        'numpy': ['numpy'],
+        'fast': ['orjson'],
+    },
     setup_requires=['pytest-runner'],
     tests_require=['pytest==4.4.1'],
     test_suite='tests',
@@ -1,13 +1,33 @@
 # content of conftest.py
 import pytest
+from LNMarkets import Client
+from LNMarkets.MockServer import MockServer
 
 
 def pytest_addoption(parser):
     parser.addoption(
-        "--token", action="store", help="JWT Token"
+        "--token", action="store",
+        help="JWT Token, runs the tests against the live API instead of "
+        "a local MockServer"
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def token(request):
-    return request.config.getoption("--token")
+    token = request.config.getoption("--token")
+    if token is not None:
+        yield token
+        return
+    with MockServer() as server:
+        Client.setDefaultClient(Client.Client(baseUrl=server.url))
+        try:
+            yield server.token
+        finally:
+            Client.getDefaultClient().close()
+            Client.setDefaultClient(None)
+
+
+@pytest.fixture
+def mockServer():
+    with MockServer() as server:
+        yield server
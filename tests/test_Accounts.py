@@ -0,0 +1,52 @@
+from LNMarkets import APIUrls
+from LNMarkets.Accounts import AccountManager
+from LNMarkets.Errors import AuthError
+
+
+def test_fanOut(mockServer):
+    accounts = {'main': mockServer.token, 'hedge': mockServer.token}
+    with AccountManager(accounts, baseUrl=mockServer.url, poolSize=2,
+                        rate=50) as manager:
+        manager.add('revoked', 'bad-token', rate=5)
+        assert len(manager) == 3 and 'revoked' in manager
+        assert manager['main'].session is not manager['hedge'].session
+        assert manager['main'].session.get_adapter(mockServer.url) is \
+            manager.adapter
+        assert manager['revoked'].limiter.rate == 5
+
+        balances = manager.getBalance()
+        assert set(balances.results) == {'main', 'hedge'}
+        assert isinstance(balances.errors['revoked'], AuthError)
+        assert balances.total == 2 * mockServer.user['balance']
+
+        manager['main'].buy(10, quantity=1)
+        manager['hedge'].sell(10, quantity=1)
+        closed = manager.closeAll(names=['main', 'hedge'])
+        assert closed.ok and set(closed.results) == {'main', 'hedge'}
+        assert closed.total == sum(closed.results.values())
+
+        manager.remove('revoked')
+        assert manager.userInformation().ok
+    assert mockServer.requests[('GET', APIUrls.userUrl)] == 5
+
+
+def test_sharedPoolIsBounded(mockServer):
+    with AccountManager(baseUrl=mockServer.url, poolSize=2) as manager:
+        for index in range(6):
+            manager.add(index, mockServer.token)
+        assert manager.map(
+            lambda client: client.getPositions('running'), workers=6,
+        ).ok
+        pool = manager.adapter.poolmanager.connection_from_url(mockServer.url)
+        assert pool.num_connections <= 2
+
+
+def test_loginDoesNotAuthenticateOtherAccounts(mockServer):
+    accounts = {'a': mockServer.token, 'b': 'bad-token'}
+    with AccountManager(accounts, baseUrl=mockServer.url) as manager:
+        manager['a'].authenticate()
+        balances = manager.getBalance()
+        assert list(balances.results) == ['a']
+        assert isinstance(balances.errors['b'], AuthError)
+        closed = manager.closeAll(names=['b'])
+        assert isinstance(closed.errors['b'], AuthError)
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from LNMarkets import AsyncClient
+from LNMarkets.PositionBook import PositionCursor
+
+
+def test_createPositionValidation():
+    client = AsyncClient.AsyncClient('abc')
+    with pytest.raises(ValueError):
+        asyncio.run(client.createPosition('m', 'b', 1))
+    assert client.session is None
+
+
+def test_sessionLifecycle():
+    pytest.importorskip('aiohttp')
+
+    async def run():
+        async with AsyncClient.AsyncClient('abc') as client:
+            session = client._getSession()
+            assert client._getSession() is session
+        assert client.session is None
+
+    asyncio.run(run())
+
+
+def test_positionQueriesReadTheBook():
+    client = AsyncClient.AsyncClient('abc', baseUrl='http://127.0.0.1:1')
+    client.trackPositions().update(
+        {'pid': 'a', 'type': 'm', 'side': 'b', 'closed': False,
+         'canceled': False, 'pl': 5},
+    )
+    assert asyncio.run(client.isOpen('a'))
+    assert not asyncio.run(client.isOpen('b'))
+    assert asyncio.run(client.unrealizedProfit()) == 5.0
+
+
+def test_refreshPositionsIsIncremental(mockServer):
+    pytest.importorskip('aiohttp')
+
+    async def run():
+        async with AsyncClient.AsyncClient(
+                mockServer.token, baseUrl=mockServer.url,
+        ) as client:
+            book = await client.refreshPositions()
+            pid = (await client.buy(10, quantity=1))['position']['pid']
+            book.remove(pid)
+            await client.refreshPositions(['running'])
+            return book.stateOf(pid)
+
+    assert asyncio.run(run()) == 'running'
+
+
+def test_closePositionsAggregatesErrors():
+    client = AsyncClient.AsyncClient('abc')
+
+    async def closePosition(pid, token=None):
+        if pid == 2:
+            raise RuntimeError('Unable to close position 2')
+        return {'pid': pid, 'pl': pid * 10}
+
+    client.closePosition = closePosition
+    result = asyncio.run(client.closePositions([1, 2, 3], workers=2))
+    assert result.pl == 40.0
+    assert list(result.errors) == [2]
+
+
+def test_iterTransactionsWalksPages():
+    client = AsyncClient.AsyncClient('abc')
+
+    async def getTransactions(type, nbitem=-1, index=1, start=None,
+                              end=None, token=None):
+        return [{'id': (index - 1) * nbitem + i}
+                for i in range(nbitem if index < 3 else 0)]
+
+    client.getTransactions = getTransactions
+
+    async def run():
+        return [transaction['id'] async for transaction in
+                client.iterTransactions('deposit', pageSize=2)]
+
+    assert asyncio.run(run()) == [0, 1, 2, 3]
+
+
+def test_iterPositionsPagesByTime(mockServer):
+    pytest.importorskip('aiohttp')
+
+    async def run():
+        async with AsyncClient.AsyncClient(
+                mockServer.token, baseUrl=mockServer.url,
+        ) as client:
+            for _ in range(5):
+                pid = (await client.buy(10, quantity=1))['position']['pid']
+                await client.closePosition(pid)
+                mockServer.positions[pid]['closed_ts'] = 100
+            mockServer.positions[pid]['closed_ts'] = 200
+            assert await client.realizedProfit(start=150) == float(
+                mockServer.positions[pid]['pl'],
+            )
+            cursor = PositionCursor()
+            first = await client.newPositions(cursor, pageSize=2)
+            return first, await client.newPositions(cursor), [
+                position async for position in client.iterPositions(
+                    pageSize=2, models=True,
+                )
+            ]
+
+    first, again, models = asyncio.run(run())
+    assert len(first) == 5 and again == []
+    assert len({position.pid for position in models}) == 5
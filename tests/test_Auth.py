@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from LNMarkets import APIUrls, AsyncClient, Client
+from LNMarkets.Auth import SessionAuth
+
+
+def test_sessionInPlaceOfToken(mockServer):
+    client = Client.Client(baseUrl=mockServer.url)
+    session = client.login(mockServer.token)
+    assert client.getBalance(session) == mockServer.user['balance']
+    pid = client.buy(10, quantity=1, token=session)['position']['pid']
+    running = client.getPositions('running', token=session)['running']
+    assert [position['pid'] for position in running] == [pid]
+    assert len(client.getTokens(session)) == 1
+    client.close()
+
+
+def test_tokensAreRenewedBeforeExpiry(mockServer):
+    with Client.Client(mockServer.token, baseUrl=mockServer.url) as client:
+        auth = client.authenticate(expiry=60, refreshBefore=59.5)
+        first = client.token
+        assert first != mockServer.token and auth.refreshes == 1
+        client.userInformation()
+        assert auth.refreshes == 1
+        auth.expiresAt -= 1
+        client.userInformation()
+        assert auth.refreshes == 2 and client.token != first
+        logins = mockServer.requests[('POST', APIUrls.loginUrl)]
+        assert logins == 1
+
+
+def test_expiredTokenAndSessionAreRenewed(mockServer):
+    with Client.Client(mockServer.token, baseUrl=mockServer.url) as client:
+        auth = client.authenticate()
+        rejected = client.token
+        mockServer.expire()
+        calls = []
+        client.addHook('afterReceive', lambda call: calls.append(
+            (call.url, call.status),
+        ))
+        assert client.getBalance() == mockServer.user['balance']
+        assert auth.refreshes == 2 and client.token != rejected
+        userCalls = [call for call in calls if call[0] == APIUrls.userUrl]
+        assert userCalls == [(APIUrls.userUrl, 401), (APIUrls.userUrl, 200)]
+        assert mockServer.requests[('POST', APIUrls.loginUrl)] == 2
+        assert auth.logout()
+        assert client.auth is None
+
+
+def test_refreshBeforeMustBeShorterThanExpiry():
+    with pytest.raises(ValueError):
+        SessionAuth(Client.Client(), 'abc', expiry=60, refreshBefore=60)
+
+
+def test_loginSendsTheToken(mockServer):
+    with Client.Client(baseUrl=mockServer.url) as client:
+        assert client._loginPayload('abc') == {'token': 'abc'}
+        schema = {'type': 'object', 'required': [mockServer.token]}
+        response = client._send('POST', APIUrls.loginUrl, payload=schema,
+                                auth=False)
+        assert response.status_code == 401
+
+
+def test_asyncSessionAndRenewal(mockServer):
+    pytest.importorskip('aiohttp')
+
+    async def run():
+        async with AsyncClient.AsyncClient(
+                mockServer.token, baseUrl=mockServer.url,
+        ) as client:
+            session = await client.login()
+            try:
+                balance = await client.getBalance(session)
+                tokens = await client.getTokens(session)
+            finally:
+                await session.close()
+            auth = await client.authenticate()
+            rejected = client.token
+            mockServer.expire()
+            renewed = await client.getBalance()
+            return balance, tokens, auth, rejected, client.token, renewed
+
+    balance, tokens, auth, rejected, token, renewed = asyncio.run(run())
+    assert balance == renewed == mockServer.user['balance']
+    assert len(tokens) == 1
+    assert auth.refreshes == 2 and token != rejected
+    assert mockServer.requests[('GET', APIUrls.userUrl)] == 3
@@ -0,0 +1,60 @@
+import json
+import subprocess
+import sys
+from LNMarkets import Benchmark
+
+
+def test_runCompareAndSave(tmp_path):
+    report = Benchmark.run(
+        calls=5, modes=('pooled', 'concurrent'),
+        cases=('getPositions', 'closeAllLongs'), workers=2,
+        allocationCalls=1, imports=(),
+    )
+    rows = [(result['case'], result['mode']) for result in report['results']]
+    assert rows == [
+        ('getPositions', 'pooled'), ('closeAllLongs', 'pooled'),
+        ('getPositions', 'concurrent'),
+    ]
+    pooled = report['results'][0]
+    assert pooled['p50'] <= pooled['p99'] and pooled['rps'] > 0
+    assert pooled['allocBytes'] > 0
+    with open(Benchmark.save(report, str(tmp_path))) as file:
+        previous = json.load(file)
+    ratios = Benchmark.compare(report, previous)
+    assert ratios[('getPositions', 'pooled')]['p50'] == 1.0
+    assert 'getPositions' in Benchmark.render(report, ratios)
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert Benchmark.percentile(values, 0.5) == 50
+    assert Benchmark.percentile(values, 0.99) == 99
+    assert Benchmark.percentile([3.0], 0.99) == 3.0
+
+
+def test_importIsLazy():
+    code = (
+        'import sys, LNMarkets; '
+        'assert "requests" not in sys.modules; '
+        'assert "asyncio" not in sys.modules; '
+        'LNMarkets.Positions; '
+        'assert "LNMarkets.Client" in sys.modules; '
+        'assert "LNMarkets.AsyncClient" not in sys.modules'
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+    assert 0 < Benchmark.importTime('LNMarkets', repeat=1) < 1
+
+
+def test_everySubmoduleIsRegistered():
+    import os
+    import LNMarkets
+    directory = os.path.dirname(LNMarkets.__file__)
+    modules = {
+        name[:-3] for name in os.listdir(directory)
+        if name.endswith('.py') and not name.startswith('_')
+    }
+    assert set(LNMarkets._SUBMODULES) == modules
+    assert set(LNMarkets.__all__) == modules
+    for name in LNMarkets.__all__:
+        if name not in ('Columnar', 'Portfolio', 'HistoryStore'):
+            assert getattr(LNMarkets, name).__name__ == f'LNMarkets.{name}'
@@ -0,0 +1,52 @@
+import time
+from LNMarkets import Client
+from LNMarkets.Cache import TTLCache, FRESH, STALE, MISSING
+
+
+def test_lookup():
+    cache = TTLCache({'getState': 0.05}, {'getState': 0.05})
+    assert cache.lookup('getState') == (None, MISSING)
+    cache.store('getState', 1)
+    assert cache.lookup('getState') == (1, FRESH)
+    time.sleep(0.06)
+    assert cache.lookup('getState') == (1, STALE)
+    time.sleep(0.05)
+    assert cache.lookup('getState') == (None, MISSING)
+
+
+def test_clientServesCachedState():
+    client = Client.Client()
+    calls = []
+
+    def request(*args, **kwargs):
+        calls.append(args)
+        return {'state': {'newPosition': True}, 'call': len(calls)}
+
+    client._request = request
+    client.enableCache({'getState': 60})
+    assert client.getState()['call'] == 1
+    assert client.getState()['call'] == 1
+    client.invalidateCache('getState')
+    assert client.getState()['call'] == 2
+    assert client.getNodeInformation()['call'] == 3
+    assert client.getNodeInformation()['call'] == 4
+
+
+def test_staleWhileRevalidate():
+    client = Client.Client()
+    calls = []
+
+    def request(*args, **kwargs):
+        calls.append(args)
+        return {'state': {'newPosition': True}, 'call': len(calls)}
+
+    client._request = request
+    client.enableCache({'getState': 0.01}, {'getState': 60})
+    assert client.getState()['call'] == 1
+    time.sleep(0.02)
+    assert client.getState()['call'] == 1
+    for _ in range(100):
+        if client.cache.lookup('getState')[1] == FRESH:
+            break
+        time.sleep(0.01)
+    assert client.getState()['call'] == 2
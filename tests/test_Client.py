@@ -0,0 +1,107 @@
+import pytest
+from LNMarkets import Client
+
+
+def test_headersCached():
+    client = Client.Client('abc')
+    headers = client._headers('abc', True)
+    assert headers['Authorization'] == 'Bearer abc'
+    assert headers['Content-Type'] == 'application/json'
+    assert client._headers('abc', True) is headers
+    assert 'Authorization' not in client._headers()
+
+
+def test_createPositionValidation():
+    client = Client.Client('abc')
+    with pytest.raises(ValueError):
+        client.createPosition('m', 'b', 1)
+    with pytest.raises(ValueError):
+        client.createPosition('l', 'b', 1, quantity=1)
+
+
+def test_defaultClient():
+    client = Client.getDefaultClient()
+    assert client is Client.getDefaultClient()
+    other = Client.Client()
+    Client.setDefaultClient(other)
+    assert Client.getDefaultClient() is other
+    Client.setDefaultClient(client)
+
+
+def test_closePositionsAggregatesErrors():
+    client = Client.Client('abc')
+
+    def closePosition(pid, token=None):
+        if pid == 2:
+            raise RuntimeError('Unable to close position 2')
+        return {'pid': pid, 'pl': pid * 10}
+
+    client.closePosition = closePosition
+    result = client.closePositions([1, 2, 3], workers=3)
+    assert not result.ok
+    assert result.pl == 40.0
+    assert list(result.errors) == [2]
+    assert [data if isinstance(data, dict) else None
+            for data in result.ordered()] == [
+        {'pid': 1, 'pl': 10}, None, {'pid': 3, 'pl': 30},
+    ]
+
+    client.getPositions = lambda type_=None, token=None: [
+        {'pid': pid, 'side': 'b', 'closed': False, 'canceled': False}
+        for pid in (1, 2, 3)
+    ]
+    with pytest.raises(Client.BulkError) as error:
+        client.closeAllLongs(workers=2)
+    assert error.value.result.pl == 40.0
+
+
+def test_createPositionsValidatesUpFront():
+    client = Client.Client('abc')
+    sent = []
+    client._submitPosition = lambda payload, token=None: sent.append(payload)
+    with pytest.raises(ValueError, match='Invalid order 1'):
+        client.createPositions([
+            {'type_': 'm', 'side': 'b', 'leverage': 1, 'quantity': 1},
+            {'type_': 'l', 'side': 'b', 'leverage': 1, 'quantity': 1},
+        ])
+    assert sent == []
+
+
+def test_createPositionsKeepsInputOrder():
+    client = Client.Client('abc')
+
+    def submit(payload, token=None):
+        if payload['price'] == 2:
+            raise RuntimeError('Unable to create position')
+        return {'position': {'price': payload['price']}}
+
+    client._submitPosition = submit
+    result = client.createPositions([
+        {'type_': 'l', 'side': 'b', 'leverage': 1, 'quantity': 1,
+         'price': price}
+        for price in range(5)
+    ], workers=4)
+    ordered = result.ordered()
+    assert isinstance(ordered[2], RuntimeError)
+    assert [data['position']['price'] for data in ordered
+            if isinstance(data, dict)] == [0, 1, 3, 4]
+
+
+def test_iterTransactionsWalksPages():
+    client = Client.Client('abc')
+    pages = []
+
+    def getTransactions(type, nbitem=-1, index=1, start=None, end=None,
+                        token=None):
+        pages.append(index)
+        return [{'id': (index - 1) * nbitem + i}
+                for i in range(nbitem if index < 3 else 1)]
+
+    client.getTransactions = getTransactions
+    for prefetch in (True, False):
+        pages.clear()
+        ids = [transaction['id'] for transaction in client.iterTransactions(
+            'deposit', pageSize=2, prefetch=prefetch,
+        )]
+        assert ids == [0, 1, 2, 3, 4]
+        assert pages == [1, 2, 3]
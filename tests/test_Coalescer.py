@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+import pytest
+from LNMarkets import APIUrls, AsyncClient, Client
+from LNMarkets.Coalescer import Coalescer, flightKey
+from LNMarkets.MockServer import MockServer
+
+
+def test_concurrentCallsShareOneLoad():
+    coalescer = Coalescer()
+    started = threading.Event()
+    release = threading.Event()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        started.set()
+        release.wait(5)
+        return {'balance': 1}
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(coalescer.run('key', loader)),
+        )
+        for _ in range(8)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while coalescer.saved < 7:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert results == [{'balance': 1}] * 8
+    assert (coalescer.requests, coalescer.saved) == (1, 7)
+    assert coalescer.inFlight == 0
+    assert coalescer.run('key', lambda: 2) == 2
+
+
+def test_errorsAreShared():
+    coalescer = Coalescer()
+
+    def loader():
+        raise RuntimeError('down')
+
+    with pytest.raises(RuntimeError):
+        coalescer.run('key', loader)
+    assert coalescer.inFlight == 0
+
+
+def test_flightKey():
+    assert flightKey('GET', '/a', 't', {'b': 1, 'a': 2}) == \
+        flightKey('GET', '/a', 't', {'a': 2, 'b': 1})
+    assert flightKey('GET', '/a', 't') != flightKey('GET', '/a', 'u')
+    assert flightKey('GET', '/a', params={'a': [1]}) is None
+
+
+def test_clientCoalescesIdenticalGets():
+    with MockServer(latency=0.2) as server:
+        client = Client.Client(server.token, baseUrl=server.url)
+        coalescer = client.enableCoalescing()
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    client.getPositions('running'),
+                ),
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client.buy(10, quantity=1)
+        client.buy(10, quantity=1)
+        client.close()
+    assert len(results) == 5
+    assert server.requests[('GET', APIUrls.positionUrl)] == 1
+    assert server.requests[('POST', APIUrls.positionUrl)] == 2
+    assert (coalescer.requests, coalescer.saved) == (1, 4)
+
+
+def test_asyncClientCoalescesIdenticalGets():
+    pytest.importorskip('aiohttp')
+
+    async def run(server):
+        async with AsyncClient.AsyncClient(
+                server.token, baseUrl=server.url,
+        ) as client:
+            coalescer = client.enableCoalescing()
+            results = await asyncio.gather(
+                *(client.userInformation() for _ in range(5)),
+                client.getBidOffer(limit=1),
+            )
+            return results, coalescer
+
+    with MockServer(latency=0.2) as server:
+        results, coalescer = asyncio.run(run(server))
+    assert results[0] is results[4]
+    assert server.requests[('GET', APIUrls.userUrl)] == 1
+    assert (coalescer.requests, coalescer.saved) == (2, 4)
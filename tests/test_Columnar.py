@@ -0,0 +1,34 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+from LNMarkets import Columnar  # noqa: E402
+
+
+def test_toColumnsSortsByTime():
+    columns = Columnar.toColumns([
+        {'time': 3000, 'index': 3.0},
+        {'time': 1000, 'index': 1.0},
+        {'time': 2000, 'index': 2.0},
+    ])
+    assert columns['time'].dtype == np.int64
+    assert columns['index'].dtype == np.float64
+    assert columns['time'].tolist() == [1000, 2000, 3000]
+    assert columns['index'].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_ohlc():
+    time = np.array([0, 10, 20, 60, 70], dtype=np.int64)
+    price = np.array([5.0, 7.0, 4.0, 6.0, 8.0])
+    bars = Columnar.ohlc(time, price, 60)
+    assert bars['time'].tolist() == [0, 60]
+    assert bars['open'].tolist() == [5.0, 6.0]
+    assert bars['high'].tolist() == [7.0, 8.0]
+    assert bars['low'].tolist() == [4.0, 6.0]
+    assert bars['close'].tolist() == [4.0, 8.0]
+    assert bars['count'].tolist() == [3, 2]
+
+
+def test_rolling():
+    values = np.array([1.0, 2.0, 3.0, 4.0])
+    assert Columnar.rollingMean(values, 2).tolist() == [1.5, 2.5, 3.5]
+    assert Columnar.rollingStd(values, 2).tolist() == [0.5, 0.5, 0.5]
@@ -0,0 +1,43 @@
+import datetime
+import json
+import pytest
+from LNMarkets import Errors
+
+
+class FakeResponse:
+    def __init__(self, status_code, text, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.elapsed = datetime.timedelta(seconds=0.25)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+@pytest.mark.parametrize('status, errorType', [
+    (401, Errors.AuthError),
+    (403, Errors.AuthError),
+    (400, Errors.ValidationError),
+    (429, Errors.RateLimitError),
+    (503, Errors.ServerError),
+])
+def test_errorFor(status, errorType):
+    error = Errors.errorFor(
+        FakeResponse(status, '{"message": "nope"}', {'Retry-After': '3'}),
+        'Unable to get positions', 'GET', '/futures',
+    )
+    assert type(error) is errorType
+    assert isinstance(error, RuntimeError)
+    assert error.status == status
+    assert error.body == {'message': 'nope'}
+    assert error.elapsed == 0.25
+    assert str(error) == 'Unable to get positions:\n{"message": "nope"}'
+    if status == 429:
+        assert error.retryAfter == 3.0
+
+
+def test_errorForTextBody():
+    error = Errors.errorFor(FakeResponse(502, 'Bad Gateway'), 'Unable')
+    assert error.body is None
+    assert error.text == 'Bad Gateway'
@@ -0,0 +1,77 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+from LNMarkets import Client  # noqa: E402
+from LNMarkets.HistoryStore import HistoryStore  # noqa: E402
+from LNMarkets.MockServer import MockServer  # noqa: E402
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def getIndex(self, start=None, end=None, limit=None):
+        self.calls.append((start, end))
+        entries = [{'time': time, 'index': time / 10} for time in
+                   (3000, 1000, 2000, 4000)]
+        entries = sorted(
+            (entry for entry in entries
+             if (start is None or entry['time'] >= start) and
+             (end is None or entry['time'] <= end)),
+            key=lambda entry: entry['time'], reverse=True,
+        )
+        return entries[:limit]
+
+    def getBidOffer(self, start=None, end=None, limit=None):
+        return []
+
+
+def test_updateFetchesOnlyMissing(tmp_path):
+    client = FakeClient()
+    store = HistoryStore(str(tmp_path), client)
+    assert store.update() == {'index': 4, 'bidOffer': 0}
+    assert store.update() == {'index': 0, 'bidOffer': 0}
+    assert client.calls == [(None, None), (None, 999), (4001, None)]
+    assert store.lastTime('index') == 4000
+    assert store.read('index', 2000, 3000)['time'].tolist() == [2000, 3000]
+
+
+def test_appendSkipsOldAndRecoversPartialWrite(tmp_path):
+    store = HistoryStore(str(tmp_path), FakeClient())
+    store.append('bidOffer', [{'time': 2, 'bid': 1.0, 'offer': 2.0}])
+    assert store.append('bidOffer', [
+        {'time': 1, 'bid': 1.0, 'offer': 2.0},
+        {'time': 3, 'bid': 1.5, 'offer': 2.5},
+        {'time': 3, 'bid': 1.5, 'offer': 2.5},
+    ]) == 1
+    with open(store.path('bidOffer'), 'ab') as file:
+        file.write(b'\0' * 5)
+    store = HistoryStore(str(tmp_path), FakeClient())
+    columns = store.columns('bidOffer')
+    assert columns['time'].tolist() == [2, 3]
+    assert columns['offer'].tolist() == [2.0, 2.5]
+
+
+def test_updateBackfillsGapLongerThanLimit(tmp_path):
+    client = FakeClient()
+    store = HistoryStore(str(tmp_path), client)
+    store.append('index', [{'time': 500, 'index': 50.0}])
+    assert store.update(limit=2) == {'index': 4, 'bidOffer': 0}
+    assert store.read('index')['time'].tolist() == [
+        500, 1000, 2000, 3000, 4000,
+    ]
+    assert client.calls == [(501, None), (501, 2999), (501, 999)]
+
+
+def test_updateBackfillsPastTheServerCap(tmp_path):
+    with MockServer(history=2500) as server:
+        client = Client.Client(baseUrl=server.url)
+        assert len(client.getIndex()) == server.historyLimit
+        store = HistoryStore(str(tmp_path), client)
+        assert store.update(['index']) == {'index': 2501}
+        assert store.read('index')['time'].tolist() == [
+            entry['time'] for entry in server.index
+        ]
+        server.setPrice(10100)
+        assert store.update(['index']) == {'index': 1}
+        client.close()
@@ -0,0 +1,53 @@
+import pytest
+from LNMarkets.PositionBook import PositionBook
+from LNMarkets.MarkToMarket import MarkToMarket, positionProfit
+
+
+def position(pid, side='b', quantity=100, price=10000, margin=1000,
+             liquidation=None):
+    return {
+        'pid': pid, 'side': side, 'type': 'm', 'quantity': quantity,
+        'price': price, 'margin': margin, 'liquidation': liquidation,
+        'pl': 0, 'closed': False, 'canceled': False,
+    }
+
+
+def test_positionProfit():
+    assert positionProfit(position('a'), 20000) == pytest.approx(500000)
+    assert positionProfit(
+        position('a', side='s'), 20000,
+    ) == pytest.approx(-500000)
+
+
+def test_marksSidesFromBidAndOffer():
+    book = PositionBook()
+    book.update(position('a', liquidation=9000))
+    book.update(position('b', price=20000, liquidation=18000))
+    book.update(position('c', side='s', liquidation=11000))
+    engine = MarkToMarket(book, bid=20000, offer=10000)
+    assert engine.unrealizedProfit('b') == pytest.approx(500000)
+    assert engine.unrealizedProfit('s') == pytest.approx(0)
+    assert engine.unrealizedProfit() == pytest.approx(sum(
+        engine.profitOf(pid) for pid in 'abc'
+    ))
+    assert engine.marginRatio('b') == pytest.approx(251.0)
+    assert engine.liquidationDistance('b') == pytest.approx(0.1)
+    assert engine.liquidationDistance() == pytest.approx(0.1)
+    engine.apply([
+        {'time': 2, 'bid': 20000, 'offer': 5000},
+        {'time': 1, 'bid': 1, 'offer': 1},
+    ])
+    assert engine.time == 2
+    assert engine.unrealizedProfit('s') == pytest.approx(1000000)
+
+
+def test_followsBookChanges():
+    book = PositionBook()
+    engine = MarkToMarket(book, bid=20000, offer=20000)
+    assert engine.unrealizedProfit() == 0
+    assert engine.marginRatio() is None
+    book.update(position('a'))
+    assert engine.unrealizedProfit() == pytest.approx(500000)
+    book.update({'pid': 'a', 'closed': True})
+    assert engine.unrealizedProfit() == 0
+    assert engine.profitOf('a') is None
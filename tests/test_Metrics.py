@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from LNMarkets import APIUrls, AsyncClient, Client
+from LNMarkets.Errors import ValidationError
+from LNMarkets.Metrics import MetricsCollector
+from LNMarkets.Retry import RetryPolicy
+
+
+def test_hooksAndPhases(mockServer):
+    client = Client.Client(mockServer.token, baseUrl=mockServer.url)
+    events = []
+    for event in ('beforeSend', 'afterReceive', 'onError'):
+        client.addHook(
+            event, lambda call, event=event: events.append((event, call)),
+        )
+    client.userInformation()
+    assert [event for event, _ in events] == ['beforeSend', 'afterReceive']
+    call = events[-1][1]
+    assert call.status == 200 and call.elapsed > 0
+    assert {'wait', 'connect', 'server', 'download', 'decode'} <= set(
+        call.phases,
+    )
+    events.clear()
+    client.userInformation()
+    assert 'connect' not in events[-1][1].phases
+    with pytest.raises(ValueError):
+        client.addHook('after', print)
+
+
+def test_collectorRendersPrometheus(mockServer):
+    client = Client.Client(
+        mockServer.token, baseUrl=mockServer.url,
+        retry=RetryPolicy(backoff=0),
+    )
+    metrics = MetricsCollector().attach(client)
+    mockServer.fail('GET', APIUrls.userUrl, 503)
+    client.userInformation()
+    with pytest.raises(ValidationError):
+        client.closePosition('unknown')
+    text = metrics.render()
+    user = 'method="GET",endpoint="/user"'
+    assert f'lnmarkets_requests_total{{{user},status="503"}} 1' in text
+    assert f'lnmarkets_requests_total{{{user},status="200"}} 1' in text
+    assert (
+        'lnmarkets_errors_total{method="DELETE",endpoint="/futures",'
+        'error="ValidationError"} 1'
+    ) in text
+    assert f'lnmarkets_request_duration_seconds_count{{{user}}} 2' in text
+    assert f'lnmarkets_request_duration_seconds_bucket{{{user},le="+Inf"}} 2' \
+        in text
+    assert f'lnmarkets_request_phase_seconds_count{{{user},phase="decode"}}' \
+        in text
+    metrics.detach(client)
+    client.userInformation()
+    assert metrics.render() == text
+
+
+def test_asyncHooks(mockServer):
+    pytest.importorskip('aiohttp')
+    calls = []
+
+    async def run():
+        async with AsyncClient.AsyncClient(
+                mockServer.token, baseUrl=mockServer.url,
+        ) as client:
+            client.addHook('afterReceive', calls.append)
+            await client.userInformation()
+
+    asyncio.run(run())
+    assert calls[0].status == 200
+    assert {'connect', 'server', 'decode'} <= set(calls[0].phases)
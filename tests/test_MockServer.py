@@ -0,0 +1,56 @@
+import time
+import pytest
+from LNMarkets import APIUrls, Client
+from LNMarkets.Errors import AuthError, ServerError, ValidationError
+from LNMarkets.MockServer import MockServer
+from LNMarkets.Retry import RetryPolicy
+
+
+def test_tradingMovesBalance(mockServer):
+    client = Client.Client(mockServer.token, baseUrl=mockServer.url)
+    balance = client.getBalance()
+    pid = client.buy(10, quantity=100)['position']['pid']
+    assert client.isOpen(pid)
+    mockServer.setPrice(11000)
+    closed = client.closePosition(pid)
+    assert closed['closed'] and closed['pl'] > 0
+    assert client.getBalance() == balance + closed['pl']
+    with pytest.raises(ValidationError):
+        client.closePosition(pid)
+
+
+def test_limitOrdersFill(mockServer):
+    client = Client.Client(mockServer.token, baseUrl=mockServer.url)
+    pid = client.limitBuy(10, 9000, quantity=100)['position']['pid']
+    assert [p['pid'] for p in client.getPositions('open')['open']] == [pid]
+    mockServer.setPrice(8990)
+    assert client.isOpen(pid)
+
+
+def test_errorsAndLatency():
+    with MockServer(latency=0.05) as server:
+        client = Client.Client(
+            server.token, baseUrl=server.url, retry=RetryPolicy(retries=0),
+        )
+        with pytest.raises(AuthError):
+            client.userInformation(token='wrong')
+        server.fail('GET', APIUrls.userUrl, 503)
+        with pytest.raises(ServerError):
+            client.userInformation()
+        started = time.monotonic()
+        client.userInformation()
+        assert time.monotonic() - started >= 0.05
+        assert server.requests[('GET', APIUrls.userUrl)] == 3
+
+
+def test_seededHistory():
+    first, second = MockServer(seed=1), MockServer(seed=1)
+    assert [e['bid'] for e in first.bidOffer[:-1]] == [
+        e['bid'] for e in second.bidOffer[:-1]
+    ]
+    with first:
+        client = Client.Client(baseUrl=first.url)
+        etag, entries = client._poll(APIUrls.indexUrl)
+        assert len(entries) == first.historyLimit == 1000
+        assert client._poll(APIUrls.indexUrl, etag) == (etag, None)
+        assert len(client.getIndex(limit=10)) == 10
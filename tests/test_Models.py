@@ -0,0 +1,53 @@
+from LNMarkets import Client
+from LNMarkets.Models import Position, Order, Transaction, positions
+
+
+def test_positionConvertsAtDecode():
+    position = Position.fromDict({
+        'pid': 'a', 'side': 'b', 'margin': '10', 'pl': -3,
+        'creation_ts': '1600000000000', 'closed': 0, 'label': 'x',
+    })
+    assert position.margin == 10.0 and position.pl == -3.0
+    assert position.creation_ts == 1600000000000
+    assert position.closed is False and position.canceled is None
+    assert position['label'] == 'x' and position.get('price', 1) == 1
+    assert not hasattr(position, '__dict__')
+
+
+def test_modelsActAsMappings():
+    order = Order('m', 'b', 10, quantity=1)
+    assert dict(**order) == {
+        'type_': 'm', 'side': 'b', 'leverage': 10, 'quantity': 1,
+    }
+    assert Client.BaseClient._orderPayloads([order]) == [
+        Client.BaseClient._positionPayload('m', 'b', 10, quantity=1),
+    ]
+    transaction = Transaction.fromDict({'id': 1, 'amount': '5'})
+    assert transaction.toDict() == {'id': '1', 'amount': 5.0}
+
+
+def test_responsesShapes():
+    data = {'running': [{'pid': 'a'}], 'count': 1}
+    converted = positions(data)
+    assert converted['running'] == [Position(pid='a')]
+    assert converted['count'] == 1
+
+
+def respond(data):
+    def request(*args, decode=None, **kwargs):
+        return data if decode is None else decode(data)
+    return request
+
+
+def test_clientReturnsModels():
+    client = Client.Client('abc')
+    client._request = respond([{'pid': 'a', 'pl': '2'}])
+    assert client.getPositions('running') == [{'pid': 'a', 'pl': '2'}]
+    running = client.getPositions('running', models=True)
+    assert running[0].pl == 2.0
+    client._request = respond({'data': [{'id': 'x', 'amount': 3}]})
+    page = client.getTransactions('deposit', models=True)
+    assert page['data'][0].amount == 3.0
+    assert list(client.iterTransactions(
+        'deposit', pageSize=2, models=True,
+    )) == [Transaction(id='x', amount=3)]
@@ -0,0 +1,83 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+from LNMarkets import Portfolio  # noqa: E402
+from LNMarkets.Models import Position  # noqa: E402
+
+
+def position(pid, side='b', pl=1, margin=10, closed=False, **fields):
+    return {
+        'pid': pid, 'side': side, 'pl': pl, 'margin': margin,
+        'quantity': 1, 'leverage': 10, 'closed': closed, 'canceled': False,
+        'exit_price': None, 'market_filled_ts': 1, **fields,
+    }
+
+
+def test_sums():
+    arrays = Portfolio.toArrays([
+        position('a'),
+        position('b', side='s', pl='-4', margin=20),
+        Position.fromDict(position('c', pl=5, closed=True)),
+    ])
+    assert arrays['side'].tolist() == [1, -1, 1]
+    assert np.isnan(arrays['exit_price']).all()
+    assert Portfolio.profit(arrays) == 2.0
+    assert Portfolio.profit(arrays, running=True) == -3.0
+    assert Portfolio.profit(arrays, side='b') == 6.0
+    assert Portfolio.marginWithheld(arrays) == 30.0
+    assert Portfolio.marginWithheld(arrays, side='s') == 20.0
+
+
+def test_exposure():
+    arrays = Portfolio.toArrays([
+        position('a', quantity=3),
+        position('b', side='s', quantity=1),
+        position('c', side='s', quantity=2, leverage=50),
+        position('d', quantity=9, closed=True),
+    ])
+    bySide = Portfolio.exposure(arrays)
+    assert bySide['side'].tolist() == [-1, 1]
+    assert bySide['quantity'].tolist() == [3.0, 3.0]
+    assert bySide['count'].tolist() == [2, 1]
+    byLeverage = Portfolio.exposure(arrays, by='leverage')
+    assert byLeverage['leverage'].tolist() == [10.0, 50.0]
+    assert byLeverage['quantity'].tolist() == [2.0, -2.0]
+
+
+def test_liquidationDistance():
+    arrays = Portfolio.toArrays([
+        position('a', liquidation=90),
+        position('b', side='s', liquidation=121),
+        position('c', liquidation=90, closed=True),
+    ])
+    distance = Portfolio.liquidationDistance(arrays, 100, 110)
+    assert distance[:2].tolist() == pytest.approx([0.1, 0.1])
+    assert np.isnan(distance[2])
+
+
+def test_drawdown():
+    arrays = Portfolio.toArrays([
+        position(pid, pl=pl, closed=True, closed_ts=ts)
+        for pid, pl, ts in (
+            ('a', 5, 1), ('c', 2, 3), ('b', -8, 2), ('d', 3, 4),
+        )
+    ])
+    curve = Portfolio.drawdown(arrays)
+    assert curve['time'].tolist() == [1, 2, 3, 4]
+    assert curve['equity'].tolist() == [5, -3, -1, 2]
+    assert curve['drawdown'].tolist() == [0, -8, -6, -3]
+    assert Portfolio.maxDrawdown(arrays) == 8.0
+
+
+def test_openLimitOrdersAreNotRunning():
+    arrays = Portfolio.toArrays([
+        position('a', quantity=3),
+        position('b', quantity=5, margin=50, pl=0, market_filled_ts=None),
+        position('c', pl=2, closed=True),
+    ])
+    assert arrays['open'].tolist() == [False, True, False]
+    assert arrays['running'].tolist() == [True, False, False]
+    assert Portfolio.marginWithheld(arrays) == 10.0
+    assert Portfolio.exposure(arrays)['quantity'].tolist() == [3.0]
+    assert Portfolio.profit(arrays, running=False) == 2.0
+    assert np.isnan(Portfolio.liquidationDistance(arrays, 10000.0)[1])
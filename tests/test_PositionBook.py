@@ -0,0 +1,200 @@
+import pytest
+from LNMarkets import APIUrls, Client, Positions
+from LNMarkets.PositionBook import PositionBook, PositionCursor, positionList
+
+
+def position(pid, side='b', type_='m', pl=1, margin=10, **fields):
+    return {
+        'pid': pid, 'side': side, 'type': type_, 'pl': pl, 'margin': margin,
+        'closed': False, 'canceled': False, **fields,
+    }
+
+
+def test_indexes():
+    book = PositionBook()
+    book.update(position('a'))
+    book.update(position('b', side='s', pl=2))
+    book.update(position('c', type_='l'))
+    assert book.isOpen('a') and not book.isOpen('c')
+    assert book.stateOf('c') == 'open'
+    assert book.pids('running', 'b') == ['a']
+    assert book.unrealizedProfit() == 3.0
+    assert book.marginWithheld('s') == 10.0
+
+
+def test_replaceDropsStale():
+    book = PositionBook()
+    book.replace('running', [position('a'), position('b')])
+    book.replace('running', [position('b', pl=5)])
+    assert 'a' not in book
+    assert book.unrealizedProfit() == 5.0
+
+
+def test_clientTracksResponses():
+    client = Client.Client('abc')
+    book = client.trackPositions()
+    responses = {
+        'POST': {'position': position('a')},
+        'DELETE': {'closed': True, 'pl': 7},
+    }
+    client._request = lambda method, *args, **kwargs: responses[method]
+    client.buy(1, quantity=1)
+    assert book.isOpen('a')
+    client.closePosition('a')
+    assert book.stateOf('a') == 'closed'
+    assert book.realizedProfit() == 7.0
+
+
+def test_isOpenReadsTheBook(mockServer):
+    client = Client.Client(mockServer.token, baseUrl=mockServer.url)
+    pid = client.buy(10, quantity=100)['position']['pid']
+    client.refreshPositions()
+    before = dict(mockServer.requests)
+    previous = Client.getDefaultClient()
+    Client.setDefaultClient(client)
+    try:
+        assert client.isOpen(pid) and Positions.isOpen(None, pid)
+        assert not client.isOpen('missing')
+    finally:
+        Client.setDefaultClient(previous)
+    assert mockServer.requests == before
+    client.closePosition(pid)
+    assert not client.isOpen(pid)
+
+
+def test_closeAndProfitReadTheBook(mockServer):
+    client = Client.Client(mockServer.token, baseUrl=mockServer.url)
+    longs = [client.buy(10, quantity=100)['position']['pid']
+             for _ in range(2)]
+    short = client.sell(10, quantity=100)['position']['pid']
+    mockServer.setPrice(11000)
+    book = client.refreshPositions()
+    gets = mockServer.requests[('GET', APIUrls.positionUrl)]
+    assert client.unrealizedProfit() == sum(
+        float(mockServer.positions[pid]['pl']) for pid in longs + [short]
+    ) != 0
+    assert client.closeAllLongs() > 0
+    assert mockServer.requests[('GET', APIUrls.positionUrl)] == gets
+    assert mockServer.requests[('DELETE', APIUrls.positionUrl)] == 2
+    assert all(mockServer.positions[pid]['closed'] for pid in longs)
+    assert book.pids('running') == [short]
+
+
+def test_refreshOnlyFetchesChanges(mockServer):
+    client = Client.Client(mockServer.token, baseUrl=mockServer.url)
+    other = Client.Client(mockServer.token, baseUrl=mockServer.url)
+    first = other.buy(10, quantity=100)['position']['pid']
+    order = other.limitBuy(10, 9000, quantity=100)['position']['pid']
+    book = client.refreshPositions()
+    assert (book.stateOf(first), book.stateOf(order)) == ('running', 'open')
+    other.closePosition(first)
+    mockServer.setPrice(8990)
+    second = other.buy(10, quantity=100)['position']['pid']
+    fetched = []
+    getPositions = client.getPositions
+
+    def spy(type_, **kwargs):
+        data = positionList(getPositions(type_, **kwargs), type_)
+        fetched.append((type_, kwargs['start'] is not None, len(data)))
+        return data
+
+    client.getPositions = spy
+    client.refreshPositions()
+    assert fetched == [
+        ('open', True, 0), ('running', True, 2), ('closed', False, 1),
+    ]
+    assert [book.stateOf(pid) for pid in (first, order, second)] == [
+        'closed', 'running', 'running',
+    ]
+    book.update({'pid': 'ghost', 'side': 'b', 'type': 'm'}, 'running')
+    client.refreshPositions(['running'])
+    assert 'ghost' in book
+    client.refreshPositions(['running'], full=True)
+    assert 'ghost' not in book and fetched[-1] == ('running', False, 2)
+
+
+def test_bookIgnoresOtherTokens(mockServer):
+    client = Client.Client(mockServer.token, baseUrl=mockServer.url)
+    other = client.login(mockServer.token)
+    book = client.trackPositions()
+    pid = client.buy(10, quantity=100, token=other)['position']['pid']
+    assert pid not in book
+    assert client.isOpen(pid, token=other) and not client.isOpen(pid)
+    assert mockServer.requests[('GET', APIUrls.positionUrl)] == 1
+    with pytest.raises(ValueError):
+        client.refreshPositions(token=other)
+
+
+def test_cursorSkipsSeenPositions():
+    cursor = PositionCursor()
+    first = [
+        {'pid': 'b', 'closed_ts': 2, 'pl': 1},
+        {'pid': 'a', 'closed_ts': 1, 'pl': 2},
+    ]
+    assert cursor.advance(first) == first
+    assert (cursor.since, cursor.seen, cursor.pl) == (2, {'b'}, 3.0)
+    later = [{'pid': 'c', 'closed_ts': 2, 'pl': 4}, first[0]]
+    assert cursor.advance(later) == later[:1]
+    assert (cursor.since, cursor.seen, cursor.count) == (2, {'b', 'c'}, 3)
+
+
+def test_windowedPositions(mockServer):
+    client = Client.Client(mockServer.token, baseUrl=mockServer.url)
+    pids = [client.buy(10, quantity=1)['position']['pid'] for _ in range(7)]
+    for pid in pids:
+        client.closePosition(pid)
+    times = [100, 200, 200, 200, 300, 400, 500]
+    for pid, time in zip(pids, times):
+        mockServer.positions[pid]['closed_ts'] = time
+
+    window = client.getPositions('closed', start=200, end=400, limit=2)
+    assert [p['closed_ts'] for p in positionList(window, 'closed')] == \
+        [400, 300]
+    for prefetch in (True, False):
+        paged = list(client.iterPositions(
+            'closed', pageSize=2, prefetch=prefetch,
+        ))
+        assert sorted(p['pid'] for p in paged) == sorted(pids)
+    assert client.realizedProfit(start=300) == sum(
+        float(mockServer.positions[pid]['pl']) for pid in pids[4:]
+    )
+
+    cursor = PositionCursor()
+    assert len(client.newPositions(cursor, pageSize=3)) == 7
+    before = mockServer.requests[('GET', APIUrls.positionUrl)]
+    assert client.newPositions(cursor) == []
+    assert mockServer.requests[('GET', APIUrls.positionUrl)] == before + 1
+    pid = client.buy(10, quantity=1)['position']['pid']
+    client.closePosition(pid)
+    mockServer.positions[pid]['closed_ts'] = 500
+    assert [p['pid'] for p in client.newPositions(cursor)] == [pid]
+    assert cursor.count == 8
+    client.close()
+
+
+class IgnoringClient(Client.Client):
+    def __init__(self, page):
+        super().__init__('abc')
+        self.page = page
+        self.requests = 0
+
+    def getPositions(self, type_=None, models=False, token=None, **window):
+        self.requests += 1
+        return list(self.page)
+
+
+def test_pagingStopsWhenServerIgnoresWindow():
+    page = [position(pid, closed_ts=time) for pid, time in
+            (('c', 300), ('b', 200), ('a', 100))]
+    for prefetch in (True, False):
+        client = IgnoringClient(page)
+        paged = list(client.iterPositions(
+            'closed', pageSize=2, start=150, end=250, prefetch=prefetch,
+        ))
+        assert [p['pid'] for p in paged] == ['b']
+        client = IgnoringClient(page)
+        paged = list(client.iterPositions(
+            'closed', pageSize=2, prefetch=prefetch,
+        ))
+        assert [p['pid'] for p in paged] == ['c', 'b', 'a']
+        assert client.requests == 2
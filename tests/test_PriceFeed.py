@@ -0,0 +1,82 @@
+import asyncio
+from LNMarkets import Client
+from LNMarkets.PriceFeed import PriceFeed, AsyncPriceFeed
+
+
+class FakeClient:
+    def __init__(self, responses):
+        self.responses = responses
+        self.etags = []
+        self.params = []
+
+    def _poll(self, url, etag=None, params=None):
+        self.etags.append(etag)
+        self.params.append(params)
+        if not self.responses:
+            return etag, None
+        return f'"{len(self.responses)}"', self.responses.pop(0)
+
+
+def test_deduplicatesTicks():
+    client = FakeClient([
+        [{'time': 2, 'index': 20}, {'time': 1, 'index': 10}],
+        [{'time': 2, 'index': 20}, {'time': 3, 'index': 30}],
+    ])
+    feed = PriceFeed(client, series=('index',))
+    assert feed.poll() == [
+        ('index', {'time': 1, 'index': 10}),
+        ('index', {'time': 2, 'index': 20}),
+    ]
+    assert feed.poll() == [('index', {'time': 3, 'index': 30})]
+    assert feed.poll() == []
+    assert client.etags == [None, None, None]
+    assert client.params == [
+        {'limit': 100}, {'limit': 100, 'from': 2}, {'limit': 100, 'from': 3},
+    ]
+
+
+def test_fansOutToSubscribers():
+    client = FakeClient([[{'time': 1, 'index': 10}]])
+    feed = PriceFeed(client, series=('index',), minInterval=0.01)
+    first = feed.subscribe()
+    second = feed.subscribe()
+    assert first.get(timeout=1) == ('index', {'time': 1, 'index': 10})
+    assert second.get(timeout=1) == ('index', {'time': 1, 'index': 10})
+    first.close()
+    second.close()
+    assert first.get() is None
+    assert feed._thread is None
+
+
+def test_asyncFeed():
+    class FakeAsyncClient(FakeClient):
+        async def _poll(self, url, etag=None, params=None):
+            return FakeClient._poll(self, url, etag, params)
+
+    async def run():
+        client = FakeAsyncClient([[{'time': 1, 'bid': 1, 'offer': 2}]])
+        feed = AsyncPriceFeed(client, series=('bidOffer',), minInterval=0.01)
+        subscription = feed.subscribe()
+        tick = await subscription.get()
+        await subscription.close()
+        return tick
+
+    assert asyncio.run(run()) == ('bidOffer', {'time': 1, 'bid': 1,
+                                               'offer': 2})
+
+
+def test_pollsOnlyNewEntries(mockServer):
+    client = Client.Client(baseUrl=mockServer.url)
+    statuses = []
+    client.addHook('afterReceive', lambda call: statuses.append(call.status))
+    feed = PriceFeed(client, series=('bidOffer',), limit=5)
+    first = feed.poll()
+    assert len(first) == 5
+    assert first[-1][1]['time'] == mockServer.bidOffer[-1]['time']
+    assert feed.poll() == []
+    mockServer.setPrice(12000)
+    assert [tick[1]['bid'] for tick in feed.poll()] == [12000.0]
+    assert feed.poll() == []
+    assert feed.poll() == []
+    assert statuses == [200, 200, 200, 200, 304]
+    client.close()
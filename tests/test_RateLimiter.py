@@ -0,0 +1,42 @@
+import threading
+import time
+from LNMarkets import APIUrls
+from LNMarkets.RateLimiter import (
+    RateLimiter, priorityOf, retryAfter, CRITICAL, ORDER, READ, HISTORY,
+)
+
+
+def test_priorityOf():
+    assert priorityOf('DELETE', APIUrls.positionUrl) == CRITICAL
+    assert priorityOf('POST', APIUrls.positionUrl) == ORDER
+    assert priorityOf('GET', APIUrls.positionUrl) == READ
+    assert priorityOf('GET', APIUrls.indexUrl) == HISTORY
+
+
+def test_urgentLaneGoesFirst():
+    limiter = RateLimiter(20, burst=1)
+    limiter.acquire()
+    order = []
+
+    def acquire(priority):
+        limiter.acquire(priority)
+        order.append(priority)
+
+    threads = [threading.Thread(target=acquire, args=(HISTORY,))]
+    threads[0].start()
+    time.sleep(0.01)
+    threads.append(threading.Thread(target=acquire, args=(CRITICAL,)))
+    threads[1].start()
+    for thread in threads:
+        thread.join()
+    assert order == [CRITICAL, HISTORY]
+
+
+def test_pause():
+    limiter = RateLimiter(1000)
+    limiter.pause(0.05)
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.04
+    assert retryAfter({'Retry-After': '2'}) == 2.0
+    assert retryAfter({}) == 1.0
@@ -0,0 +1,109 @@
+import datetime
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+from LNMarkets import APIUrls, Client
+from LNMarkets.Errors import NetworkError, ServerError
+from LNMarkets.Retry import RetryPolicy, CircuitOpenError
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = json.dumps({'status': status_code})
+        self.content = self.text.encode()
+        self.elapsed = datetime.timedelta(0)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, kwargs['timeout']))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+def client(outcomes, **policy):
+    client = Client.Client('abc', retry=RetryPolicy(backoff=0, **policy))
+    client.session = FakeSession(outcomes)
+    return client
+
+
+def test_idempotentRequestsAreRetried():
+    fake = client([503, requests.exceptions.ReadTimeout(), 200])
+    assert fake.getPositions() == {'status': 200}
+    assert fake.session.calls == [('GET', (5.0, 30.0))] * 3
+
+
+def test_createIsNotResent():
+    fake = client([502, 200])
+    with pytest.raises(ServerError):
+        fake.buy(1, quantity=1)
+    fake = client([requests.exceptions.ReadTimeout(), 200])
+    with pytest.raises(NetworkError):
+        fake.buy(1, quantity=1)
+    fake = client([requests.exceptions.ConnectTimeout(), 429, 200])
+    assert fake.buy(1, quantity=1) == {'status': 200}
+
+
+def test_shouldRetry():
+    policy = RetryPolicy(retries=1)
+    assert policy.shouldRetry('DELETE', APIUrls.positionUrl, 0, 500)
+    assert policy.shouldRetry('POST', APIUrls.cancelUrl, 0, 500)
+    assert not policy.shouldRetry('GET', APIUrls.positionUrl, 0, 404)
+    assert not policy.shouldRetry('GET', APIUrls.positionUrl, 1, 500)
+
+
+def test_circuitBreaker():
+    fake = client([500, 500, 200], retries=0, failureThreshold=2,
+                  resetTimeout=60)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            fake.getPositions()
+    with pytest.raises(CircuitOpenError):
+        fake.getPositions()
+    assert len(fake.session.calls) == 2
+    fake.retry.resetTimeout = 0
+    assert fake.getPositions() == {'status': 200}
+    assert fake.retry.failures == 0
+
+
+class BlockingSession(FakeSession):
+    def __init__(self, outcomes):
+        super().__init__(outcomes)
+        self.sending = threading.Event()
+        self.release = threading.Event()
+
+    def request(self, method, url, **kwargs):
+        self.sending.set()
+        self.release.wait(5)
+        return super().request(method, url, **kwargs)
+
+
+def test_halfOpenBreakerSendsOneTrial():
+    fake = client([], retries=0, failureThreshold=1, resetTimeout=60)
+    fake.session = BlockingSession([200, 200])
+    fake.retry.failure()
+    fake.retry._openedAt -= 60
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        trial = pool.submit(fake.getPositions)
+        assert fake.session.sending.wait(5)
+        others = [pool.submit(fake.getPositions) for _ in range(7)]
+        for other in others:
+            with pytest.raises(CircuitOpenError):
+                other.result(5)
+        fake.session.release.set()
+        assert trial.result(5) == {'status': 200}
+    assert len(fake.session.calls) == 1
+    assert fake.getPositions() == {'status': 200}
@@ -0,0 +1,46 @@
+import json
+import pytest
+from LNMarkets import Client, Serializer
+
+
+def test_cacheKeepsTypes():
+    serializer = Serializer.Serializer('json')
+    assert serializer.dumps({'pid': 'a', 'value': 1}) == (
+        '{"pid":"a","value":1}'
+    )
+    assert serializer.dumps({'pid': 'a', 'value': True}) == (
+        '{"pid":"a","value":true}'
+    )
+    assert serializer.dumps({'scopes': ['user']}) == '{"scopes":["user"]}'
+    assert len(serializer._cache) == 2
+
+
+def test_cacheIsBounded():
+    serializer = Serializer.Serializer('json', cacheSize=2)
+    for value in range(5):
+        serializer.dumps({'value': value})
+    assert len(serializer._cache) == 2
+    assert serializer.dumps({'value': 4}) == '{"value":4}'
+
+
+def test_backends():
+    assert Serializer.available()[-1] == 'json'
+    with pytest.raises(ValueError):
+        Serializer.Serializer('yaml')
+    for backend in Serializer.available():
+        serializer = Serializer.Serializer(backend)
+        payload = {'type': 'm', 'leverage': 10, 'margin': 1.5}
+        assert json.loads(serializer.dumps(payload)) == payload
+        assert serializer.loads(b'[{"pl": -3}]') == [{'pl': -3}]
+
+
+def test_clientsUseSerializer(mockServer):
+    for backend in Serializer.available():
+        client = Client.Client(
+            mockServer.token, baseUrl=mockServer.url,
+            serializer=Serializer.Serializer(backend),
+        )
+        pid = client.buy(10, quantity=10)['position']['pid']
+        running = client.getPositions('running', models=True)['running']
+        assert pid in [position.pid for position in running]
+        assert client.closePosition(pid)['closed']